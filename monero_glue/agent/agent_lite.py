@@ -2,7 +2,10 @@
 # -*- coding: utf-8 -*-
 # Author: Dusan Klinec, ph4r05, 2018
 
+import asyncio
+import functools
 import logging
+import time
 import traceback
 
 from monero_glue.agent import agent_misc
@@ -76,16 +79,227 @@ class TData(object):
         self.enc_keys = None  # encrypted tx keys
 
 
+def build_tsx_data(
+    tx, multisig=False, exp_tx_prefix_hash=None, use_tx_keys=None, bulletproof=False
+):
+    """
+    Builds transaction init data from the construction data
+    :param tx:
+    :type tx: xmrtypes.TxConstructionData
+    :param multisig:
+    :param exp_tx_prefix_hash:
+    :param use_tx_keys:
+    :param bulletproof: Bulletproof range proofs
+    :return:
+    :rtype: TsxData
+    """
+    payment_id = []
+    extra_idx = monero.scan_extra_fields(tx.extra)
+    extra_nonce = extra_idx.nonce_data()
+    if extra_nonce is not None and monero.has_encrypted_payment_id(extra_nonce):
+        payment_id = bytes(
+            monero.get_encrypted_payment_id_from_tx_extra_nonce(extra_nonce)
+        )
+    elif extra_nonce is not None and monero.has_payment_id(extra_nonce):
+        payment_id = bytes(monero.get_payment_id_from_tx_extra_nonce(extra_nonce))
+
+    # Init transaction
+    tsx_data = TsxData()
+    tsx_data.version = 1
+    tsx_data.payment_id = payment_id
+    tsx_data.unlock_time = tx.unlock_time
+    tsx_data.outputs = tx.splitted_dsts
+    tsx_data.change_dts = tx.change_dts
+    tsx_data.num_inputs = len(tx.sources)
+    tsx_data.mixin = len(tx.sources[0].outputs)
+    tsx_data.fee = sum([x.amount for x in tx.sources]) - sum(
+        [x.amount for x in tx.splitted_dsts]
+    )
+    tsx_data.account = tx.subaddr_account
+    tsx_data.minor_indices = tx.subaddr_indices
+    tsx_data.is_multisig = multisig
+    tsx_data.is_bulletproof = bulletproof
+    tsx_data.exp_tx_prefix_hash = common.defval(exp_tx_prefix_hash, b"")
+    tsx_data.use_tx_keys = common.defval(use_tx_keys, [])
+    return tsx_data
+
+
+def verify_range_sig(rsig):
+    """
+    Range signature check, executed in the verification pool.
+    Returns None if the verification failed with an exception.
+    :param rsig:
+    :return:
+    """
+    try:
+        return ring_ct.ver_range(C=None, rsig=rsig)
+    except Exception as e:
+        logger.error("Exception rsig: %s" % e)
+        traceback.print_exc()
+
+
+def dump_msgs(msgs):
+    """
+    Serializes list of messages, executed in the verification pool
+    :param msgs:
+    :return:
+    """
+
+    async def dump():
+        return [await tmisc.dump_msg(x) for x in msgs]
+
+    return tmisc.run_coro(dump())
+
+
+def compute_tx_prefix_hash(tx):
+    """
+    Transaction prefix hash, executed in the verification pool
+    :param tx:
+    :return:
+    """
+    return tmisc.run_coro(monero.get_transaction_prefix_hash(tx))
+
+
+def compute_pre_mlsag_hash(rv):
+    """
+    Pre-MLSAG hash, executed in the verification pool
+    :param rv:
+    :return:
+    """
+    return tmisc.run_coro(monero.get_pre_mlsag_hash(rv))
+
+
+def ki_sync_batch(tds, offset, batcher):
+    """
+    Key image data of the next key image sync step, executed in the verification pool
+    :param tds: TransferDetails from the offset, at least batch size of them
+    :param offset: index of the first one, for error reporting
+    :param batcher:
+    :type batcher: KiSyncBatcher
+    :return: list of MoneroTransferDetails
+    """
+
+    async def build():
+        return [
+            await key_image.key_image_data(td, offset + idx)
+            for idx, td in enumerate(tds)
+        ]
+
+    return batcher.next_batch(tmisc.run_coro(build()), 0)
+
+
+class KiSyncBatcher(object):
+    """
+    Adaptive batch sizing for the key image sync steps.
+
+    The batch size is tuned after each step so one round trip takes roughly
+    target_rtt seconds, bounded by the token message size limit.
+    """
+
+    # Approximate wire size of one exported key image (iv, blob, tag, framing)
+    EKI_SIZE = 12 + 96 + 16 + 8
+
+    def __init__(
+        self,
+        batch_size=10,
+        min_batch=1,
+        max_batch=64,
+        target_rtt=0.5,
+        max_msg_size=8 * 1024,
+    ):
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.target_rtt = target_rtt
+        self.max_msg_size = max_msg_size
+        self.batch_size = max(min_batch, min(max_batch, batch_size))
+
+    @staticmethod
+    def tdi_size(tdi):
+        """
+        Approximate wire size of MoneroTransferDetails
+        :param tdi:
+        :return:
+        """
+        nadd = len(tdi.additional_tx_pub_keys) if tdi.additional_tx_pub_keys else 0
+        return 32 * (2 + nadd) + 4 * (3 + nadd) + 4
+
+    def next_batch(self, tdis, offset):
+        """
+        Returns the next batch from the offset, never empty if offset is in range.
+        :param tdis:
+        :param offset:
+        :return:
+        """
+        res = []
+        msg_size = 0
+        for tdi in tdis[offset : offset + self.batch_size]:
+            csize = max(self.tdi_size(tdi), self.EKI_SIZE)
+            if res and msg_size + csize > self.max_msg_size:
+                break
+            msg_size += csize
+            res.append(tdi)
+        return res
+
+    def update(self, num, elapsed):
+        """
+        Adapts the batch size to the measured step round trip time
+        :param num: number of elements in the finished step
+        :param elapsed: step duration in seconds
+        :return:
+        """
+        if num <= 0:
+            return
+        if elapsed <= 0:
+            desired = self.batch_size * 2
+        else:
+            desired = int(self.target_rtt * num / elapsed)
+
+        # Damp changes so one outlier does not swing the size too much
+        desired = max(self.batch_size // 2, min(self.batch_size * 2, desired))
+        self.batch_size = max(self.min_batch, min(self.max_batch, desired))
+
+
 class Agent(object):
     """
     Glue agent, running on host
     """
 
-    def __init__(self, trezor, address_n=None, network_type=None, **kwargs):
+    def __init__(
+        self,
+        trezor,
+        address_n=None,
+        network_type=None,
+        max_batch=None,
+        executor=None,
+        session_id=None,
+        bulletproof=False,
+        **kwargs
+    ):
         self.trezor = trezor
         self.ct = None  # type: TData
         self.address_n = address_n if address_n else DEFAULT_MONERO_BIP44
         self.network_type = network_type
+        self.max_batch = max_batch  # upper limit on the batch size, None = token limit
+        self.executor = executor  # host-side verification pool, None = loop default
+        self.bg_tasks = []
+        self.session_id = session_id  # token session, for tokens serving more agents
+        self.bulletproof = bulletproof  # Bulletproof range proofs instead of Borromean
+
+    async def token_tsx_sign(self, msg):
+        """
+        Sends the signing protocol message in the agent's token session
+        :param msg:
+        :return:
+        """
+        return await self.trezor.tsx_sign(msg, session_id=self.session_id)
+
+    async def token_ki_sync(self, msg):
+        """
+        Sends the key image sync message in the agent's token session
+        :param msg:
+        :return:
+        """
+        return await self.trezor.key_image_sync(msg, session_id=self.session_id)
 
     def is_simple(self, rv):
         """
@@ -93,7 +307,7 @@ class Agent(object):
         :param rv:
         :return:
         """
-        return rv.type in [xmrtypes.RctType.Simple, xmrtypes.RctType.SimpleBulletproof]
+        return monero.is_rct_simple(rv.type)
 
     def is_bulletproof(self, rv):
         """
@@ -101,10 +315,23 @@ class Agent(object):
         :param rv:
         :return:
         """
-        return rv.type in [
-            xmrtypes.RctType.FullBulletproof,
-            xmrtypes.RctType.SimpleBulletproof,
-        ]
+        return monero.is_rct_bulletproof(rv.type)
+
+    async def parse_rsig(self, rsig, out_pk):
+        """
+        Range signature from the token, Bulletproof commitment V is set from out_pk
+        :param rsig: serialized range signature
+        :param out_pk:
+        :return: RangeSigView or xmrtypes.Bulletproof
+        """
+        if not self.ct.tsx_data.is_bulletproof:
+            return monero.RangeSigView(rsig)
+
+        from monero_glue.xmr import bulletproof
+
+        proof = await tmisc.parse_msg(rsig, xmrtypes.Bulletproof())
+        proof.V = [bulletproof.commitment_to_v(out_pk.mask)]
+        return proof
 
     def is_error(self, response):
         """
@@ -172,6 +399,71 @@ class Agent(object):
         await ar1.message(tx, msg_type=xmrtypes.Transaction)
         return bytes(writer.get_buffer())
 
+    def batch_size(self, count, token_max_batch=None):
+        """
+        Batch size for count items. Older tokens do not announce the limit,
+        items are sent one by one. Batches are balanced so the last one is not short.
+        :param count:
+        :param token_max_batch:
+        :return:
+        """
+        max_batch = token_max_batch if token_max_batch else 1
+        if self.max_batch:
+            max_batch = min(max_batch, self.max_batch)
+        if max_batch <= 1 or count <= 1:
+            return 1
+
+        num_msgs = (count + max_batch - 1) // max_batch
+        return (count + num_msgs - 1) // num_msgs
+
+    def run_in_pool(self, fnc, *args):
+        """
+        Runs blocking host-side computation in the verification pool
+        :param fnc:
+        :param args:
+        :return: future
+        """
+        loop = asyncio.get_event_loop()
+        fut = loop.run_in_executor(self.executor, functools.partial(fnc, *args))
+        self.bg_tasks.append(fut)
+        return fut
+
+    def cancel_background(self):
+        """
+        Cancels unfinished background tasks of the signing
+        :return:
+        """
+        for task in self.bg_tasks:
+            if not task.done():
+                task.cancel()
+        self.bg_tasks = []
+
+    async def tsx_sign_items(self, field, msgs, batch=1):
+        """
+        Sends the per-item protocol messages, batched if possible.
+        Returns list of per-item acks (the batch ack if it carries no items).
+        :param field: MoneroTransactionSignRequest field name
+        :param msgs:
+        :param batch:
+        :return:
+        """
+        res = []
+        for items in common.chunk(msgs, batch):
+            if batch <= 1:
+                req = MoneroTransactionSignRequest(**{field: items[0]})
+            else:
+                req = MoneroTransactionSignRequest(**{field + "_batch": items})
+
+            t_res = await self.token_tsx_sign(req)
+            self.handle_error(t_res)
+            if batch <= 1 or not hasattr(t_res, "items"):
+                res.append(t_res)
+            else:
+                if len(t_res.items) != len(items):
+                    raise ValueError("Batch response size mismatch")
+                res += t_res.items
+        return res
+
     async def sign_transaction_data(
         self, tx, multisig=False, exp_tx_prefix_hash=None, use_tx_keys=None
     ):
@@ -184,37 +476,32 @@ class Agent(object):
         :param use_tx_keys:
         :return:
         """
+        try:
+            with self.trezor.flow_session():
+                return await self._sign_transaction_data(
+                    tx, multisig, exp_tx_prefix_hash, use_tx_keys
+                )
+        finally:
+            self.cancel_background()
+
+    async def _sign_transaction_data(
+        self, tx, multisig=False, exp_tx_prefix_hash=None, use_tx_keys=None
+    ):
+        """
+        Signing protocol. Host-side verification and serialization runs in background
+        while the token works, results are awaited before all_out_set and before signing.
+        :param tx:
+        :param multisig:
+        :param exp_tx_prefix_hash:
+        :param use_tx_keys:
+        :return:
+        """
         self.ct = TData()
         self.ct.tx_data = tx
 
-        payment_id = []
-        extras = await monero.parse_extra_fields(tx.extra)
-        extra_nonce = monero.find_tx_extra_field_by_type(extras, xmrtypes.TxExtraNonce)
-        if extra_nonce and monero.has_encrypted_payment_id(extra_nonce.nonce):
-            payment_id = monero.get_encrypted_payment_id_from_tx_extra_nonce(
-                extra_nonce.nonce
-            )
-        elif extra_nonce and monero.has_payment_id(extra_nonce.nonce):
-            payment_id = monero.get_payment_id_from_tx_extra_nonce(extra_nonce.nonce)
-
-        # Init transaction
-        tsx_data = TsxData()
-        tsx_data.version = 1
-        tsx_data.payment_id = payment_id
-        tsx_data.unlock_time = tx.unlock_time
-        tsx_data.outputs = tx.splitted_dsts
-        tsx_data.change_dts = tx.change_dts
-        tsx_data.num_inputs = len(tx.sources)
-        tsx_data.mixin = len(tx.sources[0].outputs)
-        tsx_data.fee = sum([x.amount for x in tx.sources]) - sum(
-            [x.amount for x in tx.splitted_dsts]
+        tsx_data = build_tsx_data(
+            tx, multisig, exp_tx_prefix_hash, use_tx_keys, self.bulletproof
         )
-        tsx_data.account = tx.subaddr_account
-        tsx_data.minor_indices = tx.subaddr_indices
-        tsx_data.is_multisig = multisig
-        tsx_data.is_bulletproof = False
-        tsx_data.exp_tx_prefix_hash = common.defval(exp_tx_prefix_hash, b"")
-        tsx_data.use_tx_keys = common.defval(use_tx_keys, [])
         self.ct.tx.unlock_time = tx.unlock_time
 
         self.ct.tsx_data = tsx_data
@@ -226,24 +513,24 @@ class Agent(object):
             tsx_data=tsx_data_pb,
         )
 
-        t_res = await self.trezor.tsx_sign(
+        t_res = await self.token_tsx_sign(
             MoneroTransactionSignRequest(init=init_msg)
         )  # type: MoneroTransactionInitAck
         self.handle_error(t_res)
 
         in_memory = t_res.in_memory
         self.ct.tx_out_entr_hmacs = t_res.hmacs
+        token_max_batch = getattr(t_res, "max_batch", None)
+        batch_inp = self.batch_size(len(tx.sources), token_max_batch)
+        batch_out = self.batch_size(len(tx.splitted_dsts), token_max_batch)
 
         # Set transaction inputs
-        for idx, src in enumerate(tx.sources):
-            src_bin = await tmisc.dump_msg(src)
-            msg = MoneroTransactionSetInputRequest(src_entr=src_bin)
-
-            t_res = await self.trezor.tsx_sign(
-                MoneroTransactionSignRequest(set_input=msg)
-            )  # type: MoneroTransactionSetInputAck
-            self.handle_error(t_res)
-
+        msgs = [
+            MoneroTransactionSetInputRequest(src_entr=await tmisc.dump_msg(src))
+            for src in tx.sources
+        ]
+        acks = await self.tsx_sign_items("set_input", msgs, batch_inp)
+        for t_res in acks:  # type: MoneroTransactionSetInputAck
             vini = await tmisc.parse_msg(t_res.vini, xmrtypes.TxinToKey())
             self.ct.tx.vin.append(vini)
             self.ct.tx_in_hmacs.append(t_res.vini_hmac)
@@ -276,11 +563,15 @@ class Agent(object):
 
         common.apply_permutation(self.ct.source_permutation, swapper)
 
+        # Sources and vins serialized once for input_vini and sign_input
+        src_bins = self.run_in_pool(dump_msgs, tx.sources)
+        vin_bins = self.run_in_pool(dump_msgs, self.ct.tx.vin)
+
         if not in_memory:
             msg = MoneroTransactionInputsPermutationRequest(
                 perm=self.ct.source_permutation
             )
-            t_res = await self.trezor.tsx_sign(
+            t_res = await self.token_tsx_sign(
                 MoneroTransactionSignRequest(input_permutation=msg)
             )
             self.handle_error(t_res)
@@ -288,57 +579,56 @@ class Agent(object):
         # Set vin_i back - tx prefix hashing
         # Done only if not in-memory.
         if not in_memory:
+            msgs = []
             for idx in range(len(self.ct.tx.vin)):
                 msg = MoneroTransactionInputViniRequest(
-                    src_entr=await tmisc.dump_msg(tx.sources[idx]),
-                    vini=await tmisc.dump_msg(self.ct.tx.vin[idx]),
+                    src_entr=(await src_bins)[idx],
+                    vini=(await vin_bins)[idx],
                     vini_hmac=self.ct.tx_in_hmacs[idx],
                     pseudo_out=self.ct.pseudo_outs[idx][0] if not in_memory else None,
                     pseudo_out_hmac=self.ct.pseudo_outs[idx][1]
                     if not in_memory
                     else None,
                 )
-                t_res = await self.trezor.tsx_sign(
-                    MoneroTransactionSignRequest(input_vini=msg)
-                )
-                self.handle_error(t_res)
+                msgs.append(msg)
+            await self.tsx_sign_items("input_vini", msgs, batch_inp)
 
         # Set transaction outputs
+        msgs = []
         for idx, dst in enumerate(tx.splitted_dsts):
             msg = MoneroTransactionSetOutputRequest(
                 dst_entr=await tmisc.dump_msg(dst),
                 dst_entr_hmac=self.ct.tx_out_entr_hmacs[idx],
             )
-            t_res = await self.trezor.tsx_sign(
-                MoneroTransactionSignRequest(set_output=msg)
-            )  # type: MoneroTransactionSetOutputAck
-            self.handle_error(t_res)
+            msgs.append(msg)
 
+        rsig_checks = []
+        acks = await self.tsx_sign_items("set_output", msgs, batch_out)
+        for t_res in acks:  # type: MoneroTransactionSetOutputAck
             self.ct.tx.vout.append(
                 await tmisc.parse_msg(t_res.tx_out, xmrtypes.TxOut())
             )
             self.ct.tx_out_hmacs.append(t_res.vouti_hmac)
-            self.ct.tx_out_rsigs.append(
-                await tmisc.parse_msg(t_res.rsig, xmrtypes.RangeSig())
-            )
             self.ct.tx_out_pk.append(
                 await tmisc.parse_msg(t_res.out_pk, xmrtypes.CtKey())
             )
+            self.ct.tx_out_rsigs.append(
+                await self.parse_rsig(t_res.rsig, self.ct.tx_out_pk[-1])
+            )
             self.ct.tx_out_ecdh.append(
                 await tmisc.parse_msg(t_res.ecdh_info, xmrtypes.EcdhTuple())
             )
 
-            # Rsig verification
-            try:
-                rsig = self.ct.tx_out_rsigs[-1]
-                if not ring_ct.ver_range(C=None, rsig=rsig):
-                    logger.warning("Rsing not valid")
+            # Rsig verification in the pool
+            rsig_checks.append(
+                self.run_in_pool(verify_range_sig, self.ct.tx_out_rsigs[-1])
+            )
 
-            except Exception as e:
-                logger.error("Exception rsig: %s" % e)
-                traceback.print_exc()
+        for res in await asyncio.gather(*rsig_checks):
+            if res is False:
+                logger.warning("Rsing not valid")
 
-        t_res = await self.trezor.tsx_sign(
+        t_res = await self.token_tsx_sign(
             MoneroTransactionSignRequest(
                 all_out_set=MoneroTransactionAllOutSetRequest()
             )
@@ -351,11 +641,7 @@ class Agent(object):
         rv.message = t_res.rv.message
         rv.type = t_res.rv.rv_type
         self.ct.tx.extra = list(bytearray(t_res.extra))
-
-        # Verify transaction prefix hash correctness, tx hash in one pass
-        self.ct.tx_prefix_hash = await monero.get_transaction_prefix_hash(self.ct.tx)
-        if not common.ct_equal(t_res.tx_prefix_hash, self.ct.tx_prefix_hash):
-            raise ValueError("Transaction prefix has does not match")
+        tx_prefix_hash = t_res.tx_prefix_hash
 
         # RctSig
         if self.is_simple(rv):
@@ -366,42 +652,53 @@ class Agent(object):
 
         # Range proof
         rv.p.rangeSigs = []
+        rv.p.bulletproofs = []
         rv.outPk = []
         rv.ecdhInfo = []
+        rsigs = rv.p.bulletproofs if self.is_bulletproof(rv) else rv.p.rangeSigs
         for idx in range(len(self.ct.tx_out_rsigs)):
-            rv.p.rangeSigs.append(self.ct.tx_out_rsigs[idx])
+            rsigs.append(self.ct.tx_out_rsigs[idx])
             rv.outPk.append(self.ct.tx_out_pk[idx])
             rv.ecdhInfo.append(self.ct.tx_out_ecdh[idx])
 
-        # MLSAG message check
-        t_res = await self.trezor.tsx_sign(
+        # Tx prefix hash and pre-MLSAG hash computed while the token finishes MLSAG message
+        tx_prefix_hash_task = self.run_in_pool(compute_tx_prefix_hash, self.ct.tx)
+        mlsag_hash_task = self.run_in_pool(compute_pre_mlsag_hash, rv)
+
+        t_res = await self.token_tsx_sign(
             MoneroTransactionSignRequest(mlsag_done=MoneroTransactionMlsagDoneRequest())
         )  # type: MoneroTransactionMlsagDoneAck
         self.handle_error(t_res)
 
+        # Verify transaction prefix hash correctness, tx hash in one pass
+        self.ct.tx_prefix_hash = await tx_prefix_hash_task
+        if not common.ct_equal(tx_prefix_hash, self.ct.tx_prefix_hash):
+            raise ValueError("Transaction prefix has does not match")
+
+        # MLSAG message check
         mlsag_hash = t_res.full_message_hash
-        mlsag_hash_computed = await monero.get_pre_mlsag_hash(rv)
+        mlsag_hash_computed = await mlsag_hash_task
         if not common.ct_equal(mlsag_hash, mlsag_hash_computed):
             raise ValueError("Pre MLSAG hash has does not match")
 
         # Sign each input
         couts = []
         rv.p.MGs = []
+        msgs = []
         for idx, src in enumerate(tx.sources):
             msg = MoneroTransactionSignInputRequest(
-                await tmisc.dump_msg(src),
-                await tmisc.dump_msg(self.ct.tx.vin[idx]),
+                (await src_bins)[idx],
+                (await vin_bins)[idx],
                 self.ct.tx_in_hmacs[idx],
                 self.ct.pseudo_outs[idx][0] if not in_memory else None,
                 self.ct.pseudo_outs[idx][1] if not in_memory else None,
                 self.ct.alphas[idx],
                 self.ct.spend_encs[idx],
             )
-            t_res = await self.trezor.tsx_sign(
-                MoneroTransactionSignRequest(sign_input=msg)
-            )  # type: MoneroTransactionSignInputAck
-            self.handle_error(t_res)
+            msgs.append(msg)
 
+        acks = await self.tsx_sign_items("sign_input", msgs, batch_inp)
+        for t_res in acks:  # type: MoneroTransactionSignInputAck
             mg = await tmisc.parse_msg(t_res.signature, xmrtypes.MgSig())
             rv.p.MGs.append(mg)
             couts.append(t_res.cout)
@@ -409,7 +706,7 @@ class Agent(object):
         self.ct.tx.signatures = []
         self.ct.tx.rct_signatures = rv
 
-        t_res = await self.trezor.tsx_sign(
+        t_res = await self.token_tsx_sign(
             MoneroTransactionSignRequest(final_msg=MoneroTransactionFinalRequest())
         )  # type: MoneroTransactionFinalAck
         self.handle_error(t_res)
@@ -452,7 +749,7 @@ class Agent(object):
         res = await self.trezor.get_view_key(msg)
         return res
 
-    async def import_outputs(self, outputs):
+    async def import_outputs(self, outputs, batcher=None):
         """
         Key images sync. Required for hot wallet be able to construct transactions.
         If the signed transaction is not relayed with the hot wallet it gets out of sync with
@@ -460,40 +757,80 @@ class Agent(object):
 
         Wallet2::import_outputs()
 
+        :param outputs: TransferDetails or KeyImageColumns
+        :param batcher: step batch sizing policy, adaptive by default
+        :type batcher: KiSyncBatcher
+        :return:
+        """
+        try:
+            with self.trezor.flow_session():
+                return await self._import_outputs(outputs, batcher)
+        finally:
+            self.cancel_background()
+
+    def next_ki_batch(self, outputs, offset, batcher):
+        """
+        Starts building the key image sync step from the offset
+        :param outputs:
+        :param offset:
+        :param batcher:
+        :return: future of the MoneroTransferDetails list
+        """
+        if isinstance(outputs, key_image.KeyImageColumns):
+            fut = asyncio.get_event_loop().create_future()
+            fut.set_result(batcher.next_batch(outputs, offset))
+            return fut
+
+        tds = outputs[offset : offset + batcher.batch_size]
+        return self.run_in_pool(ki_sync_batch, tds, offset, batcher)
+
+    async def _import_outputs(self, outputs, batcher=None):
+        """
+        Key image sync protocol.
+        Key image data are produced per step, the next step is built in the pool
+        while the current one is processed by the token.
         :param outputs:
+        :param batcher:
         :return:
         """
+        batcher = batcher if batcher else KiSyncBatcher()
+        num = len(outputs)
+        next_batch = self.next_ki_batch(outputs, 0, batcher) if num else None
+
         ki_export_init = await key_image.generate_commitment(outputs)
         ki_export_init.address_n = self.address_n
         ki_export_init.network_type = self.network_type
-        t_res = await self.trezor.key_image_sync(
+        t_res = await self.token_ki_sync(
             MoneroKeyImageSyncRequest(init=ki_export_init)
         )
         self.handle_error(t_res)
 
         sub_res = []
-        iter = await key_image.yield_key_image_data(outputs)
-        batches = common.chunk(iter, 10)
-        for rr in batches:  # type: list[key_image.MoneroTransferDetails]
-            t_res = await self.trezor.key_image_sync(
+        offset = 0
+        while offset < num:
+            rr = await next_batch
+            offset += len(rr)
+            if offset < num:
+                next_batch = self.next_ki_batch(outputs, offset, batcher)
+
+            time_start = time.perf_counter()
+            t_res = await self.token_ki_sync(
                 MoneroKeyImageSyncRequest(step=MoneroKeyImageSyncStepRequest(tdis=rr))
             )
             self.handle_error(t_res)
-
+            batcher.update(len(rr), time.perf_counter() - time_start)
             sub_res += t_res.kis
 
-        t_res = await self.trezor.key_image_sync(
+        t_res = await self.token_ki_sync(
             MoneroKeyImageSyncRequest(final_msg=MoneroKeyImageSyncFinalRequest())
         )
         self.handle_error(t_res)
 
-        # Decrypting phase
-        enc_key = bytes(t_res.enc_key)
+        # Decrypting phase, enc_key is revealed only after the commitment check
+        cipher = chacha_poly.ChaCha20Poly1305(bytes(t_res.enc_key))
         final_res = []
         for sub in sub_res:  # type: key_image.MoneroExportedKeyImage
-            plain = chacha_poly.decrypt(
-                enc_key, bytes(sub.iv), bytes(sub.blob), bytes(sub.tag)
-            )
+            plain = cipher.decrypt(bytes(sub.iv), bytes(sub.blob), None)
             ki_bin = plain[:32]
 
             # ki = crypto.decodepoint(ki_bin)
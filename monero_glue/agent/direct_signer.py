@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+from monero_glue.agent.agent_lite import Agent, TData, build_tsx_data
+from monero_glue.hwtoken import iface as token_iface
+from monero_glue.protocol.tsx_sign_builder import TTransactionBuilder
+from monero_glue.xmr import common, monero
+from monero_glue.xmr.enc import chacha_poly
+from monero_serialize import xmrtypes
+
+
+class DirectTxBuilder(TTransactionBuilder):
+    """
+    Transaction builder for the host holding the spend key.
+    Whole transaction is kept in memory, nothing is offloaded to the host
+    so the HMACs pinning the offloaded data are not needed.
+    """
+
+    def in_memory(self):
+        return True
+
+    def many_inputs(self):
+        return False
+
+    async def gen_hmac_vini(self, src_entr, vini, idx):
+        return b""
+
+    async def gen_hmac_vouti(self, dst_entr, tx_out, idx):
+        return b""
+
+    async def gen_hmac_tsxdest(self, dst_entr, idx):
+        return b""
+
+
+class DirectSigner(Agent):
+    """
+    Signs the transaction in a single pass using the transaction builder directly,
+    without the message protocol. Suitable for hot wallets with keys on the host.
+    Produces the same transaction as the Agent + Token protocol.
+
+    With rsig_pool (e.g., ProcessPoolExecutor) the range proofs of all
+    outputs are computed concurrently in the pool.
+    self_check is the TSelfCheck mode of the builder, deferred checks
+    are verified in the rsig_pool too.
+    """
+
+    def __init__(
+        self,
+        creds,
+        address_n=None,
+        network_type=None,
+        iface=None,
+        rsig_pool=None,
+        self_check=None,
+        **kwargs
+    ):
+        super().__init__(None, address_n=address_n, network_type=network_type, **kwargs)
+        self.creds = creds
+        self.iface = iface if iface else token_iface.TokenInterface()
+        self.rsig_pool = rsig_pool
+        self.self_check = self_check
+        self.tsx_ctr = 0
+
+    async def sign_transaction_data(
+        self, tx, multisig=False, exp_tx_prefix_hash=None, use_tx_keys=None
+    ):
+        """
+        Signs the transaction with the local credentials
+        :param tx:
+        :type tx: xmrtypes.TxConstructionData
+        :param multisig:
+        :param exp_tx_prefix_hash:
+        :param use_tx_keys:
+        :return:
+        """
+        self.ct = TData()
+        self.ct.tx_data = tx
+        self.ct.tx.unlock_time = tx.unlock_time
+        self.ct.tsx_data = build_tsx_data(
+            tx, multisig, exp_tx_prefix_hash, use_tx_keys, self.bulletproof
+        )
+
+        self.tsx_ctr += 1
+        builder = DirectTxBuilder(
+            self,
+            creds=self.creds,
+            self_check=self.self_check,
+            self_check_executor=self.rsig_pool,
+        )
+        t_res = await builder.init_transaction(self.ct.tsx_data, self.tsx_ctr)
+        self.handle_error(t_res)
+
+        # Inputs, builder sorts tx.vin by key images when the last one is set
+        for src in tx.sources:
+            await builder._set_input(src)
+
+        self.ct.tx.vin = list(builder.tx.vin)
+        self.ct.source_permutation = builder.source_permutation
+
+        def swapper(x, y):
+            tx.sources[x], tx.sources[y] = tx.sources[y], tx.sources[x]
+
+        common.apply_permutation(self.ct.source_permutation, swapper)
+
+        if self.rsig_pool is not None:
+            await builder.precompute_range_proofs(
+                [x.amount for x in tx.splitted_dsts], self.rsig_pool
+            )
+
+        # Outputs
+        for dst in tx.splitted_dsts:
+            tx_out, _, rsig, out_pk, ecdh_info = await builder._set_out1(dst, b"")
+            self.ct.tx.vout.append(tx_out)
+            self.ct.tx_out_rsigs.append(
+                rsig if self.ct.tsx_data.is_bulletproof else monero.RangeSigView(rsig)
+            )
+            self.ct.tx_out_pk.append(xmrtypes.CtKey(dest=out_pk.dest, mask=out_pk.mask))
+            self.ct.tx_out_ecdh.append(ecdh_info)
+
+        t_res = await builder.all_out1_set()
+        self.ct.tx.extra = list(bytearray(t_res.extra))
+        self.ct.tx_prefix_hash = builder.tx_prefix_hash
+
+        rv = xmrtypes.RctSig()
+        rv.p = xmrtypes.RctSigPrunable()
+        rv.txnFee = builder.get_fee()
+        rv.message = builder.tx_prefix_hash
+        rv.type = builder.get_rct_type()
+
+        if self.is_simple(rv):
+            if self.is_bulletproof(rv):
+                rv.p.pseudoOuts = list(builder.input_pseudo_outs)
+            else:
+                rv.pseudoOuts = list(builder.input_pseudo_outs)
+
+        if self.is_bulletproof(rv):
+            rv.p.rangeSigs = []
+            rv.p.bulletproofs = self.ct.tx_out_rsigs
+        else:
+            rv.p.rangeSigs = self.ct.tx_out_rsigs
+        rv.outPk = self.ct.tx_out_pk
+        rv.ecdhInfo = self.ct.tx_out_ecdh
+        await builder.mlsag_done()
+
+        # Sign each input, already in the key image order
+        couts = []
+        rv.p.MGs = []
+        for idx, src in enumerate(tx.sources):
+            mg, cout = await builder._sign_input(
+                src, self.ct.tx.vin[idx], b"", None, None, None, None
+            )
+            rv.p.MGs.append(mg)
+            couts.append(cout)
+
+        self.ct.tx.signatures = []
+        self.ct.tx.rct_signatures = rv
+
+        t_res = await builder.final_msg()
+        if multisig:
+            for ccout in couts:
+                self.ct.couts.append(chacha_poly.decrypt_pack(t_res.cout_key, ccout))
+
+        self.ct.enc_salt1, self.ct.enc_salt2 = t_res.salt, t_res.rand_mult
+        self.ct.enc_keys = t_res.tx_enc_keys
+        return self.ct.tx
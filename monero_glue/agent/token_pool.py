@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import asyncio
+import collections
+import copy
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from monero_glue.agent import agent_misc
+from monero_glue.hwtoken import misc as tmisc
+from monero_glue.xmr import wallet
+from monero_serialize import xmrtypes
+
+logger = logging.getLogger(__name__)
+
+
+class TokenPoolError(agent_misc.AgentError):
+    def __init__(self, errors=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.errors = errors if errors else {}  # tx index -> exception
+
+    def __str__(self):
+        return "TokenPoolError(%s)" % ", ".join(
+            "tx %s: %s" % (idx, self.errors[idx]) for idx in sorted(self.errors)
+        )
+
+
+class PoolResult(object):
+    """
+    Signing result of one transaction
+    """
+
+    def __init__(self, idx=None, tx=None, cdata=None, token_idx=None, attempts=0):
+        self.idx = idx
+        self.tx = tx  # type: xmrtypes.Transaction
+        self.cdata = cdata  # type: agent_lite.TData
+        self.token_idx = token_idx
+        self.attempts = attempts
+        self.error = None
+
+
+class TokenPool(object):
+    """
+    Signs multiple transactions concurrently over several tokens.
+    Each token is driven by its own agent. In the threaded mode each token runs
+    in a worker thread with its own event loop so blocking transports
+    (HTTP, USB) do not serialize the signing.
+
+    A token failing with other error than the token's Failure response is taken out
+    of the pool; failed transaction is retried on the remaining tokens.
+    The Failure response (e.g., user rejected the transaction) is final,
+    the transaction is not retried.
+    """
+
+    def __init__(self, agents, retries=2, threaded=True):
+        self.agents = list(agents)
+        self.retries = retries
+        self.threaded = threaded
+        self.retired = set()  # indices of the tokens taken out of the pool
+        self.executor = None
+
+    def healthy(self):
+        """
+        Indices of the tokens in the pool
+        :return:
+        """
+        return [x for x in range(len(self.agents)) if x not in self.retired]
+
+    async def sign_one(self, agent, tx):
+        """
+        Signs the transaction with the agent. Signs a copy, the agent
+        permutes the sources in place.
+        :param agent:
+        :param tx:
+        :return: signed transaction, transaction data
+        """
+        tx = copy.deepcopy(tx)
+
+        async def sign():
+            res = await agent.sign_transaction_data(tx)
+            return res, agent.last_transaction_data()
+
+        if not self.threaded:
+            return await sign()
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, tmisc.run_coro, sign())
+
+    async def worker(self, token_idx, jobs, txes, results):
+        """
+        Token worker, takes jobs until the queue is empty or the token is retired
+        :param token_idx:
+        :param jobs:
+        :param txes:
+        :param results:
+        :return:
+        """
+        agent = self.agents[token_idx]
+        while jobs and token_idx not in self.retired:
+            idx, attempt = jobs.popleft()
+            res = results[idx]
+            res.attempts = attempt + 1
+
+            try:
+                res.tx, res.cdata = await self.sign_one(agent, txes[idx])
+                res.token_idx = token_idx
+                res.error = None
+
+            except Exception as e:
+                logger.warning(
+                    "Token %s failed to sign tx %s, attempt %s: %s"
+                    % (token_idx, idx, attempt, e)
+                )
+                res.error = e
+                if isinstance(e, agent_misc.TrezorReturnedError):
+                    continue
+
+                self.retired.add(token_idx)
+                if attempt < self.retries:
+                    jobs.append((idx, attempt + 1))
+
+    async def sign(self, txes):
+        """
+        Signs the transactions, returns list of PoolResult in the order of txes.
+        Raises TokenPoolError if some transaction could not be signed.
+
+        :param txes:
+        :type txes: list[xmrtypes.TxConstructionData]
+        :return:
+        """
+        results = [PoolResult(idx=idx) for idx in range(len(txes))]
+        jobs = collections.deque((idx, 0) for idx in range(len(txes)))
+
+        tokens = self.healthy()
+        if self.threaded and self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.agents)))
+
+        while jobs and tokens:
+            await asyncio.gather(
+                *[self.worker(x, jobs, txes, results) for x in tokens]
+            )
+            tokens = self.healthy()
+
+        errors = {x.idx: x.error for x in results if x.error is not None or x.tx is None}
+        if errors:
+            raise TokenPoolError(errors)
+        return results
+
+    async def sign_unsigned_tx(self, unsig):
+        """
+        Signs the unsigned transaction set.
+        Returns SignedTxSet with key images of the spent transfers and the pool results.
+
+        :param unsig:
+        :type unsig: xmrtypes.UnsignedTxSet
+        :return:
+        """
+        results = await self.sign(unsig.txes)
+
+        # Watch only wallet does not have key images, only spent ones are set.
+        key_images = [td.m_key_image for td in unsig.transfers]
+        pendings = []
+        for res in results:
+            cd = res.cdata.tx_data
+            for idx in range(len(cd.selected_transfers)):
+                idx_mapped = res.cdata.source_permutation[idx]
+                key_images[cd.selected_transfers[idx_mapped]] = res.tx.vin[idx].k_image
+            pendings.append(wallet.construct_pending_tsx(res.tx, cd))
+
+        signed_tx = xmrtypes.SignedTxSet(ptx=pendings, key_images=key_images)
+        return signed_tx, results
+
+    def close(self):
+        """
+        Releases the worker threads
+        :return:
+        """
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -10,6 +10,15 @@ class TokenInterface(object):
     def gctx(self, ctx):
         return ctx if not None else self.ctx
 
+    def session(self, session_id):
+        """
+        Returns the interface used by the given session.
+        The default interface is shared by all sessions.
+        :param session_id:
+        :return:
+        """
+        return self
+
     async def confirm_transaction(self, tsx_data, creds=None, ctx=None):
         """
         Ask for confirmation from user
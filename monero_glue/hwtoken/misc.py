@@ -2,6 +2,10 @@
 # -*- coding: utf-8 -*-
 # Author: Dusan Klinec, ph4r05, 2018
 
+import asyncio
+import sys
+import types
+
 from monero_glue import protobuf
 from monero_glue.compat import gc
 from monero_glue.messages import (
@@ -36,6 +40,11 @@ class TrezorTxPrefixHashNotMatchingError(TrezorError):
         super().__init__(*args, **kwargs)
 
 
+class TrezorSessionError(TrezorError):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
 class StdObj(object):
     def __init__(self, **kwargs):
         for kw in kwargs:
@@ -125,8 +134,7 @@ async def parse_msg(bts, msg):
 
 
 async def parse_pb_msg(bts, msg):
-    reader = xmrserialize.MemoryReaderWriter(bytearray(bts))
-    return await protobuf.load_message(reader, msg)
+    return protobuf.decode_message(bts, msg)
 
 
 async def parse_src_entry(bts):
@@ -149,9 +157,7 @@ async def dump_msg(msg, preallocate=None, msg_type=None):
 
 
 async def dump_pb_msg(msg):
-    writer = xmrserialize.MemoryReaderWriter()
-    await protobuf.dump_message(writer, msg)
-    return bytes(writer.get_buffer())
+    return bytes(protobuf.encode_message(msg))
 
 
 async def dump_msg_gc(msg, preallocate=None, msg_type=None, del_msg=False):
@@ -174,3 +180,54 @@ def dst_entry_to_stdobj(dst):
         m_view_public_key=dst.addr.m_view_public_key,
     )
     return StdObj(amount=dst.amount, addr=addr, is_subaddress=dst.is_subaddress)
+
+
+def run_coro(coro):
+    """
+    Runs the coroutine in a new event loop, in the calling worker thread
+    :param coro:
+    :return:
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+STATE_SIZE_SKIP = ("trezor", "ctx", "creds", "iface", "executor")
+
+
+def state_size(obj, seen=None):
+    """
+    Rough memory footprint of the session state, in bytes.
+    Walks containers and object attributes, back references to the token
+    and the credentials are not counted.
+    :param obj:
+    :param seen:
+    :return:
+    """
+    seen = seen if seen is not None else set()
+    if obj is None or id(obj) in seen:
+        return 0
+    if isinstance(obj, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+        return 0
+
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview, str, int, float)):
+        return size
+
+    if isinstance(obj, dict):
+        items = list(obj.keys()) + list(obj.values())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        items = obj
+    elif hasattr(obj, "__dict__"):
+        items = [v for k, v in obj.__dict__.items() if k not in STATE_SIZE_SKIP]
+    elif hasattr(obj, "__slots__"):
+        items = [getattr(obj, k, None) for k in obj.__slots__]
+    else:
+        items = ()
+    return size + sum(state_size(x, seen) for x in items)
@@ -2,7 +2,12 @@
 # -*- coding: utf-8 -*-
 # Author: Dusan Klinec, ph4r05, 2018
 
+import asyncio
+import collections
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from monero_glue.hwtoken import iface, misc
 from monero_glue.messages import (
@@ -20,18 +25,63 @@ from monero_glue.protocol.tsx_sign import TsxSigner
 from monero_glue.xmr import crypto, monero
 
 
+class NullSession(object):
+    """
+    Transport session of the tokens without one
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class TokenSession(object):
+    """
+    State of one signing / key image sync session
+    """
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id
+        self.tsx_state = None  # state holder or live builder
+        self.ki_sync = None  # type: KeyImageSync
+        self.mem = 0
+        self.busy = False
+        self.last_used = time.monotonic()
+
+    def is_empty(self):
+        return self.tsx_state is None and self.ki_sync is None
+
+
 class TokenLite(object):
     """
     Main Trezor object.
     Provides interface to the host, packages messages.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        live_session=False,
+        max_sessions=None,
+        mem_limit=None,
+        session_timeout=None,
+        workers=None,
+        self_check=None,
+    ):
         self.tsx_ctr = 0
         self.err_ctr = 0
+        self.evict_ctr = 0
         self.tsx_obj = None  # type: TsxSigner
-        self.tsx_state = None
-        self.ki_sync = None  # type: KeyImageSync
+        self.sessions = collections.OrderedDict()  # session id -> TokenSession, LRU
+        self.sessions_lock = threading.Lock()
+        self.live_session = live_session
+        self.max_sessions = max_sessions  # cap of the open sessions
+        self.mem_limit = mem_limit  # state memory of all sessions, bytes
+        self.session_timeout = session_timeout  # idle seconds, session is abandoned
+        self.workers = workers  # worker threads processing the session messages
+        self.self_check = self_check  # TSelfCheck mode of new transactions
+        self.executor = None
         self.creds = None  # type: monero.AccountCreds
         self.iface = iface.TokenInterface()
         self.debug = True
@@ -47,7 +97,6 @@ class TokenLite(object):
             traceback.print_exc()
 
         self.err_ctr += 1
-        self.ki_sync = None  # clear transaction object
         await self.iface.transaction_error(e)
 
     async def tsx_exc_handler(self, e):
@@ -92,6 +141,13 @@ class TokenLite(object):
         pb = await misc.dump_pb_msg(msg)
         await misc.parse_pb_msg(pb, msg.__class__)
 
+    def flow_session(self):
+        """
+        Transport session for the whole protocol flow
+        :return:
+        """
+        return NullSession()
+
     async def call(self, msg, recode=True):
         return Failure(code=FailureType.FirmwareError, message="unsupported")
 
@@ -110,16 +166,27 @@ class TokenLite(object):
             address=self.creds.address,
         )
 
-    async def tsx_sign(self, msg: MoneroTransactionSignRequest):
+    async def tsx_sign(self, msg: MoneroTransactionSignRequest, session_id=None):
+        """
+        Transaction signing protocol step.
+        In the live session mode the builder object is kept between the messages
+        instead of the state save / restore.
+
+        :param msg:
+        :param session_id:
+        :return:
+        """
+        sess = None
         try:
             await self.test_pb_msg(msg)
 
-            signer = TsxSigner()
-            res = await signer.sign(self, self.tsx_state, msg, iface=self.iface)
-            if await signer.should_purge():
-                self.tsx_state = None
-            else:
-                self.tsx_state = await signer.state_save()
+            sess = self.session_acquire(session_id)
+            try:
+                res, sess.tsx_state = await self.run_step(
+                    self.tsx_step(msg, sess.tsx_state, sess.session_id)
+                )
+            finally:
+                self.session_release(sess)
 
             await self.test_pb_msg(res)
             return res
@@ -127,28 +194,235 @@ class TokenLite(object):
         except Exception as e:
             await self.tsx_exc_handler(e)
             self.tsx_obj = None
+            if sess is not None:
+                sess.tsx_state = None
+                self.session_release(sess, busy=False)
             return Failure(message=exc2str(e))
 
-    async def key_image_sync(self, msg: MoneroKeyImageSyncRequest):
-        try:
-            if msg.init:
-                self.ki_sync = KeyImageSync(
-                    ctx=self, iface=self.iface, creds=self.creds
-                )
-                return await self.ki_sync.init(self, msg.init)
+    async def tsx_step(self, msg, state, session_id=None):
+        """
+        Processes one signing message on the session state
+        :param msg:
+        :param state:
+        :param session_id:
+        :return: response, new state
+        """
+        signer = TsxSigner()
+        signer.self_check = self.self_check
+        res = await signer.sign(
+            self, state, msg, iface=self.iface.session(session_id)
+        )
+        if await signer.should_purge():
+            return res, None
+        return res, await signer.state_save(live=self.live_session)
+
+    def tsx_snapshot(self, session_id=None):
+        """
+        Returns detached state of the signing session, None if there is no session.
+        :param session_id:
+        :return:
+        """
+        from monero_glue.protocol.tsx_sign_builder import TTransactionBuilder
 
-            elif msg.step:
-                return await self.ki_sync.sync(self, msg.step)
+        sess = self.sessions.get(session_id)
+        state = sess.tsx_state if sess is not None else None
+        if state is None:
+            return None
+        if not isinstance(state, TTransactionBuilder):
+            state = TTransactionBuilder(creds=self.creds, state=state)
+        return state.state_snapshot()
 
-            elif msg.final_msg:
-                res = await self.ki_sync.final(self, msg.final_msg)
-                self.ki_sync = None
-                return res
+    def tsx_resume(self, snapshot, session_id=None):
+        """
+        Continues the signing session from the snapshot.
+        The snapshot is copied so it can be resumed again.
+        :param snapshot:
+        :param session_id:
+        :return:
+        """
+        from monero_glue.protocol.tsx_sign_builder import TTransactionBuilder
 
-            else:
-                raise ValueError("Unknown error")
+        builder = TTransactionBuilder(creds=self.creds, state=snapshot)
+        sess = self.session_get(session_id, create=True)
+        sess.tsx_state = builder.state_snapshot()
+        sess.mem = misc.state_size(sess)
+
+    async def key_image_sync(self, msg: MoneroKeyImageSyncRequest, session_id=None):
+        """
+        Key image sync protocol step
+        :param msg:
+        :param session_id:
+        :return:
+        """
+        sess = None
+        try:
+            sess = self.session_acquire(session_id)
+            try:
+                res, sess.ki_sync = await self.run_step(
+                    self.ki_step(msg, sess.ki_sync, sess.session_id)
+                )
+            finally:
+                self.session_release(sess)
+            return res
 
         except Exception as e:
             await self.ki_exc_handler(e)
-            self.ki_sync = None
+            if sess is not None:
+                sess.ki_sync = None
+                self.session_release(sess, busy=False)
             return Failure(message=exc2str(e))
+
+    async def ki_step(self, msg, ki_sync, session_id=None):
+        """
+        Processes one key image sync message on the session state
+        :param msg:
+        :param ki_sync:
+        :param session_id:
+        :return: response, new state
+        """
+        if msg.init:
+            ki_sync = KeyImageSync(
+                ctx=self, iface=self.iface.session(session_id), creds=self.creds
+            )
+            return await ki_sync.init(self, msg.init), ki_sync
+
+        elif msg.step:
+            return await ki_sync.sync(self, msg.step), ki_sync
+
+        elif msg.final_msg:
+            return await ki_sync.final(self, msg.final_msg), None
+
+        else:
+            raise ValueError("Unknown error")
+
+    async def run_step(self, coro):
+        """
+        Runs the protocol step. With workers the step runs in the worker pool
+        so a long step does not block the other sessions.
+        :param coro:
+        :return:
+        """
+        if not self.workers:
+            return await coro
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, misc.run_coro, coro)
+
+    def close(self):
+        """
+        Releases the worker pool
+        :return:
+        """
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    #
+    # Sessions
+    #
+
+    def session_get(self, session_id, create=False):
+        """
+        Returns the session, marks it as recently used.
+        New session is admitted only if the session cap allows it.
+        :param session_id:
+        :param create:
+        :return:
+        """
+        with self.sessions_lock:
+            sess = self.sessions.get(session_id)
+            if sess is None and create:
+                self.evict_abandoned()
+                if self.max_sessions and len(self.sessions) >= self.max_sessions:
+                    raise misc.TrezorSessionError("Too many sessions")
+
+                sess = TokenSession(session_id)
+                self.sessions[session_id] = sess
+
+            if sess is not None:
+                self.sessions.move_to_end(session_id)
+                sess.last_used = time.monotonic()
+            return sess
+
+    def session_acquire(self, session_id):
+        """
+        Session for processing a message. Messages of one session are processed
+        sequentially, concurrent message is rejected.
+        :param session_id:
+        :return:
+        """
+        sess = self.session_get(session_id, create=True)
+        with self.sessions_lock:
+            if sess.busy:
+                raise misc.TrezorSessionError("Session busy")
+            sess.busy = True
+        return sess
+
+    def session_release(self, sess, busy=True):
+        """
+        Message processed. Updates the session memory, closes finished session
+        and evicts least recently used idle sessions over the memory limit.
+        :param sess:
+        :param busy:
+        :return:
+        """
+        with self.sessions_lock:
+            if busy:
+                sess.busy = False
+            sess.last_used = time.monotonic()
+            sess.mem = misc.state_size(sess)
+
+            if sess.is_empty() and self.sessions.get(sess.session_id) is sess:
+                del self.sessions[sess.session_id]
+            self.evict_mem(keep=sess.session_id)
+
+    def session_evict(self, session_id):
+        """
+        Drops the session state
+        :param session_id:
+        :return:
+        """
+        sess = self.sessions.pop(session_id, None)
+        if sess is not None:
+            self.evict_ctr += 1
+        return sess
+
+    def mem_used(self):
+        """
+        Accounted state memory of all sessions
+        :return:
+        """
+        return sum(x.mem for x in self.sessions.values())
+
+    def evict_abandoned(self):
+        """
+        Evicts idle sessions not used for the session timeout
+        :return:
+        """
+        if self.session_timeout is None:
+            return
+
+        deadline = time.monotonic() - self.session_timeout
+        for sid, sess in list(self.sessions.items()):
+            if not sess.busy and sess.last_used < deadline:
+                self.session_evict(sid)
+
+    def evict_mem(self, keep=None):
+        """
+        Evicts least recently used idle sessions while over the memory limit
+        :param keep: session not to evict
+        :return:
+        """
+        if self.mem_limit is None:
+            return
+
+        mem = self.mem_used()
+        for sid, sess in list(self.sessions.items()):
+            if mem <= self.mem_limit:
+                break
+            if sid == keep or sess.busy:
+                continue
+            self.session_evict(sid)
+            mem -= sess.mem
@@ -137,6 +137,9 @@ MoneroTransactionMlsagDoneAck = 508
 MoneroTransactionSignInputAck = 509
 MoneroTransactionFinalAck = 510
 MoneroKeyImageSyncRequest = 511
+MoneroTransactionSetInputBatchAck = 512
+MoneroTransactionSetOutputBatchAck = 513
+MoneroTransactionSignInputBatchAck = 514
 MoneroKeyImageExportInitAck = 520
 MoneroKeyImageSyncStepAck = 521
 MoneroKeyImageSyncFinalAck = 522
@@ -1,4 +1,5 @@
 # Automatically generated by pb2py
+# Extended in-tree (batched tsx_sign steps), not regenerated, see PoC.md
 # fmt: off
 from .. import protobuf as p
 if __debug__:
@@ -17,6 +18,7 @@ class MoneroTransactionInitAck(p.MessageType):
         4: ('hmacs', p.BytesType, p.FLAG_REPEATED),
         5: ('many_inputs', p.BoolType, 0),
         6: ('many_outputs', p.BoolType, 0),
+        7: ('max_batch', p.UVarintType, 0),
     }
 
     def __init__(
@@ -27,6 +29,7 @@ class MoneroTransactionInitAck(p.MessageType):
         hmacs: List[bytes] = None,
         many_inputs: bool = None,
         many_outputs: bool = None,
+        max_batch: int = None,
     ) -> None:
         self.version = version
         self.status = status
@@ -34,3 +37,4 @@ class MoneroTransactionInitAck(p.MessageType):
         self.hmacs = hmacs if hmacs is not None else []
         self.many_inputs = many_inputs
         self.many_outputs = many_outputs
+        self.max_batch = max_batch
@@ -0,0 +1,23 @@
+# Automatically generated by pb2py
+# Extended in-tree (batched tsx_sign steps), not regenerated, see PoC.md
+# fmt: off
+from .. import protobuf as p
+if __debug__:
+    try:
+        from typing import List
+    except ImportError:
+        List = None  # type: ignore
+from .MoneroTransactionSetOutputAck import MoneroTransactionSetOutputAck
+
+
+class MoneroTransactionSetOutputBatchAck(p.MessageType):
+    MESSAGE_WIRE_TYPE = 513
+    FIELDS = {
+        1: ('items', MoneroTransactionSetOutputAck, p.FLAG_REPEATED),
+    }
+
+    def __init__(
+        self,
+        items: List[MoneroTransactionSetOutputAck] = None,
+    ) -> None:
+        self.items = items if items is not None else []
@@ -0,0 +1,23 @@
+# Automatically generated by pb2py
+# Extended in-tree (batched tsx_sign steps), not regenerated, see PoC.md
+# fmt: off
+from .. import protobuf as p
+if __debug__:
+    try:
+        from typing import List
+    except ImportError:
+        List = None  # type: ignore
+from .MoneroTransactionSignInputAck import MoneroTransactionSignInputAck
+
+
+class MoneroTransactionSignInputBatchAck(p.MessageType):
+    MESSAGE_WIRE_TYPE = 514
+    FIELDS = {
+        1: ('items', MoneroTransactionSignInputAck, p.FLAG_REPEATED),
+    }
+
+    def __init__(
+        self,
+        items: List[MoneroTransactionSignInputAck] = None,
+    ) -> None:
+        self.items = items if items is not None else []
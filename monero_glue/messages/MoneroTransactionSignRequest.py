@@ -1,6 +1,12 @@
 # Automatically generated by pb2py
+# Extended in-tree (batched tsx_sign steps), not regenerated, see PoC.md
 # fmt: off
 from .. import protobuf as p
+if __debug__:
+    try:
+        from typing import List
+    except ImportError:
+        List = None  # type: ignore
 from .MoneroTransactionAllOutSetRequest import MoneroTransactionAllOutSetRequest
 from .MoneroTransactionFinalRequest import MoneroTransactionFinalRequest
 from .MoneroTransactionInitRequest import MoneroTransactionInitRequest
@@ -24,6 +30,10 @@ class MoneroTransactionSignRequest(p.MessageType):
         7: ('mlsag_done', MoneroTransactionMlsagDoneRequest, 0),
         8: ('sign_input', MoneroTransactionSignInputRequest, 0),
         9: ('final_msg', MoneroTransactionFinalRequest, 0),
+        10: ('set_input_batch', MoneroTransactionSetInputRequest, p.FLAG_REPEATED),
+        11: ('input_vini_batch', MoneroTransactionInputViniRequest, p.FLAG_REPEATED),
+        12: ('set_output_batch', MoneroTransactionSetOutputRequest, p.FLAG_REPEATED),
+        13: ('sign_input_batch', MoneroTransactionSignInputRequest, p.FLAG_REPEATED),
     }
 
     def __init__(
@@ -37,6 +47,10 @@ class MoneroTransactionSignRequest(p.MessageType):
         mlsag_done: MoneroTransactionMlsagDoneRequest = None,
         sign_input: MoneroTransactionSignInputRequest = None,
         final_msg: MoneroTransactionFinalRequest = None,
+        set_input_batch: List[MoneroTransactionSetInputRequest] = None,
+        input_vini_batch: List[MoneroTransactionInputViniRequest] = None,
+        set_output_batch: List[MoneroTransactionSetOutputRequest] = None,
+        sign_input_batch: List[MoneroTransactionSignInputRequest] = None,
     ) -> None:
         self.init = init
         self.set_input = set_input
@@ -47,3 +61,7 @@ class MoneroTransactionSignRequest(p.MessageType):
         self.mlsag_done = mlsag_done
         self.sign_input = sign_input
         self.final_msg = final_msg
+        self.set_input_batch = set_input_batch if set_input_batch is not None else []
+        self.input_vini_batch = input_vini_batch if input_vini_batch is not None else []
+        self.set_output_batch = set_output_batch if set_output_batch is not None else []
+        self.sign_input_batch = sign_input_batch if sign_input_batch is not None else []
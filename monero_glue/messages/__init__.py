@@ -111,10 +111,13 @@ from .MoneroTransactionInputsPermutationRequest import MoneroTransactionInputsPe
 from .MoneroTransactionMlsagDoneAck import MoneroTransactionMlsagDoneAck
 from .MoneroTransactionMlsagDoneRequest import MoneroTransactionMlsagDoneRequest
 from .MoneroTransactionSetInputAck import MoneroTransactionSetInputAck
+from .MoneroTransactionSetInputBatchAck import MoneroTransactionSetInputBatchAck
 from .MoneroTransactionSetInputRequest import MoneroTransactionSetInputRequest
 from .MoneroTransactionSetOutputAck import MoneroTransactionSetOutputAck
+from .MoneroTransactionSetOutputBatchAck import MoneroTransactionSetOutputBatchAck
 from .MoneroTransactionSetOutputRequest import MoneroTransactionSetOutputRequest
 from .MoneroTransactionSignInputAck import MoneroTransactionSignInputAck
+from .MoneroTransactionSignInputBatchAck import MoneroTransactionSignInputBatchAck
 from .MoneroTransactionSignInputRequest import MoneroTransactionSignInputRequest
 from .MoneroTransactionSignRequest import MoneroTransactionSignRequest
 from .MoneroTransferDetails import MoneroTransferDetails
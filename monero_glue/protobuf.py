@@ -2,6 +2,11 @@
 Extremely minimal streaming codec for a subset of protobuf.  Supports uint32,
 bytes, string, embedded message and repeated fields.
 
+Synchronous codec `encode_message` / `decode_message` works on bytes,
+field plans are compiled from `FIELDS` per message type on the first use.
+The async `load_message` / `dump_message` are wrappers over it, the original
+streaming codec is kept as `load_message_stream` / `dump_message_stream`.
+
 For de-serializing (loading) protobuf types, object with `AsyncReader`
 interface is required:
 
@@ -153,7 +158,211 @@ class CountingWriter:
 FLAG_REPEATED = const(1)
 
 
+_KIND_UVARINT = const(0)
+_KIND_SVARINT = const(1)
+_KIND_BOOL = const(2)
+_KIND_BYTES = const(3)
+_KIND_UNICODE = const(4)
+_KIND_MESSAGE = const(5)
+
+_CODECS = {}  # message type -> (encoding plan, decoding plan, field names)
+
+
+def _field_kind(ftype):
+    if ftype is UVarintType:
+        return _KIND_UVARINT
+    elif ftype is SVarintType:
+        return _KIND_SVARINT
+    elif ftype is BoolType:
+        return _KIND_BOOL
+    elif ftype is BytesType:
+        return _KIND_BYTES
+    elif ftype is UnicodeType:
+        return _KIND_UNICODE
+    elif issubclass(ftype, MessageType):
+        return _KIND_MESSAGE
+    raise TypeError  # field type is unknown
+
+
+def _compile(msg_type):
+    """
+    Field plans of the message type, cached
+    """
+    codec = _CODECS.get(msg_type)
+    if codec is not None:
+        return codec
+
+    enc_plan = []
+    dec_plan = {}
+    for ftag in msg_type.FIELDS:
+        fname, ftype, fflags = msg_type.FIELDS[ftag]
+        kind = _field_kind(ftype)
+        repeated = bool(fflags & FLAG_REPEATED)
+        fkey = bytearray()
+        _encode_uvarint(fkey, (ftag << 3) | ftype.WIRE_TYPE)
+        enc_plan.append((fname, bytes(fkey), kind, repeated, ftype))
+        dec_plan[ftag] = (fname, ftype.WIRE_TYPE, kind, repeated, ftype)
+
+    names = tuple(x[0] for x in enc_plan)
+    codec = (tuple(enc_plan), dec_plan, names)
+    _CODECS[msg_type] = codec
+    return codec
+
+
+def _encode_uvarint(out, n):
+    if n < 0:
+        raise ValueError("Cannot dump signed value, convert it to unsigned first.")
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _decode_uvarint(buf, pos, end):
+    result = 0
+    shift = 0
+    while True:
+        if pos >= end:
+            raise EOFError
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_into(out, msg):
+    """
+    Serializes the message to the bytearray
+    """
+    for fname, fkey, kind, repeated, ftype in _compile(msg.__class__)[0]:
+        fvalue = getattr(msg, fname, None)
+        if fvalue is None:
+            continue
+
+        for svalue in fvalue if repeated else (fvalue,):
+            out += fkey
+            if kind == _KIND_UVARINT:
+                _encode_uvarint(out, svalue)
+            elif kind == _KIND_BYTES:
+                if not isinstance(svalue, (bytes, bytearray)):
+                    svalue = bytes(svalue)  # e.g., keys as lists of ints
+                _encode_uvarint(out, len(svalue))
+                out += svalue
+            elif kind == _KIND_MESSAGE:
+                sub = bytearray()
+                encode_into(sub, svalue)
+                _encode_uvarint(out, len(sub))
+                out += sub
+            elif kind == _KIND_SVARINT:
+                _encode_uvarint(out, sint_to_uint(svalue))
+            elif kind == _KIND_BOOL:
+                _encode_uvarint(out, int(svalue))
+            else:
+                bvalue = bytes(svalue, "utf8")
+                _encode_uvarint(out, len(bvalue))
+                out += bvalue
+    return out
+
+
+def encode_message(msg):
+    """
+    Serializes the message
+    """
+    return encode_into(bytearray(), msg)
+
+
+def _decode(buf, pos, end, msg_type):
+    _, dec_plan, names = _compile(msg_type)
+    msg = msg_type()
+
+    while pos < end:
+        fkey, pos = _decode_uvarint(buf, pos, end)
+        ftag = fkey >> 3
+        wtype = fkey & 7
+
+        field = dec_plan.get(ftag, None)
+        if field is None:  # unknown field, skip it
+            if wtype == 0:
+                _, pos = _decode_uvarint(buf, pos, end)
+            elif wtype == 2:
+                ivalue, pos = _decode_uvarint(buf, pos, end)
+                pos += ivalue
+                if pos > end:
+                    raise EOFError
+            else:
+                raise ValueError
+            continue
+
+        fname, fwire, kind, repeated, ftype = field
+        if wtype != fwire:
+            raise TypeError  # parsed wire type differs from the schema
+
+        ivalue, pos = _decode_uvarint(buf, pos, end)
+        if kind == _KIND_UVARINT:
+            fvalue = ivalue
+        elif kind == _KIND_SVARINT:
+            fvalue = uint_to_sint(ivalue)
+        elif kind == _KIND_BOOL:
+            fvalue = bool(ivalue)
+        else:
+            nend = pos + ivalue
+            if nend > end:
+                raise EOFError
+            if kind == _KIND_BYTES:
+                fvalue = bytearray(buf[pos:nend])
+            elif kind == _KIND_UNICODE:
+                fvalue = str(bytes(buf[pos:nend]), "utf8")
+            else:
+                fvalue = _decode(buf, pos, nend, ftype)
+            pos = nend
+
+        if repeated:
+            pvalue = getattr(msg, fname, None)
+            if pvalue is None:
+                pvalue = []
+                setattr(msg, fname, pvalue)
+            pvalue.append(fvalue)
+        else:
+            setattr(msg, fname, fvalue)
+
+    # fill missing fields
+    for fname in names:
+        if not hasattr(msg, fname):
+            setattr(msg, fname, None)
+    return msg
+
+
+def decode_message(buf, msg_type):
+    """
+    Parses the message from the whole buffer
+    """
+    buf = memoryview(buf)
+    return _decode(buf, 0, len(buf), msg_type)
+
+
 async def load_message(reader, msg_type):
+    """
+    Loads the message from the rest of the reader.
+    In-memory readers (get_buffer(), offset) are parsed directly from the buffer.
+    """
+    if hasattr(reader, "get_buffer") and hasattr(reader, "offset"):
+        buf = reader.get_buffer()
+        msg = decode_message(buf, msg_type)
+        reader.offset += len(buf)
+        return msg
+    return await load_message_stream(reader, msg_type)
+
+
+async def dump_message(writer, msg):
+    """
+    Writes the message to the writer
+    """
+    await writer.awrite(encode_message(msg))
+
+
+async def load_message_stream(reader, msg_type):
     fields = msg_type.FIELDS
     msg = msg_type()
 
@@ -198,7 +407,7 @@ async def load_message(reader, msg_type):
             await reader.areadinto(fvalue)
             fvalue = str(fvalue, "utf8")
         elif issubclass(ftype, MessageType):
-            fvalue = await load_message(LimitedReader(reader, ivalue), ftype)
+            fvalue = await load_message_stream(LimitedReader(reader, ivalue), ftype)
         else:
             raise TypeError  # field type is unknown
 
@@ -217,7 +426,7 @@ async def load_message(reader, msg_type):
     return msg
 
 
-async def dump_message(writer, msg):
+async def dump_message_stream(writer, msg):
     repvalue = [0]
     mtype = msg.__class__
     fields = mtype.FIELDS
@@ -258,9 +467,9 @@ async def dump_message(writer, msg):
 
             elif issubclass(ftype, MessageType):
                 counter = CountingWriter()
-                await dump_message(counter, svalue)
+                await dump_message_stream(counter, svalue)
                 await dump_uvarint(writer, counter.size)
-                await dump_message(writer, svalue)
+                await dump_message_stream(writer, svalue)
 
             else:
                 raise TypeError
@@ -26,6 +26,7 @@ class TsxSigner(object):
         self.iface = iface.get_iface()
         self.debug = True
         self.purge = False
+        self.self_check = None  # TSelfCheck mode of a new transaction
 
     async def tsx_exc_handler(self, e):
         """
@@ -61,9 +62,27 @@ class TsxSigner(object):
     async def restore(self, state):
         from monero_glue.protocol.tsx_sign_builder import TTransactionBuilder
 
-        self.tsx_obj = TTransactionBuilder(self, creds=self.creds, state=state)
+        # Live builder kept by the host session, no state reconstruction
+        if isinstance(state, TTransactionBuilder):
+            self.tsx_obj = state
+            self.tsx_obj.trezor = self
+            return
+
+        self.tsx_obj = TTransactionBuilder(
+            self, creds=self.creds, state=state, self_check=self.self_check
+        )
+
+    async def state_save(self, live=False):
+        """
+        Returns state for the next message.
+        If live is True the builder itself is returned (host session mode).
+        :param live:
+        :return:
+        """
+        if live:
+            s, self.tsx_obj = self.tsx_obj, None
+            return s
 
-    async def state_save(self):
         try:
             s = self.tsx_obj.state_save()
             self.tsx_obj = None
@@ -120,6 +139,18 @@ class TsxSigner(object):
         elif msg.sign_input:
             log.debug(__name__, "sign_sinp")
             return await self.tsx_sign_input(msg.sign_input)
+        elif msg.set_input_batch:
+            log.debug(__name__, "sign_inp_batch")
+            return await self.tsx_set_input_batch(msg.set_input_batch)
+        elif msg.input_vini_batch:
+            log.debug(__name__, "sign_vin_batch")
+            return await self.tsx_input_vini_batch(msg.input_vini_batch)
+        elif msg.set_output_batch:
+            log.debug(__name__, "sign_out_batch")
+            return await self.tsx_set_output1_batch(msg.set_output_batch)
+        elif msg.sign_input_batch:
+            log.debug(__name__, "sign_sinp_batch")
+            return await self.tsx_sign_input_batch(msg.sign_input_batch)
         elif msg.final_msg:
             log.debug(__name__, "sign_final")
             return await self.tsx_sign_final(msg.final_msg)
@@ -284,3 +315,81 @@ class TsxSigner(object):
         except Exception as e:
             await self.tsx_exc_handler(e)
             raise
+
+    async def tsx_check_batch(self, items):
+        """
+        Batch size check w.r.t. the limit announced in the init
+        :param items:
+        :return:
+        """
+        if len(items) > self.tsx_obj.max_batch():
+            e = ValueError("Batch too big")
+            await self.tsx_exc_handler(e)
+            raise e
+
+    async def tsx_set_input_batch(self, items):
+        """
+        Sets several UTXOs in one message, each item is processed as set_input.
+
+        :param items:
+        :return:
+        """
+        from monero_glue.messages.MoneroTransactionSetInputBatchAck import (
+            MoneroTransactionSetInputBatchAck
+        )
+
+        await self.tsx_check_batch(items)
+        res = []
+        for item in items:
+            res.append(await self.tsx_set_input(item))
+        return MoneroTransactionSetInputBatchAck(items=res)
+
+    async def tsx_input_vini_batch(self, items):
+        """
+        Sets several tx.vin[i] in one message.
+
+        :param items:
+        :return:
+        """
+        from monero_glue.messages.MoneroTransactionInputViniAck import (
+            MoneroTransactionInputViniAck
+        )
+
+        await self.tsx_check_batch(items)
+        for item in items:
+            await self.tsx_input_vini(item)
+        return MoneroTransactionInputViniAck()
+
+    async def tsx_set_output1_batch(self, items):
+        """
+        Sets several destination entries in one message.
+
+        :param items:
+        :return:
+        """
+        from monero_glue.messages.MoneroTransactionSetOutputBatchAck import (
+            MoneroTransactionSetOutputBatchAck
+        )
+
+        await self.tsx_check_batch(items)
+        res = []
+        for item in items:
+            res.append(await self.tsx_set_output1(item))
+        return MoneroTransactionSetOutputBatchAck(items=res)
+
+    async def tsx_sign_input_batch(self, items):
+        """
+        Generates signatures for several inputs in one message.
+
+        :param items:
+        :return:
+        """
+        from monero_glue.messages.MoneroTransactionSignInputBatchAck import (
+            MoneroTransactionSignInputBatchAck
+        )
+
+        await self.tsx_check_batch(items)
+        res = []
+        for item in items:
+            res.append(await self.tsx_sign_input(item))
+        return MoneroTransactionSignInputBatchAck(items=res)
@@ -28,7 +28,12 @@ class TTransactionBuilder(object):
     STEP_MLSAG = const(600)
     STEP_SIGN = const(700)
 
+    # Memory available for the items of one batched message
+    BATCH_MEM_BUDGET = const(32 * 1024)
+
     def __init__(self, trezor=None, creds=None, state=None, **kwargs):
+        from monero_glue.protocol.tsx_sign_self_check import TSelfCheck
+
         self.trezor = trezor
         self.creds = creds
         self.key_master = None
@@ -61,6 +66,7 @@ class TTransactionBuilder(object):
         self.input_pseudo_outs = []
         self.output_sk = []
         self.output_pk = []
+        self.output_rsigs = None  # precomputed (C, mask, rsig) per output
         self.sumout = crypto.sc_0()
         self.sumpouts_alphas = crypto.sc_0()
         self.subaddresses = {}
@@ -72,6 +78,12 @@ class TTransactionBuilder(object):
         self.full_message = None
         self.exp_tx_prefix_hash = None
 
+        # Self-check policy, mode or TSelfCheck instance
+        self_check = kwargs.get("self_check")
+        if not isinstance(self_check, TSelfCheck):
+            self_check = TSelfCheck(self_check, kwargs.get("self_check_executor"))
+        self.self_check = self_check
+
         if state is None:
             self._init()
         else:
@@ -95,7 +107,7 @@ class TTransactionBuilder(object):
         self._log_trace(t.state)
 
         for attr in t.__dict__:
-            if attr.startswith("_"):
+            if attr.startswith("_") or attr == "trezor":
                 continue
 
             cval = getattr(t, attr)
@@ -141,6 +153,36 @@ class TTransactionBuilder(object):
                 setattr(t, attr, cval)
         return t
 
+    def state_snapshot(self):
+        """
+        Detached copy of the current state, the builder remains usable.
+        Hasher contexts and mutable containers are copied.
+        :return:
+        """
+        t = self.state_save()
+        if t.tx_prefix_hasher is not None:
+            t.tx_prefix_hasher = t.tx_prefix_hasher.copy()
+        if t.full_message_hasher is not None:
+            t.full_message_hasher = tuple(
+                x.copy() if hasattr(x, "copy") else x for x in t.full_message_hasher
+            )
+        if t.tx is not None:
+            t.tx = TprefixStub(
+                **{x: getattr(t.tx, x) for x in TprefixStub.__slots__ if hasattr(t.tx, x)}
+            )
+            t.tx.vin = list(t.tx.vin)
+            t.tx.vout = list(t.tx.vout)
+        if getattr(t, "self_check", None) is not None:
+            t.self_check = t.self_check.copy()
+
+        for attr in t.__dict__:
+            cval = getattr(t, attr)
+            if isinstance(cval, list):
+                setattr(t, attr, list(cval))
+            elif isinstance(cval, dict):
+                setattr(t, attr, dict(cval))
+        return t
+
     def _log_trace(self, x=None):
         log.debug(
             __name__,
@@ -217,6 +259,17 @@ class TTransactionBuilder(object):
         """
         return self.output_count >= 10
 
+    def max_batch(self):
+        """
+        Maximum number of inputs / outputs processed in one batched message.
+        Estimated from the serialized item sizes and the memory budget.
+        :return:
+        """
+        # TxSourceEntry with the ring + MgSig; RangeSig + out_pk + ecdh_info
+        inp_size = self.mixin * (8 + 32 + 32 + 64) + 256
+        out_size = 32 * (64 * 3 + 1) + 4 * 32 + 256
+        return max(1, self.BATCH_MEM_BUDGET // max(inp_size, out_size))
+
     def num_inputs(self):
         """
         Number of inputs
@@ -252,10 +305,9 @@ class TTransactionBuilder(object):
         """
         from monero_serialize.xmrtypes import RctType
 
-        if self.use_simple_rct:
-            return RctType.SimpleBulletproof if self.use_bulletproof else RctType.Simple
-        else:
-            return RctType.FullBulletproof if self.use_bulletproof else RctType.Full
+        if self.use_bulletproof:
+            return RctType.Bulletproof
+        return RctType.Simple if self.use_simple_rct else RctType.Full
 
     def init_rct_sig(self):
         """
@@ -454,8 +506,10 @@ class TTransactionBuilder(object):
         self.output_change = misc.dst_entry_to_stdobj(tsx_data.change_dts)
         self.mixin = tsx_data.mixin
         self.fee = tsx_data.fee
-        self.use_simple_rct = self.input_count > 1
         self.use_bulletproof = tsx_data.is_bulletproof
+        self.use_simple_rct = self.input_count > 1 or self.use_bulletproof
+        if self.use_bulletproof and not crypto.get_backend().has_rangeproof_bulletproof():
+            raise ValueError("Bulletproof not supported by the EC backend")
         self.multi_sig = tsx_data.is_multisig
         self.state.inp_cnt(self.in_memory())
         self.check_change(tsx_data.outputs)
@@ -524,6 +578,7 @@ class TTransactionBuilder(object):
             many_inputs=self.many_inputs(),
             many_outputs=self.many_outputs(),
             hmacs=hmacs,
+            max_batch=self.max_batch(),
         )
 
     async def process_payment_id(self, tsx_data):
@@ -610,6 +665,28 @@ class TTransactionBuilder(object):
         from monero_glue.messages.MoneroTransactionSetInputAck import (
             MoneroTransactionSetInputAck
         )
+
+        vini, hmac_vini, pseudo_out, pseudo_out_hmac, alpha_enc, spend_enc = await self._set_input(
+            src_entr
+        )
+
+        return MoneroTransactionSetInputAck(
+            vini=await misc.dump_msg(vini, preallocate=64),
+            vini_hmac=hmac_vini,
+            pseudo_out=pseudo_out,
+            pseudo_out_hmac=pseudo_out_hmac,
+            alpha_enc=alpha_enc,
+            spend_enc=spend_enc,
+        )
+
+    async def _set_input(self, src_entr):
+        """
+        Input processing, returns tx.vin[i] and offloaded data:
+        (vini, vini_hmac, pseudo_out, pseudo_out_hmac, alpha_enc, spend_enc)
+
+        :param src_entr:
+        :return:
+        """
         from monero_glue.xmr.enc import chacha_poly
         from monero_glue.xmr.sub import tsx_helper
         from monero_serialize.xmrtypes import TxinToKey
@@ -697,14 +774,7 @@ class TTransactionBuilder(object):
         if self.inp_idx + 1 == self.num_inputs():
             await self.tsx_inputs_done()
 
-        return MoneroTransactionSetInputAck(
-            vini=await misc.dump_msg(vini, preallocate=64),
-            vini_hmac=hmac_vini,
-            pseudo_out=pseudo_out,
-            pseudo_out_hmac=pseudo_out_hmac,
-            alpha_enc=alpha_enc,
-            spend_enc=spend_enc,
-        )
+        return vini, hmac_vini, pseudo_out, pseudo_out_hmac, alpha_enc, spend_enc
 
     async def tsx_inputs_done(self):
         """
@@ -844,8 +914,9 @@ class TTransactionBuilder(object):
 
         await self.tx_prefix_hasher.ar.field(vini, TxInV)
 
-        # Pseudo_out incremental hashing - applicable only in simple rct
-        if not self.use_simple_rct:
+        # Pseudo_out incremental hashing - applicable only in simple rct,
+        # Bulletproof rct has pseudo outs in the prunable part, not hashed
+        if not self.use_simple_rct or self.use_bulletproof:
             return
 
         if not self.in_memory():
@@ -876,6 +947,50 @@ class TTransactionBuilder(object):
         self.sumpouts_alphas = crypto.sc_add(self.sumpouts_alphas, alpha)
         return alpha, crypto.gen_c(alpha, in_amount)
 
+    async def precompute_range_proofs(self, amounts, executor=None):
+        """
+        Host-side signing: computes range proofs of all outputs concurrently
+        in the executor (e.g., process pool) before the outputs are set.
+
+        Output masks are fixed up front. The last one closes the sum of the
+        pseudo out alphas as in range_proof(), so the proofs are independent.
+        range_proof() consumes them in the output order, hashing is unchanged.
+
+        :param amounts: output amounts, in the output order
+        :param executor: None = loop default executor
+        :return:
+        """
+        import asyncio
+        from monero_glue.xmr import ring_ct
+
+        if self.out_idx >= 0 or len(amounts) != self.num_dests():
+            raise ValueError("Range proofs are precomputed before the outputs")
+        if not self.state.is_input_done():
+            raise ValueError("Range proofs are precomputed after the inputs")
+
+        masks = [None] * len(amounts)
+        if self.use_simple_rct:
+            masks = [crypto.random_scalar() for _ in range(len(amounts) - 1)]
+            sumout = crypto.sc_0()
+            for mask in masks:
+                sumout = crypto.sc_add(sumout, mask)
+            masks.append(crypto.sc_sub(self.sumpouts_alphas, sumout))
+            masks = [crypto.encodeint(x) for x in masks]
+
+        loop = asyncio.get_event_loop()
+        self.output_rsigs = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    executor,
+                    ring_ct.prove_range_enc,
+                    amount,
+                    mask,
+                    self.use_bulletproof,
+                )
+                for amount, mask in zip(amounts, masks)
+            ]
+        )
+
     async def range_proof(self, idx, dest_pub_key, amount, amount_key):
         """
         Computes rangeproof and related information - out_sk, out_pk, ecdh_info.
@@ -912,33 +1027,51 @@ class TTransactionBuilder(object):
 
         # Rangeproof
         gc.collect()
-        if self.use_bulletproof:
-            raise ValueError("Bulletproof not yet supported")
+        if self.output_rsigs:
+            C, mask, rsig = self.output_rsigs[idx]
+            self.output_rsigs[idx] = None
+            C, mask = crypto.decodepoint(C), crypto.decodeint(mask)
+            if last_mask is not None:
+                self.assrt(crypto.sc_eq(mask, last_mask), "rproof mask")
+
+        elif self.use_bulletproof:
+            C, mask, rsig = ring_ct.prove_range(
+                amount, last_mask, backend_impl=True, bulletproof=True
+            )
 
         else:
             C, mask, rsig = ring_ct.prove_range(
                 amount, last_mask, backend_impl=True, byte_enc=True, rsig=rsig_mv
             )
+
+        if not self.use_bulletproof:
             rsig = memoryview(rsig)
 
-            if __debug__:
-                rsig_bytes = monero.inflate_rsig(rsig)
-                self.assrt(ring_ct.ver_range(C, rsig_bytes))
+        if self.self_check.enabled():
+            from monero_glue.xmr import tsx_verify
 
-            self.assrt(
-                crypto.point_eq(
-                    C,
-                    crypto.point_add(
-                        crypto.scalarmult_base(mask), crypto.scalarmult_h(amount)
-                    ),
-                ),
-                "rproof",
+            self.self_check.check(
+                "rsig",
+                idx,
+                tsx_verify._ver_rsig,
+                crypto.encodepoint(C),
+                rsig if self.use_bulletproof else bytes(rsig),
             )
 
-            # Incremental hashing
-            await self.full_message_hasher.rsig_val(
-                rsig, self.use_bulletproof, raw=True
-            )
+        self.assrt(
+            crypto.point_eq(
+                C,
+                crypto.point_add(
+                    crypto.scalarmult_base(mask), crypto.scalarmult_h(amount)
+                ),
+            ),
+            "rproof",
+        )
+
+        # Incremental hashing
+        await self.full_message_hasher.rsig_val(
+            rsig, self.use_bulletproof, raw=not self.use_bulletproof
+        )
         gc.collect()
         self._log_trace("rproof")
 
@@ -1023,6 +1156,35 @@ class TTransactionBuilder(object):
         :param dst_entr_hmac
         :return:
         """
+        from monero_glue.messages.MoneroTransactionSetOutputAck import (
+            MoneroTransactionSetOutputAck
+        )
+        from monero_serialize.xmrtypes import CtKey
+
+        tx_out, hmac_vouti, rsig, out_pk, ecdh_info = await self._set_out1(
+            dst_entr, dst_entr_hmac
+        )
+
+        # Bulletproof is serialized without V, recomputed from out_pk
+        if self.use_bulletproof:
+            rsig = await misc.dump_msg(rsig)
+
+        return MoneroTransactionSetOutputAck(
+            tx_out=await misc.dump_msg(tx_out, preallocate=34),
+            vouti_hmac=hmac_vouti,
+            rsig=rsig,  # rsig is already byte-encoded
+            out_pk=await misc.dump_msg(out_pk, preallocate=64, msg_type=CtKey),
+            ecdh_info=await misc.dump_msg(ecdh_info, preallocate=64),
+        )
+
+    async def _set_out1(self, dst_entr, dst_entr_hmac):
+        """
+        Output processing, returns (tx_out, vouti_hmac, rsig, out_pk, ecdh_info)
+
+        :param dst_entr:
+        :param dst_entr_hmac:
+        :return:
+        """
         from monero_serialize import xmrserialize
 
         await self.trezor.iface.transaction_step(
@@ -1106,18 +1268,7 @@ class TTransactionBuilder(object):
         gc.collect()
 
         self._log_trace(10)
-        from monero_glue.messages.MoneroTransactionSetOutputAck import (
-            MoneroTransactionSetOutputAck
-        )
-        from monero_serialize.xmrtypes import CtKey
-
-        return MoneroTransactionSetOutputAck(
-            tx_out=await misc.dump_msg(tx_out, preallocate=34),
-            vouti_hmac=hmac_vouti,
-            rsig=rsig,  # rsig is already byte-encoded
-            out_pk=await misc.dump_msg(out_pk, preallocate=64, msg_type=CtKey),
-            ecdh_info=await misc.dump_msg(ecdh_info, preallocate=64),
-        )
+        return tx_out, hmac_vouti, rsig, out_pk, ecdh_info
 
     async def all_out1_set_tx_extra(self):
         from monero_glue.xmr.sub import tsx_helper
@@ -1287,6 +1438,40 @@ class TTransactionBuilder(object):
         :param spend_enc:
         :return: Generated signature MGs[i]
         """
+        from monero_glue.messages.MoneroTransactionSignInputAck import (
+            MoneroTransactionSignInputAck
+        )
+
+        mg, cout = await self._sign_input(
+            src_entr,
+            vini,
+            hmac_vini,
+            pseudo_out,
+            pseudo_out_hmac,
+            alpha_enc,
+            spend_enc,
+        )
+
+        return MoneroTransactionSignInputAck(
+            signature=await misc.dump_msg_gc(mg, preallocate=488, del_msg=True),
+            cout=cout,
+        )
+
+    async def _sign_input(
+        self,
+        src_entr,
+        vini,
+        hmac_vini,
+        pseudo_out,
+        pseudo_out_hmac,
+        alpha_enc,
+        spend_enc,
+    ):
+        """
+        Input signature, returns encoded MgSig and encrypted multisig cout
+
+        :return:
+        """
         self.state.set_signature()
         await self.trezor.iface.transaction_step(
             self.STEP_SIGN, self.inp_idx + 1, self.num_inputs()
@@ -1395,13 +1580,6 @@ class TTransactionBuilder(object):
                 index,
             )
 
-            if __debug__:
-                self.assrt(
-                    mlsag2.ver_rct_mg_simple(
-                        self.full_message, mg, mix_ring, pseudo_out_c
-                    )
-                )
-
         else:
             # Full RingCt, only one input
             txn_fee_key = crypto.scalarmult_h(self.get_fee())
@@ -1418,13 +1596,6 @@ class TTransactionBuilder(object):
                 txn_fee_key,
             )
 
-            if __debug__:
-                self.assrt(
-                    mlsag2.ver_rct_mg(
-                        mg, mix_ring, self.output_pk, txn_fee_key, self.full_message
-                    )
-                )
-
         gc.collect()
         self._log_trace(5)
 
@@ -1434,6 +1605,31 @@ class TTransactionBuilder(object):
         mgs = recode_msg([mg])
         cout = None
 
+        if self.self_check.enabled():
+            from monero_glue.xmr import tsx_verify
+
+            if self.use_simple_rct:
+                self.self_check.check(
+                    "mlsag",
+                    self.inp_idx,
+                    tsx_verify._ver_mg_simple,
+                    self.full_message,
+                    mgs[0],
+                    mix_ring,
+                    crypto.encodepoint(pseudo_out_c),
+                )
+            else:
+                self.self_check.check(
+                    "mlsag",
+                    self.inp_idx,
+                    tsx_verify._ver_mg_full,
+                    self.full_message,
+                    mgs[0],
+                    [[x[0] for x in mix_ring]],
+                    self.output_pk,
+                    self.get_fee(),
+                )
+
         gc.collect()
         self._log_trace(6)
 
@@ -1450,15 +1646,7 @@ class TTransactionBuilder(object):
 
         gc.collect()
         self._log_trace()
-
-        from monero_glue.messages.MoneroTransactionSignInputAck import (
-            MoneroTransactionSignInputAck
-        )
-
-        return MoneroTransactionSignInputAck(
-            signature=await misc.dump_msg_gc(mgs[0], preallocate=488, del_msg=True),
-            cout=cout,
-        )
+        return mgs[0], cout
 
     async def final_msg(self, *args, **kwargs):
         """
@@ -1473,6 +1661,8 @@ class TTransactionBuilder(object):
         )
         from monero_glue.xmr.enc import chacha_poly
 
+        # Deferred self-checks, nothing is released on failure
+        await self.self_check.flush()
         self.state.set_final()
 
         cout_key = self.enc_key_cout() if self.multi_sig else None
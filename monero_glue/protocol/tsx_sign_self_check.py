@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import copy
+
+
+class TSelfCheck(object):
+    """
+    Self-check policy of the transaction builder: verification of the
+    generated range proofs and MLSAG signatures.
+
+    OFF: no verification.
+    IMMEDIATE: each proof is verified right after it is generated.
+    DEFERRED: proofs are collected and verified once, concurrently in
+        the executor (e.g., process pool), when the signing finishes.
+    """
+
+    OFF = 0
+    IMMEDIATE = 1
+    DEFERRED = 2
+
+    def __init__(self, mode=None, executor=None):
+        if mode is None:
+            mode = TSelfCheck.IMMEDIATE if __debug__ else TSelfCheck.OFF
+        if mode not in (TSelfCheck.OFF, TSelfCheck.IMMEDIATE, TSelfCheck.DEFERRED):
+            raise ValueError("Unknown self-check mode: %s" % mode)
+
+        self.mode = mode
+        self.executor = executor  # None = loop default executor
+        self.checks = []  # deferred (name, idx, fnc, args)
+
+    def enabled(self):
+        return self.mode != TSelfCheck.OFF
+
+    def copy(self):
+        """
+        Copy with the pending checks, for the state snapshots
+        :return:
+        """
+        res = TSelfCheck(self.mode, self.executor)
+        res.checks = list(self.checks)
+        return res
+
+    def check(self, name, idx, fnc, *args):
+        """
+        Verifies fnc(*args) according to the policy.
+        Arguments are byte encoded so the deferred checks are picklable.
+
+        :param name: component name, e.g., rsig, mlsag
+        :param idx:
+        :param fnc: module level verification function
+        :param args:
+        :return:
+        """
+        from monero_glue.xmr import tsx_verify
+
+        if self.mode == TSelfCheck.OFF:
+            return
+        if self.mode == TSelfCheck.IMMEDIATE:
+            res = tsx_verify._timed(name, idx, fnc, *args)
+            if not res.ok:
+                raise ValueError("Self-check failed: %s" % res)
+            return
+
+        # Arguments may be reused (e.g., deleted message) by the builder
+        self.checks.append((name, idx, fnc, copy.deepcopy(args)))
+
+    async def flush(self):
+        """
+        Verifies all deferred checks concurrently, raises on failure
+        :return: list of ComponentResult
+        """
+        import asyncio
+        from monero_glue.xmr import tsx_verify
+
+        checks, self.checks = self.checks, []
+        if not checks:
+            return []
+
+        loop = asyncio.get_event_loop()
+        results = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    self.executor, tsx_verify._timed, name, idx, fnc, *args
+                )
+                for name, idx, fnc, args in checks
+            ]
+        )
+
+        failed = [x for x in results if not x.ok]
+        if failed:
+            raise ValueError("Self-check failed: %s" % failed)
+        return list(results)
@@ -65,6 +65,9 @@ class TState(object):
     def is_input_vins(self):
         return self.s == self.INPUT_VINS
 
+    def is_input_done(self):
+        return self.INPUT_DONE <= self.s <= self.INPUT_VINS
+
     def set_output(self):
         if (
             (not self.in_mem and self.s != self.INPUT_VINS)
@@ -25,6 +25,9 @@ def get_message_from_type(type_id):
     raise ValueError("Could not find message with type: %s" % type_id)
 
 
+_MISSING = object()
+
+
 def bytes_fix(msg, pkg=protobuf):
     """
     Converts all elements to bytes if specified by protobuf scheme
@@ -59,13 +62,21 @@ class MessageConverter(object):
     Converts protobuf messages between base packages.
     Converts our protobufs <-> trezorlib
     Required for protobuf encoders
+
+    Conversion plan (destination class, field kinds, nested types)
+    is compiled per message class on the first use.
     """
 
-    def __init__(self, fix_bytes=False):
-        self.imported = False
-        self.tlib_msgs = None
-        self.tlib_p = None
+    _FIELD_COPY = 0
+    _FIELD_BYTES = 1
+    _FIELD_MESSAGE = 2
+
+    def __init__(self, fix_bytes=False, tlib_msgs=None, tlib_p=None):
+        self.imported = tlib_msgs is not None
+        self.tlib_msgs = tlib_msgs
+        self.tlib_p = tlib_p
         self.fix_bytes = fix_bytes
+        self.plans = {}  # (source class, destination package) -> plan
 
     def _init(self):
         if self.imported:
@@ -78,36 +89,73 @@ class MessageConverter(object):
         self.tlib_p = tlib_protobuf
         self.imported = True
 
+    def _plan(self, cls, src_proto, dst_package):
+        """
+        Conversion plan of the message class
+        :param cls:
+        :param src_proto:
+        :param dst_package:
+        :return: destination class, ((field name, kind, repeated), ...)
+        """
+        key = (cls, dst_package)
+        plan = self.plans.get(key)
+        if plan is not None:
+            return plan
+
+        fields = []
+        for tag in cls.FIELDS:
+            field_name, field_type, flags = cls.FIELDS[tag]
+            if isinstance(field_type, type) and issubclass(
+                field_type, src_proto.MessageType
+            ):
+                kind = self._FIELD_MESSAGE
+            elif self.fix_bytes and field_type is src_proto.BytesType:
+                kind = self._FIELD_BYTES
+            else:
+                kind = self._FIELD_COPY
+            fields.append((field_name, kind, bool(flags & src_proto.FLAG_REPEATED)))
+
+        plan = (getattr(dst_package, cls.__name__), tuple(fields))
+        self.plans[key] = plan
+        return plan
+
+    def _convert_msg(self, msg, src_proto, dst_package):
+        dst_cls, fields = self._plan(msg.__class__, src_proto, dst_package)
+        nmsg = dst_cls()
+        for field_name, kind, repeated in fields:
+            cval = getattr(msg, field_name, _MISSING)
+            if cval is _MISSING:
+                continue
+
+            if cval is None or kind == self._FIELD_COPY:
+                pass
+            elif kind == self._FIELD_BYTES:
+                cval = [bytes(x) for x in cval] if repeated else bytes(cval)
+            elif repeated:
+                cval = [self._convert_msg(x, src_proto, dst_package) for x in cval]
+            else:
+                cval = self._convert_msg(cval, src_proto, dst_package)
+            setattr(nmsg, field_name, cval)
+        return nmsg
+
     def _transform(self, msg, src_proto, dst_package):
         if isinstance(msg, src_proto.MessageType):
-            msg_name = msg.__class__.__name__
-            tlib_msg = getattr(dst_package, msg_name)
-
-            nmsg = tlib_msg()
-            for tag in msg.FIELDS:
-                field = msg.FIELDS[tag]
-                field_name = field[0]
-                if hasattr(msg, field_name):
-                    cval = getattr(msg, field_name, None)
-                    setattr(nmsg, field_name, self.to_trezorlib(cval))
-            return nmsg
-
+            return self._convert_msg(msg, src_proto, dst_package)
         elif isinstance(msg, list):
-            return [self.to_trezorlib(x) for x in msg]
+            return [self._transform(x, src_proto, dst_package) for x in msg]
         elif isinstance(msg, dict):
-            return {v: self.to_trezorlib(x) for v, x in msg.items()}
+            return {
+                v: self._transform(x, src_proto, dst_package) for v, x in msg.items()
+            }
+        elif self.fix_bytes and isinstance(msg, bytearray):
+            return bytes(msg)
         else:
             return msg
 
     def to_phlib(self, msg):
         self._init()
-        if self.fix_bytes:
-            msg = bytes_fix(msg, self.tlib_p)
         return self._transform(msg, self.tlib_p, messages)
 
     def to_trezorlib(self, msg):
         self._init()
-        if self.fix_bytes:
-            msg = bytes_fix(msg, protobuf)
-        res = self._transform(msg, protobuf, self.tlib_msgs)
-        return res
+        return self._transform(msg, protobuf, self.tlib_msgs)
@@ -3,25 +3,35 @@
 # Author: Dusan Klinec, ph4r05, 2018
 
 
+import logging
 import os
 
 from monero_glue.hwtoken import token
 from monero_glue.protocol_base.messages import MessageConverter
 
 from trezorlib.client import TrezorClient, TrezorClientDebugLink
-from trezorlib.transport import get_transport
+from trezorlib.transport import TransportException, get_transport
+
+logger = logging.getLogger(__name__)
+
+TRANSPORT_ERRORS = (TransportException, OSError)
 
 
 class TrezorSession(object):
-    def __init__(self, client, **kwargs):
-        self.client = client
+    """
+    Transport session. Re-entrant, nested session uses the opened one
+    so a whole protocol flow runs in one transport session.
+    """
+
+    def __init__(self, trezor, **kwargs):
+        self.trezor = trezor
 
     def __enter__(self):
-        self.client.transport.session_begin()
-        return self.client
+        self.trezor.session_begin()
+        return self.trezor.client
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.client.transport.session_end()
+        self.trezor.session_end(ignore_errors=exc_type is not None)
 
 
 class Trezor(token.TokenLite):
@@ -30,7 +40,14 @@ class Trezor(token.TokenLite):
     """
 
     def __init__(
-        self, path=None, debug=False, address_n=None, network_type=0, *args, **kwargs
+        self,
+        path=None,
+        debug=False,
+        address_n=None,
+        network_type=0,
+        retries=1,
+        *args,
+        **kwargs
     ):
         super().__init__()
         if path is None:
@@ -38,6 +55,9 @@ class Trezor(token.TokenLite):
 
         self.debug = debug
         self.path = path
+        self.retries = retries  # message retries after the transport re-establishment
+        self.session_depth = 0
+        self.session_ctr = 0  # opened transport sessions
         self.msg_conv = MessageConverter(fix_bytes=True)
         self._connect()
 
@@ -65,11 +85,69 @@ class Trezor(token.TokenLite):
     def reconnect(self):
         self._connect()
 
+    def reestablish(self):
+        """
+        Reconnects after the transport error, reopens the running session
+        :return:
+        """
+        try:
+            self.client.close()
+        except Exception as e:
+            logger.debug("Close error: %s" % e)
+
+        self._connect()
+        if self.session_depth > 0:
+            self.client.transport.session_begin()
+            self.session_ctr += 1
+
     def close(self):
         self.client.close()
 
     def session(self):
-        return TrezorSession(self.client)
+        return TrezorSession(self)
+
+    def flow_session(self):
+        return TrezorSession(self)
+
+    def session_begin(self):
+        if self.session_depth == 0:
+            self.client.transport.session_begin()
+            self.session_ctr += 1
+        self.session_depth += 1
+
+    def session_end(self, ignore_errors=False):
+        self.session_depth -= 1
+        if self.session_depth > 0:
+            return
+
+        try:
+            self.client.transport.session_end()
+        except TRANSPORT_ERRORS:
+            if not ignore_errors:
+                raise
+
+    async def call_retry(self, msg, idempotent=False):
+        """
+        Calls the message in the session. On the transport error the connection
+        and the session are re-established. The message is sent again only if
+        the error was raised before the message was written (session begin)
+        or the message is idempotent; protocol steps are not.
+        :param msg:
+        :param idempotent:
+        :return:
+        """
+        for attempt in range(self.retries + 1):
+            sent = False
+            try:
+                with self.session():
+                    sent = True
+                    return await self.call_in_session(msg)
+
+            except TRANSPORT_ERRORS as e:
+                logger.warning("Transport error, reconnecting: %s" % e)
+                self.reestablish()
+                if attempt >= self.retries or (sent and not idempotent):
+                    raise
 
     async def call(self, msg, recode=True):
         with self.session():
@@ -90,16 +168,10 @@ class Trezor(token.TokenLite):
             return self.client.ping(message if message else "monero", **kwargs)
 
     async def get_view_key(self, msg):
-        with self.session():
-            res = self.client.call(self._to_tlib(msg))
-            return self._from_tlib(res)
+        return await self.call_retry(msg, idempotent=True)
 
-    async def tsx_sign(self, msg):
-        with self.session():
-            res = self.client.call(self._to_tlib(msg))
-            return self._from_tlib(res)
+    async def tsx_sign(self, msg, *args, **kwargs):
+        return await self.call_retry(msg)
 
     async def key_image_sync(self, msg, *args, **kwargs):
-        with self.session():
-            res = self.client.call(self._to_tlib(msg))
-            return self._from_tlib(res)
+        return await self.call_retry(msg)
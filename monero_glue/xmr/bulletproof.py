@@ -0,0 +1,474 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+#
+# Bulletproofs range proof, logarithmic size, aggregation of up to 16 outputs.
+# Resources:
+# https://eprint.iacr.org/2017/1066
+# https://github.com/monero-project/monero/blob/v0.13.0.0/src/ringct/bulletproofs.cc
+#
+# Encoding follows Monero: points in the proof (V, A, S, T1, T2, L, R) are stored
+# multiplied by 8^-1, the verifier multiplies them by 8 back (prime order subgroup).
+
+from monero_glue.xmr import crypto
+from monero_glue.xmr.multiexp import multiexp
+from monero_serialize import xmrtypes
+
+BP_N = 64  # bits of the amount
+BP_LOG_N = 6
+BP_MAX_M = 16  # max aggregated outputs
+BP_MAX_MN = BP_N * BP_MAX_M
+
+_GENS = {}
+
+
+def _inv8():
+    if "inv8" not in _GENS:
+        _GENS["inv8"] = crypto.sc_inv(crypto.sc_init(8))
+    return _GENS["inv8"]
+
+
+def get_exponent(base, idx):
+    """
+    Generator H_p(H_s(base || "bulletproof" || varint(idx)))
+    :param base: encoded base point
+    :param idx:
+    :return:
+    """
+    from monero_serialize.core.int_serialize import dump_uvarint_b
+
+    hashed = crypto.cn_fast_hash(bytes(base) + b"bulletproof" + dump_uvarint_b(idx))
+    return crypto.hash_to_ec(hashed)
+
+
+def get_generators(mn):
+    """
+    Gi, Hi generator vectors of size mn, computed lazily and cached
+    :param mn:
+    :return:
+    """
+    if mn > BP_MAX_MN:
+        raise ValueError("Too many generators requested")
+
+    Gi = _GENS.setdefault("Gi", [])
+    Hi = _GENS.setdefault("Hi", [])
+    if len(Gi) < mn:
+        H = crypto.encodepoint(crypto.gen_H())
+        for i in range(len(Gi), mn):
+            Hi.append(get_exponent(H, 2 * i))
+            Gi.append(get_exponent(H, 2 * i + 1))
+    return Gi[:mn], Hi[:mn]
+
+
+def _log_m(m):
+    """
+    Returns logM, the smallest power of two M >= m
+    :param m:
+    :return:
+    """
+    if m < 1 or m > BP_MAX_M:
+        raise ValueError("Invalid number of amounts: %s" % m)
+    log_m = 0
+    while (1 << log_m) < m:
+        log_m += 1
+    return log_m
+
+
+def vector_powers(x, n):
+    """
+    [1, x, x^2, ..., x^(n-1)]
+    :param x:
+    :param n:
+    :return:
+    """
+    res = [crypto.sc_init(1)] * n
+    for i in range(1, n):
+        res[i] = crypto.sc_mul(res[i - 1], x)
+    return res
+
+
+def inner_product(a, b):
+    """
+    <a, b>
+    :param a:
+    :param b:
+    :return:
+    """
+    if len(a) != len(b):
+        raise ValueError("Incompatible sizes of a and b")
+    res = crypto.sc_0()
+    for x, y in zip(a, b):
+        res = crypto.sc_muladd(x, y, res)
+    return res
+
+
+def _hash_cache_mash(cache, *args):
+    """
+    Fiat-Shamir transcript, cache = H_s(cache || args)
+    :param cache: encoded scalar
+    :param args: encoded keys
+    :return: new cache (encoded), challenge scalar
+    """
+    res = crypto.hash_to_scalar(bytes(cache) + b"".join(bytes(x) for x in args))
+    return crypto.encodeint(res), res
+
+
+def prove(amounts, masks):
+    """
+    Aggregated bulletproof for amounts, commitments V_j = masks_j * G + amounts_j * H
+    :param amounts: list of ints
+    :param masks: list of scalars
+    :return: xmrtypes.Bulletproof, byte encoded, V included
+    """
+    if len(amounts) != len(masks):
+        raise ValueError("Amounts vs masks size mismatch")
+
+    log_mn = _log_m(len(amounts)) + BP_LOG_N
+    M = 1 << (log_mn - BP_LOG_N)
+    MN = M * BP_N
+    Gi, Hi = get_generators(MN)
+    inv8 = _inv8()
+    one = crypto.sc_init(1)
+    minus_one = crypto.sc_sub(crypto.sc_0(), one)
+
+    V = []
+    for amount, mask in zip(amounts, masks):
+        if amount < 0 or amount >= 1 << BP_N:
+            raise ValueError("Amount out of range")
+        V.append(
+            crypto.encodepoint(
+                crypto.add_keys2(
+                    crypto.sc_mul(mask, inv8),
+                    crypto.sc_mul(crypto.sc_init(amount), inv8),
+                    crypto.gen_H(),
+                )
+            )
+        )
+
+    # aL: bits of the amounts, aR = aL - 1; zero padded to M amounts
+    aL = [crypto.sc_0()] * MN
+    aR = [minus_one] * MN
+    for j, amount in enumerate(amounts):
+        for i in range(BP_N):
+            if (amount >> i) & 1:
+                aL[j * BP_N + i] = one
+                aR[j * BP_N + i] = crypto.sc_0()
+
+    # <aL, Gi> + <aR, Hi> with 0/1/-1 coefficients are just point sums
+    ve = crypto.identity()
+    for i in range(MN):
+        if crypto.sc_isnonzero(aL[i]):
+            ve = crypto.point_add(ve, Gi[i])
+        else:
+            ve = crypto.point_sub(ve, Hi[i])
+
+    cache = crypto.encodeint(crypto.hash_to_scalar(b"".join(V)))
+    while True:
+        alpha = crypto.random_scalar()
+        A = crypto.point_add(ve, crypto.scalarmult_base(alpha))
+        A = crypto.encodepoint(crypto.scalarmult(A, inv8))
+
+        sL = [crypto.random_scalar() for _ in range(MN)]
+        sR = [crypto.random_scalar() for _ in range(MN)]
+        rho = crypto.random_scalar()
+        S = multiexp(sL + sR + [rho], Gi + Hi + [crypto.scalarmult_base(one)])
+        S = crypto.encodepoint(crypto.scalarmult(S, inv8))
+
+        cache_y, y = _hash_cache_mash(cache, A, S)
+        if not crypto.sc_isnonzero(y):
+            continue
+        z = crypto.hash_to_scalar(cache_y)
+        cache_z = crypto.encodeint(z)
+        if not crypto.sc_isnonzero(z):
+            continue
+
+        # Polynomial l(x) = l0 + l1 * x, r(x) = r0 + r1 * x
+        zpow = vector_powers(z, M + 2)
+        twoN = vector_powers(crypto.sc_init(2), BP_N)
+        yMN = vector_powers(y, MN)
+        l0 = [crypto.sc_sub(v, z) for v in aL]
+        l1 = sL
+        r0 = [None] * MN
+        r1 = [None] * MN
+        for j in range(M):
+            for i in range(BP_N):
+                k = j * BP_N + i
+                zt = crypto.sc_mul(zpow[j + 2], twoN[i])
+                r0[k] = crypto.sc_muladd(crypto.sc_add(aR[k], z), yMN[k], zt)
+                r1[k] = crypto.sc_mul(yMN[k], sR[k])
+
+        t1 = crypto.sc_add(inner_product(l0, r1), inner_product(l1, r0))
+        t2 = inner_product(l1, r1)
+        tau1 = crypto.random_scalar()
+        tau2 = crypto.random_scalar()
+        T1 = crypto.encodepoint(
+            crypto.add_keys2(
+                crypto.sc_mul(tau1, inv8), crypto.sc_mul(t1, inv8), crypto.gen_H()
+            )
+        )
+        T2 = crypto.encodepoint(
+            crypto.add_keys2(
+                crypto.sc_mul(tau2, inv8), crypto.sc_mul(t2, inv8), crypto.gen_H()
+            )
+        )
+
+        cache_x, x = _hash_cache_mash(cache_z, cache_z, T1, T2)
+        if not crypto.sc_isnonzero(x):
+            continue
+
+        taux = crypto.sc_muladd(tau2, crypto.sc_mul(x, x), crypto.sc_mul(tau1, x))
+        for j in range(len(masks)):
+            taux = crypto.sc_muladd(zpow[j + 2], masks[j], taux)
+        mu = crypto.sc_muladd(x, rho, alpha)
+
+        l = [crypto.sc_muladd(b, x, a) for a, b in zip(l0, l1)]
+        r = [crypto.sc_muladd(b, x, a) for a, b in zip(r0, r1)]
+        t = inner_product(l, r)
+
+        cache_ip, x_ip = _hash_cache_mash(
+            cache_x,
+            cache_x,
+            crypto.encodeint(taux),
+            crypto.encodeint(mu),
+            crypto.encodeint(t),
+        )
+        if not crypto.sc_isnonzero(x_ip):
+            continue
+        break
+
+    L, R, a, b = _prove_inner(Gi, Hi, l, r, y, x_ip, cache_ip)
+
+    proof = xmrtypes.Bulletproof()
+    proof.V = V
+    proof.A, proof.S, proof.T1, proof.T2 = A, S, T1, T2
+    proof.taux = crypto.encodeint(taux)
+    proof.mu = crypto.encodeint(mu)
+    proof.L, proof.R = L, R
+    proof.a, proof.b = crypto.encodeint(a), crypto.encodeint(b)
+    proof.t = crypto.encodeint(t)
+    return proof
+
+
+def _prove_inner(Gi, Hi, a, b, y, x_ip, cache):
+    """
+    Inner product argument for <a, Gi> + <b, Hi'> + <a, b> * x_ip * H,
+    Hi' = y^-i * Hi.
+
+    Generators are not folded, the folded generator is kept as a combination
+    of the original ones, coefficient per original generator. L, R are then
+    a single multiexp over the originals each round.
+
+    :return: L, R, a, b
+    """
+    MN = len(a)
+    H = crypto.gen_H()
+    inv8 = _inv8()
+    cg = [crypto.sc_init(1)] * MN
+    ch = vector_powers(crypto.sc_inv(y), MN)
+    L, R = [], []
+
+    nprime = MN
+    while nprime > 1:
+        half = nprime // 2
+        cL = inner_product(a[:half], b[half:])
+        cR = inner_product(a[half:], b[:half])
+
+        # position of the original generator i in the folded vector is i % nprime
+        sL, sR = [], []
+        for i in range(MN):
+            pos = i % nprime
+            if pos < half:
+                sL.append(crypto.sc_mul(b[pos + half], ch[i]))
+                sR.append(crypto.sc_mul(a[pos + half], cg[i]))
+            else:
+                sL.append(crypto.sc_mul(a[pos - half], cg[i]))
+                sR.append(crypto.sc_mul(b[pos - half], ch[i]))
+
+        # sL pairs with G_hi and H_lo, sR with G_lo and H_hi
+        pL, pR = [], []
+        for i in range(MN):
+            lo = i % nprime < half
+            pL.append(Hi[i] if lo else Gi[i])
+            pR.append(Gi[i] if lo else Hi[i])
+
+        Li = multiexp(sL + [crypto.sc_mul(cL, x_ip)], pL + [H])
+        Ri = multiexp(sR + [crypto.sc_mul(cR, x_ip)], pR + [H])
+        L.append(crypto.encodepoint(crypto.scalarmult(Li, inv8)))
+        R.append(crypto.encodepoint(crypto.scalarmult(Ri, inv8)))
+
+        cache, w = _hash_cache_mash(cache, L[-1], R[-1])
+        winv = crypto.sc_inv(w)
+
+        # G' = winv * G_lo + w * G_hi, H' = w * H_lo + winv * H_hi
+        for i in range(MN):
+            lo = i % nprime < half
+            cg[i] = crypto.sc_mul(cg[i], winv if lo else w)
+            ch[i] = crypto.sc_mul(ch[i], w if lo else winv)
+
+        a = [
+            crypto.sc_add(crypto.sc_mul(a[i], w), crypto.sc_mul(a[i + half], winv))
+            for i in range(half)
+        ]
+        b = [
+            crypto.sc_add(crypto.sc_mul(b[i], winv), crypto.sc_mul(b[i + half], w))
+            for i in range(half)
+        ]
+        nprime = half
+
+    return L, R, a[0], b[0]
+
+
+def _check_proof(proof):
+    """
+    Structural checks, returns MN
+    :param proof:
+    :return:
+    """
+    if not proof.V:
+        raise ValueError("Bulletproof without commitments")
+    if len(proof.L) != len(proof.R):
+        raise ValueError("Mismatched L and R sizes")
+
+    log_mn = _log_m(len(proof.V)) + BP_LOG_N
+    if len(proof.L) != log_mn:
+        raise ValueError("Proof is not the expected size")
+    return 1 << log_mn
+
+
+def verify(proofs):
+    """
+    Batch verification of bulletproofs.
+    All proofs are checked with one multiexp, each with random weights.
+
+    :param proofs: list of xmrtypes.Bulletproof, byte encoded, with V
+    :return: True if all proofs are valid
+    """
+    if not proofs:
+        return True
+
+    max_mn = max(_check_proof(p) for p in proofs)
+    Gi, Hi = get_generators(max_mn)
+    eight = crypto.sc_init(8)
+    one = crypto.sc_init(1)
+
+    # coefficients of G, H, Gi, Hi, accumulated over the proofs
+    g_sc = crypto.sc_0()
+    h_sc = crypto.sc_0()
+    gi_sc = [crypto.sc_0()] * max_mn
+    hi_sc = [crypto.sc_0()] * max_mn
+    scalars, points = [], []
+
+    for proof in proofs:
+        MN = 1 << len(proof.L)
+        M = MN // BP_N
+
+        # Fiat-Shamir challenges
+        cache = crypto.encodeint(crypto.hash_to_scalar(b"".join(proof.V)))
+        cache, y = _hash_cache_mash(cache, proof.A, proof.S)
+        z = crypto.hash_to_scalar(cache)
+        cache = crypto.encodeint(z)
+        cache, x = _hash_cache_mash(cache, cache, proof.T1, proof.T2)
+        cache, x_ip = _hash_cache_mash(cache, cache, proof.taux, proof.mu, proof.t)
+        if not all(crypto.sc_isnonzero(c) for c in (y, z, x, x_ip)):
+            return False
+
+        w = []
+        for Lk, Rk in zip(proof.L, proof.R):
+            cache, wk = _hash_cache_mash(cache, Lk, Rk)
+            if not crypto.sc_isnonzero(wk):
+                return False
+            w.append(wk)
+        winv = [crypto.sc_inv(wk) for wk in w]
+
+        taux, mu, a, b, t = [
+            crypto.decodeint(v)
+            for v in (proof.taux, proof.mu, proof.a, proof.b, proof.t)
+        ]
+        if any(crypto.sc_check(v) != 0 for v in (taux, mu, a, b, t)):
+            return False
+
+        weight_y = crypto.random_scalar()
+        weight_z = crypto.random_scalar()
+        zpow = vector_powers(z, M + 3)
+        ypow = vector_powers(y, MN)
+        twoN = vector_powers(crypto.sc_init(2), BP_N)
+
+        # t check: taux G + (t - delta) H = z^2 * 8V + x * 8T1 + x^2 * 8T2
+        ip1y = crypto.sc_0()
+        for v in ypow:
+            ip1y = crypto.sc_add(ip1y, v)
+        ip12 = crypto.sc_sub(crypto.sc_mul(twoN[-1], crypto.sc_init(2)), one)
+        delta = crypto.sc_mul(crypto.sc_sub(z, zpow[2]), ip1y)
+        for j in range(1, M + 1):
+            delta = crypto.sc_mulsub(zpow[j + 2], ip12, delta)
+
+        wy8 = crypto.sc_mul(weight_y, eight)
+        g_sc = crypto.sc_muladd(weight_y, taux, g_sc)
+        h_sc = crypto.sc_muladd(weight_y, crypto.sc_sub(t, delta), h_sc)
+        for j, Vj in enumerate(proof.V):
+            scalars.append(
+                crypto.sc_sub(crypto.sc_0(), crypto.sc_mul(wy8, zpow[j + 2]))
+            )
+            points.append(crypto.decodepoint(Vj))
+        scalars.append(crypto.sc_sub(crypto.sc_0(), crypto.sc_mul(wy8, x)))
+        points.append(crypto.decodepoint(proof.T1))
+        scalars.append(
+            crypto.sc_sub(crypto.sc_0(), crypto.sc_mul(wy8, crypto.sc_mul(x, x)))
+        )
+        points.append(crypto.decodepoint(proof.T2))
+
+        # Inner product argument:
+        # 8A + x 8S - mu G + (t - ab) x_ip H + \sum 8 (w_k^2 L_k + w_k^-2 R_k)
+        #  - \sum (z + a s_i) G_i + \sum (z + (z_i 2^i - b / s_i) y^-i) H_i = 0
+        wz8 = crypto.sc_mul(weight_z, eight)
+        scalars.append(wz8)
+        points.append(crypto.decodepoint(proof.A))
+        scalars.append(crypto.sc_mul(wz8, x))
+        points.append(crypto.decodepoint(proof.S))
+        g_sc = crypto.sc_mulsub(weight_z, mu, g_sc)
+        h_sc = crypto.sc_muladd(
+            weight_z,
+            crypto.sc_mul(crypto.sc_mulsub(a, b, t), x_ip),
+            h_sc,
+        )
+        for k in range(len(w)):
+            scalars.append(crypto.sc_mul(wz8, crypto.sc_mul(w[k], w[k])))
+            points.append(crypto.decodepoint(proof.L[k]))
+            scalars.append(crypto.sc_mul(wz8, crypto.sc_mul(winv[k], winv[k])))
+            points.append(crypto.decodepoint(proof.R[k]))
+
+        # s_i = \prod_k w_k^{+-1}, the first round folds by the top bit of i,
+        # s_i^-1 = s_{MN - 1 - i}
+        s = [one]
+        for k in range(len(w)):
+            s = [
+                c
+                for v in s
+                for c in (crypto.sc_mul(v, winv[k]), crypto.sc_mul(v, w[k]))
+            ]
+
+        yinv = crypto.sc_inv(y)
+        yinvpow = one
+        for i in range(MN):
+            g_i = crypto.sc_add(z, crypto.sc_mul(a, s[i]))
+            zt = crypto.sc_mul(zpow[i // BP_N + 2], twoN[i % BP_N])
+            h_i = crypto.sc_muladd(
+                crypto.sc_mulsub(b, s[MN - 1 - i], zt), yinvpow, z
+            )
+            gi_sc[i] = crypto.sc_mulsub(weight_z, g_i, gi_sc[i])
+            hi_sc[i] = crypto.sc_muladd(weight_z, h_i, hi_sc[i])
+            yinvpow = crypto.sc_mul(yinvpow, yinv)
+
+    scalars += [g_sc, h_sc] + gi_sc + hi_sc
+    points += [crypto.scalarmult_base(one), crypto.gen_H()] + Gi + Hi
+    res = multiexp(scalars, points)
+    return crypto.point_eq(res, crypto.identity())
+
+
+def commitment_to_v(C):
+    """
+    Proof commitment V = 8^-1 * C from the output commitment (outPk mask)
+    :param C: encoded point
+    :return: encoded point
+    """
+    return crypto.encodepoint(crypto.scalarmult(crypto.decodepoint(C), _inv8()))
@@ -5,8 +5,8 @@
 import functools
 import hmac
 
-from Crypto.Random import get_random_bytes
 from Crypto.Random import random as rand
+from monero_glue.xmr.core import random_pool
 
 
 class XmrException(Exception):
@@ -63,7 +63,7 @@ def random_bytes(by):
     :param by:
     :return:
     """
-    return get_random_bytes(by)
+    return random_pool.random_bytes(by)
 
 
 def ct_equal(a, b):
@@ -180,12 +180,11 @@ def defvalkeys(js, key, default=None):
 
 
 def chunk(arr, size=1):
-    res = []
-    idx = 0
-    while True:
-        c = arr[idx : idx + size]
-        res.append(c)
-        idx += size
-        if len(c) != size:
-            break
-    return res
+    """
+    Splits the array to chunks of the given size, the last one may be shorter.
+    No empty trailing chunk is produced.
+    :param arr:
+    :param size:
+    :return:
+    """
+    return [arr[idx : idx + size] for idx in range(0, len(arr), size)]
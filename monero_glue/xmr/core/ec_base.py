@@ -40,6 +40,8 @@ py_fe_d2 = fe_d2 = (2 * ed25519.d) % q
 py_fe_A = fe_A = 486662
 py_fe_ma = fe_ma = -486662
 py_fe_ma2 = fe_ma2 = -1 * fe_A * fe_A
+py_fe_a24 = fe_a24 = (fe_A - 2) // 4
+py_fe_mont_c = fe_mont_c = ed25519.sqroot(-(fe_A + 2) % q)  # Edwards <-> Montgomery
 
 # k.<a> = FiniteField(2**255-19, 'a')
 # A = fe_A * a
@@ -206,3 +208,6 @@ class ECBackendBase(object):
 
     def has_rangeproof_bulletproof(self):
         return False
+
+    def has_key_derivation_ladder(self):
+        return False
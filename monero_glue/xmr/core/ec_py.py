@@ -6,8 +6,7 @@ import hashlib
 import hmac
 
 from Crypto.Protocol.KDF import PBKDF2
-from Crypto.Random import get_random_bytes
-from Crypto.Random import random as rand
+from monero_glue.xmr.core import random_pool
 from monero_glue.xmr.core.backend.ed25519 import expmod
 from monero_glue.xmr.core.backend.ed25519_2 import inv
 from monero_glue.xmr.core.ec_base import *
@@ -20,7 +19,7 @@ def random_bytes(by):
     :param by:
     :return:
     """
-    return get_random_bytes(by)
+    return random_pool.random_bytes(by)
 
 
 def get_keccak():
@@ -499,12 +498,33 @@ def sc_muladd(aa, bb, cc):
     return (cc + aa * bb) % l
 
 
+def sc_mul(aa, bb):
+    """
+    (aa * bb) % l
+    :param aa:
+    :param bb:
+    :return:
+    """
+    return (aa * bb) % l
+
+
+def sc_inv(aa):
+    """
+    Scalar inversion, aa^-1 % l
+    :param aa:
+    :return:
+    """
+    if aa % l == 0:
+        raise ValueError("Zero scalar is not invertible")
+    return pow(aa, l - 2, l)
+
+
 def random_scalar():
     """
     Generates random scalar (secret key)
     :return:
     """
-    return sc_reduce32(rand.getrandbits(64 * 8))
+    return random_pool.random_scalar()
 
 
 #
@@ -794,6 +814,107 @@ def hash_to_ec(buf):
     return P8
 
 
+#
+# Montgomery form v^2 = u^3 + A u^2 + u, birationally equivalent to ed25519
+# x-only ladder is cheaper per bit than the Edwards double and add
+#
+
+
+def point_to_mont(P):
+    """
+    Edwards extended point -> Montgomery affine (u, v),
+    u = (1 + y) / (1 - y), v = c * u / x, c = sqrt(-(A + 2))
+    :param P:
+    :return: (u, v) or None for the exceptional points with x = 0
+    """
+    X, Y, Z = P[:3]
+    den = (Z - Y) * X % q
+    if den == 0:
+        return None
+    den = inv(den)
+    return (Z + Y) * X * den % q, fe_mont_c * (Z + Y) * Z * den % q
+
+
+def point_from_mont(X, Y, Z):
+    """
+    Montgomery projective (X:Y:Z) -> Edwards extended point,
+    x = c * u / v, y = (u - 1) / (u + 1)
+    :return: point or None for the exceptional points
+    """
+    xz = (X + Z) % q
+    ez = Y * xz % q
+    if ez == 0:
+        return None
+    return (
+        fe_mont_c * X * xz % q,
+        Y * (X - Z) % q,
+        ez,
+        fe_mont_c * X * (X - Z) % q,
+    )
+
+
+def mont_ladder(u, k):
+    """
+    x-only Montgomery ladder, c.f. RFC 7748 section 5
+    :param u: affine u-coordinate of P
+    :param k: integer scalar, not reduced
+    :return: (X1, Z1, X2, Z2), kP and (k+1)P projective u-coordinates
+    """
+    x1, z1, x2, z2 = 1, 0, u, 1
+    a24 = fe_a24
+    for i in range(k.bit_length() - 1, -1, -1):
+        a, b = x1 + z1, x1 - z1
+        c, d = x2 + z2, x2 - z2
+        da, cb = d * a % q, c * b % q
+        xa, za = da + cb, da - cb
+        xa, za = xa * xa % q, u * (za * za % q) % q
+        if (k >> i) & 1:
+            aa, bb = c * c % q, d * d % q
+            e = aa - bb
+            x1, z1, x2, z2 = xa, za, aa * bb % q, e * (aa + a24 * e) % q
+        else:
+            aa, bb = a * a % q, b * b % q
+            e = aa - bb
+            x1, z1, x2, z2 = aa * bb % q, e * (aa + a24 * e) % q, xa, za
+    return x1, z1, x2, z2
+
+
+def mont_recover_y(u, v, X1, Z1, X2, Z2):
+    """
+    Okamoto-Salerno y-recovery of Q = (X1:Z1) from P = (u, v) and
+    Q + P = (X2:Z2), c.f. Costello, Smith: Montgomery curves and their
+    arithmetic, algorithm 5.
+    :return: (X:Y:Z) projective Montgomery point Q
+    """
+    v1 = u * Z1
+    v2 = X1 + v1
+    v3 = (X1 - v1) ** 2 * X2
+    v1 = 2 * fe_A * Z1
+    v2 = (v2 + v1) * (u * X1 + Z1)
+    v2 = (v2 - v1 * Z1) * Z2
+    v1 = 2 * v * Z1 * Z2 % q
+    return v1 * X1 % q, (v2 - v3) % q, v1 * Z1 % q
+
+
+def ge_scalarmult_ladder(k, P):
+    """
+    k*P via the Montgomery ladder, exactly as ge_scalarmult.
+    Exceptional points fall back to the Edwards scalarmult.
+    :param k: integer scalar, not reduced (e.g., 8*a for the cofactor)
+    :param P: point
+    :return:
+    """
+    mont = point_to_mont(P)
+    if mont is not None and k > 0:
+        X1, Z1, X2, Z2 = mont_ladder(mont[0], k)
+        if Z1 == 0:
+            return identity()
+        res = point_from_mont(*mont_recover_y(mont[0], mont[1], X1, Z1, X2, Z2))
+        if res is not None:
+            return res
+    return scalarmult(P, k)
+
+
 #
 # XMR
 #
@@ -864,6 +985,9 @@ def generate_key_derivation(key1, key2):
         raise ValueError("didn't pass curve checks in keyder")
 
     check_ed25519point(key1)
+    if get_backend().has_key_derivation_ladder():
+        return ge_scalarmult_ladder(8 * key2, key1)
+
     point2 = ge_scalarmult(key2, key1)
     point3 = ge_mul8(
         point2
@@ -925,6 +1049,13 @@ def derive_secret_key(derivation, output_index, base):
 class PyECBackend(ECBackendBase):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.key_derivation_ladder = kwargs.get("key_derivation_ladder", True)
+
+    def has_rangeproof_bulletproof(self):
+        return True
+
+    def has_key_derivation_ladder(self):
+        return self.key_derivation_ladder
 
 
 BACKEND_OBJ = None
@@ -6,6 +6,7 @@ import hmac
 
 import ctypes as ct
 from Crypto.Protocol.KDF import PBKDF2
+from monero_glue.xmr.core import random_pool
 from monero_glue.xmr.core.ec_base import *
 from trezor_crypto import trezor_cfunc as tcryr
 
@@ -24,7 +25,7 @@ def random_bytes(by):
     :param by:
     :return:
     """
-    return tcry.random_buffer_r(by)
+    return random_pool.random_bytes(by)
 
 
 class KeccakWrapper(object):
@@ -362,8 +363,35 @@ def sc_muladd(aa, bb, cc):
     return tcry.muladd256_modm_r(aa, bb, cc)
 
 
+def sc_mul(aa, bb):
+    """
+    (aa * bb) % l
+    :param aa:
+    :param bb:
+    :return:
+    """
+    return tcry.muladd256_modm_r(aa, bb, sc_0())
+
+
+def sc_inv(aa):
+    """
+    Scalar inversion, aa^-1 % l, square and multiply by l - 2
+    :param aa:
+    :return:
+    """
+    if not sc_isnonzero(aa):
+        raise ValueError("Zero scalar is not invertible")
+
+    res = sc_init(1)
+    for i in range(252, -1, -1):
+        res = sc_mul(res, res)
+        if ((l - 2) >> i) & 1:
+            res = sc_mul(res, aa)
+    return res
+
+
 def random_scalar():
-    return tcry.xmr_random_scalar_r()
+    return decodeint(random_pool.random_scalar().to_bytes(32, "little"))
 
 
 #
@@ -664,14 +692,12 @@ def prove_range(amount, last_mask=None):
     C, a, R = tcry.gen_range_proof(amount, last_mask)
 
     # Trezor micropython extmod returns byte-serialized/flattened rsig
-    nrsig = b""
-    for i in range(len(R.asig.s0)):
-        nrsig += bytes(R.asig.s0[i])
-    for i in range(len(R.asig.s1)):
-        nrsig += bytes(R.asig.s1[i])
-    nrsig += bytes(R.asig.ee)
-    for i in range(len(R.Ci)):
-        nrsig += bytes(R.Ci[i])
+    nrsig = b"".join(
+        [bytes(x) for x in R.asig.s0]
+        + [bytes(x) for x in R.asig.s1]
+        + [bytes(R.asig.ee)]
+        + [bytes(x) for x in R.Ci]
+    )
     return C, a, nrsig
 
     # # Rewrap to serializable structures
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+#
+# Randomness source for the EC backends.
+# The default pool reads os.urandom in large blocks and slices it,
+# random scalars are 64 random bytes reduced mod l (no modulo bias).
+#
+# The deterministic pool is for tests and benchmarks ONLY, it makes
+# proofs and signatures reproducible across runs and backends.
+# Never use it for real keys or signatures. It is enabled only by
+# an explicit set_deterministic() call from the test / bench code.
+
+import hashlib
+import logging
+import os
+import threading
+import weakref
+
+from monero_glue.xmr.core.backend.ed25519 import l
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 4096
+POOLS = weakref.WeakSet()
+
+
+class RandomPool(object):
+    """
+    Buffered CSPRNG pool over os.urandom
+    """
+
+    deterministic = False
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.buffer = b""
+        self.offset = 0
+        self.lock = threading.Lock()
+        POOLS.add(self)
+
+    def fill(self, size):
+        return os.urandom(size)
+
+    def after_fork(self):
+        """
+        Forked child must not reuse the parent's buffered bytes
+        """
+        self.lock = threading.Lock()
+        self.buffer, self.offset = b"", 0
+
+    def random_bytes(self, size):
+        """
+        Returns size random bytes
+        :param size:
+        :return:
+        """
+        with self.lock:
+            if self.offset + size > len(self.buffer):
+                rest = self.buffer[self.offset :]
+                self.buffer = rest + self.fill(max(size, self.block_size))
+                self.offset = 0
+
+            res = self.buffer[self.offset : self.offset + size]
+            self.offset += size
+            return res
+
+    def random_scalar(self):
+        """
+        Uniform integer in [0, l)
+        :return:
+        """
+        return int.from_bytes(self.random_bytes(64), "little") % l
+
+
+class DeterministicPool(RandomPool):
+    """
+    Seeded pool, SHA-512 in counter mode. Tests and benchmarks only.
+    The stream is not reset on fork, forked workers repeat it.
+    """
+
+    deterministic = True
+
+    def __init__(self, seed, block_size=BLOCK_SIZE):
+        super().__init__(block_size)
+        if isinstance(seed, int):
+            seed = seed.to_bytes(32, "little")
+        elif isinstance(seed, str):
+            seed = seed.encode("utf8")
+        self.seed = hashlib.sha512(b"monero_glue.random_pool" + bytes(seed)).digest()
+        self.counter = 0
+
+    def fill(self, size):
+        res = []
+        for _ in range((size + 63) // 64):
+            ctr = self.counter.to_bytes(8, "little")
+            res.append(hashlib.sha512(self.seed + ctr).digest())
+            self.counter += 1
+        return b"".join(res)
+
+    def after_fork(self):
+        self.lock = threading.Lock()
+
+
+def _after_fork():
+    for pool in list(POOLS):
+        pool.after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+SOURCE = None
+
+
+def get_source():
+    """
+    Current randomness source
+    :return:
+    :rtype: RandomPool
+    """
+    global SOURCE
+    if SOURCE is None:
+        SOURCE = RandomPool()
+    return SOURCE
+
+
+def set_source(src):
+    """
+    Sets the randomness source, None restores the default one
+    :param src:
+    :return:
+    """
+    global SOURCE
+    SOURCE = src
+
+
+def deterministic_pool(seed):
+    logger.warning("Deterministic randomness enabled, use for tests only")
+    return DeterministicPool(seed)
+
+
+def set_deterministic(seed):
+    """
+    Switches to the seeded deterministic pool. Tests and benchmarks only.
+    :param seed: int, str or bytes
+    :return:
+    """
+    set_source(deterministic_pool(seed))
+
+
+def is_deterministic():
+    return get_source().deterministic
+
+
+def random_bytes(size):
+    return get_source().random_bytes(size)
+
+
+def random_scalar():
+    return get_source().random_scalar()
@@ -2,20 +2,299 @@
 # -*- coding: utf-8 -*-
 # Author: Dusan Klinec, ph4r05, 2018
 
+import collections
+
 import pycryptonight
 from Crypto.Cipher import ChaCha20
 from monero_glue.xmr import crypto
 
 
+class KeyCache(object):
+    """
+    Session-scoped cache of the CryptoNight derived ChaCha keys.
+    Entries are keyed by a salted hash of the key material so the secret
+    itself is not retained. Derived keys are held in bytearrays and zeroed on wipe.
+    """
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.salt = crypto.random_bytes(32)
+        self.keys = collections.OrderedDict()
+
+    def _key_id(self, data):
+        return crypto.cn_fast_hash(self.salt + bytes(data))
+
+    def get(self, data):
+        """
+        Returns derived key for the data, computes it if not cached
+        :param data:
+        :return:
+        """
+        kid = self._key_id(data)
+        key = self.keys.get(kid)
+        if key is not None:
+            self.keys.move_to_end(kid)
+            return key
+
+        key = bytearray(pycryptonight.cn_slow_hash(data))
+        self.keys[kid] = key
+        while len(self.keys) > self.max_entries:
+            _, old = self.keys.popitem(last=False)
+            _wipe(old)
+        return key
+
+    def warmup(self, data):
+        """
+        Precomputes the key so the slow hash is not run on the first file operation
+        :param data:
+        :return:
+        """
+        self.get(data)
+
+    def warmup_xmr(self, priv_key):
+        """
+        Precomputes the key used by encrypt_xmr / decrypt_xmr
+        :param priv_key: scalar
+        :return:
+        """
+        self.warmup(crypto.encodeint(priv_key))
+
+    def wipe(self):
+        """
+        Zeroes and drops all cached keys
+        :return:
+        """
+        for key in self.keys.values():
+            _wipe(key)
+        self.keys.clear()
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def _wipe(buff):
+    for i in range(len(buff)):
+        buff[i] = 0
+
+
+_key_cache = None  # type: KeyCache
+
+
+def set_key_cache(cache):
+    """
+    Installs session key cache used by generate_key(), None disables caching.
+    Previously installed cache is wiped.
+    :param cache:
+    :type cache: KeyCache
+    :return:
+    """
+    global _key_cache
+    if _key_cache is not None and _key_cache is not cache:
+        _key_cache.wipe()
+    _key_cache = cache
+    return cache
+
+
+def get_key_cache():
+    """
+    Returns current session key cache or None
+    :return:
+    """
+    return _key_cache
+
+
 def generate_key(data):
     """
     Chacha key derivation used in Monero
     :param data:
     :return:
     """
+    if _key_cache is not None:
+        return bytes(_key_cache.get(data))
     return pycryptonight.cn_slow_hash(data)
 
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _sign_hash(priv_key, hash):
+    c, r, pub = crypto.generate_signature(hash, priv_key)
+    return crypto.encodeint(c) + crypto.encodeint(r)
+
+
+def _check_hash_signature(priv_key, hash, signature):
+    pub = crypto.scalarmult_base(priv_key)
+    c = crypto.decodeint(bytes(signature[:32]))
+    r = crypto.decodeint(bytes(signature[32:]))
+    res = crypto.check_signature(hash, c, r, pub)
+    if not res:
+        raise ValueError("Signature invalid")
+
+
+def hash_stream(buff, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    cn_fast_hash computed incrementally over the buffer, no copy of the buffer is made
+    :param buff: bytes-like object, e.g., mmap
+    :param chunk_size:
+    :return:
+    """
+    kck = crypto.get_keccak()
+    with memoryview(buff) as mv:
+        for off in range(0, len(mv), chunk_size):
+            with mv[off : off + chunk_size] as chunk:
+                kck.update(chunk)
+    return kck.digest()
+
+
+class ChaChaStreamReader(object):
+    """
+    Decrypts nonce+ciphertext buffer in chunks on demand.
+    Provides readinto / areadinto interface of the archive readers.
+    """
+
+    def __init__(self, key, buff, chunk_size=STREAM_CHUNK_SIZE):
+        with memoryview(buff) as mv:
+            if len(mv) < 8:
+                raise ValueError("Ciphertext too short")
+            self.cipher = ChaCha20.new(key=key, nonce=bytes(mv[:8]))
+            self.ciphertext = mv[8:]
+        self.chunk_size = chunk_size
+        self.coffset = 0
+        self.plain = bytearray()
+        self.poffset = 0
+        self.nread = 0
+
+    def _fill(self, size):
+        if self.poffset >= self.chunk_size:
+            del self.plain[: self.poffset]
+            self.poffset = 0
+
+        while len(self.plain) - self.poffset < size and self.coffset < len(
+            self.ciphertext
+        ):
+            end = self.coffset + self.chunk_size
+            with self.ciphertext[self.coffset : end] as chunk:
+                self.plain += self.cipher.decrypt(chunk)
+                self.coffset += len(chunk)
+
+    def is_empty(self):
+        return self.coffset >= len(self.ciphertext) and self.poffset >= len(self.plain)
+
+    def readinto(self, buf):
+        ln = len(buf)
+        self._fill(ln)
+        nread = min(ln, len(self.plain) - self.poffset)
+        if ln > 0 and nread == 0:
+            raise EOFError
+
+        buf[:nread] = self.plain[self.poffset : self.poffset + nread]
+        self.poffset += nread
+        self.nread += nread
+        return nread
+
+    async def areadinto(self, buf):
+        return self.readinto(buf)
+
+    def close(self):
+        """
+        Releases the underlying buffer, e.g., so the mmap can be closed
+        :return:
+        """
+        self.ciphertext.release()
+        self.plain = bytearray()
+        self.poffset = 0
+
+
+class ChaChaStreamWriter(object):
+    """
+    Encrypts written data in chunks, writes nonce+ciphertext to the file object.
+    Ciphertext hash is computed incrementally for the signature.
+    Provides write / awrite interface of the archive writers.
+    """
+
+    def __init__(self, key, fh, priv_key=None, chunk_size=STREAM_CHUNK_SIZE):
+        self.cipher = ChaCha20.new(key=key)
+        self.fh = fh
+        self.priv_key = priv_key
+        self.chunk_size = chunk_size
+        self.hasher = crypto.get_keccak()
+        self.buff = bytearray()
+        self.nwritten = 0
+        self._out(self.cipher.nonce)
+
+    def _out(self, data):
+        self.hasher.update(data)
+        self.fh.write(data)
+
+    def flush(self):
+        if self.buff:
+            self._out(self.cipher.encrypt(bytes(self.buff)))
+            self.buff = bytearray()
+
+    def write(self, buf):
+        self.buff += buf
+        self.nwritten += len(buf)
+        if len(self.buff) >= self.chunk_size:
+            self.flush()
+        return len(buf)
+
+    async def awrite(self, buf):
+        return self.write(buf)
+
+    def close(self):
+        """
+        Flushes the data, appends signature if the private key was given
+        :return:
+        """
+        self.flush()
+        if self.priv_key is not None:
+            self.fh.write(_sign_hash(self.priv_key, self.hasher.digest()))
+
+
+def decrypt_xmr_stream(priv_key, buff, authenticated=True, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Streaming variant of decrypt_xmr. Signature is verified over the buffer
+    incrementally first, then a chunked decrypting reader is returned.
+
+    :param priv_key:
+    :param buff: bytes-like object, e.g., mmap of the file
+    :param authenticated:
+    :param chunk_size:
+    :return:
+    :rtype: ChaChaStreamReader
+    """
+    with memoryview(buff) as mv:
+        if authenticated and len(mv) < 64:
+            raise ValueError("Signature missing")
+
+        with mv[:-64] if authenticated else mv[:] as body:
+            if authenticated:
+                with mv[-64:] as signature:
+                    sig_hash = hash_stream(body, chunk_size)
+                    _check_hash_signature(priv_key, sig_hash, bytes(signature))
+
+            key = generate_key(crypto.encodeint(priv_key))
+            return ChaChaStreamReader(key, body, chunk_size)
+
+
+def encrypt_xmr_stream(priv_key, fh, authenticated=True, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Streaming variant of encrypt_xmr. Returns a writer encrypting to the file object,
+    writer.close() has to be called to finish the stream.
+
+    :param priv_key:
+    :param fh:
+    :param authenticated:
+    :param chunk_size:
+    :return:
+    :rtype: ChaChaStreamWriter
+    """
+    key = generate_key(crypto.encodeint(priv_key))
+    return ChaChaStreamWriter(
+        key, fh, priv_key if authenticated else None, chunk_size
+    )
+
+
 def encrypt_xmr(priv_key, plaintext, authenticated=True):
     """
     Monero-like authenticated encryption with Chacha20 and EC signature
@@ -31,9 +310,7 @@ def encrypt_xmr(priv_key, plaintext, authenticated=True):
         return ciphertext
 
     hash = crypto.cn_fast_hash(ciphertext)
-    c, r, pub = crypto.generate_signature(hash, priv_key)
-    signature = crypto.encodeint(c) + crypto.encodeint(r)
-    return ciphertext + signature
+    return ciphertext + _sign_hash(priv_key, hash)
 
 
 def decrypt_xmr(priv_key, ciphertext, authenticated=True):
@@ -48,12 +325,7 @@ def decrypt_xmr(priv_key, ciphertext, authenticated=True):
     if authenticated:
         ciphertext, signature = ciphertext[:-64], ciphertext[-64:]
         hash = crypto.cn_fast_hash(ciphertext)
-        pub = crypto.scalarmult_base(priv_key)
-        c = crypto.decodeint(signature[:32])
-        r = crypto.decodeint(signature[32:])
-        res = crypto.check_signature(hash, c, r, pub)
-        if not res:
-            raise ValueError("Signature invalid")
+        _check_hash_signature(priv_key, hash, signature)
 
     key = generate_key(crypto.encodeint(priv_key))
     return decrypt(key, ciphertext)
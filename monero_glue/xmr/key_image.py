@@ -3,6 +3,7 @@
 # Author: Dusan Klinec, ph4r05, 2018
 
 import collections
+from array import array
 
 from monero_glue.messages import (
     MoneroExportedKeyImage,
@@ -14,34 +15,161 @@ from monero_glue.xmr import common, crypto, mlsag2, monero, ring_ct
 from monero_serialize import xmrserialize, xmrtypes
 
 
+async def key_image_data(td, idx=0):
+    """
+    Extracts out_key, tx pub key, additional tx pub keys data from one transfer
+
+    :param td:
+    :type td: xmrtypes.TransferDetails
+    :param idx: output index, for error reporting
+    :return:
+    :rtype: MoneroTransferDetails
+    """
+    if common.is_empty(td.m_tx.vout):
+        raise ValueError("Tx with no outputs %s" % idx)
+
+    extra_idx = monero.scan_extra_fields(td.m_tx.extra)
+    tx_pub_key = await monero.get_tx_pub_key_from_received_outs(td, extra_idx)
+    additional_pub_keys = extra_idx.additional_keys()
+    out_key = td.m_tx.vout[td.m_internal_output_index].target.key
+    return MoneroTransferDetails(
+        out_key=out_key,
+        tx_pub_key=tx_pub_key,
+        additional_tx_pub_keys=[bytes(x) for x in additional_pub_keys]
+        if additional_pub_keys is not None
+        else None,
+        internal_output_index=td.m_internal_output_index,
+    )
+
+
+class KeyImageColumns(object):
+    """
+    Compact columnar storage of the data needed for the key image sync.
+    Keys are packed in bytearrays, indices in arrays, MoneroTransferDetails
+    are materialized only on access.
+    """
+
+    def __init__(self):
+        self.out_keys = bytearray()
+        self.tx_pub_keys = bytearray()
+        self.add_keys = bytearray()
+        self.add_offsets = array("L", [0])  # additional keys of i: [off[i], off[i+1])
+        self.internal_indices = array("L")
+        self.sub_major = array("L")
+        self.sub_minor = array("L")
+
+    def __len__(self):
+        return len(self.internal_indices)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.tdi(i) for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if item < 0 or item >= len(self):
+            raise IndexError("Index out of range")
+        return self.tdi(item)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.tdi(i)
+
+    @staticmethod
+    async def from_outputs(outputs):
+        """
+        Builds the columns from TransferDetails
+        :param outputs:
+        :return:
+        """
+        res = KeyImageColumns()
+        for idx, td in enumerate(outputs):
+            await res.add(td, idx)
+        return res
+
+    async def add(self, td, idx=0):
+        """
+        Extracts key image sync data from TransferDetails
+        :param td:
+        :type td: xmrtypes.TransferDetails
+        :param idx: output index, for error reporting
+        :return:
+        """
+        tdi = await key_image_data(td, idx)
+        self.append(tdi, td.m_subaddr_index.major, td.m_subaddr_index.minor)
+
+    def append(self, tdi, major=0, minor=0):
+        """
+        Appends MoneroTransferDetails
+        :param tdi:
+        :type tdi: MoneroTransferDetails
+        :param major:
+        :param minor:
+        :return:
+        """
+        self.out_keys += tdi.out_key
+        self.tx_pub_keys += tdi.tx_pub_key
+        for x in tdi.additional_tx_pub_keys or ():
+            self.add_keys += x
+        self.add_offsets.append(len(self.add_keys) // 32)
+        self.internal_indices.append(tdi.internal_output_index)
+        self.sub_major.append(major)
+        self.sub_minor.append(minor)
+
+    def additional_keys(self, i):
+        """
+        Additional tx pub keys of the i-th output
+        :param i:
+        :return:
+        """
+        return [
+            bytes(self.add_keys[32 * j : 32 * (j + 1)])
+            for j in range(self.add_offsets[i], self.add_offsets[i + 1])
+        ]
+
+    def tdi(self, i):
+        """
+        Materializes i-th MoneroTransferDetails
+        :param i:
+        :return:
+        """
+        add_keys = self.additional_keys(i)
+        return MoneroTransferDetails(
+            out_key=bytes(self.out_keys[32 * i : 32 * (i + 1)]),
+            tx_pub_key=bytes(self.tx_pub_keys[32 * i : 32 * (i + 1)]),
+            additional_tx_pub_keys=add_keys if add_keys else None,
+            internal_output_index=self.internal_indices[i],
+        )
+
+    def hash(self, i):
+        """
+        compute_hash() of the i-th output, without materializing it
+        :param i:
+        :return:
+        """
+        kck = crypto.get_keccak()
+        kck.update(self.out_keys[32 * i : 32 * (i + 1)])
+        kck.update(self.tx_pub_keys[32 * i : 32 * (i + 1)])
+        kck.update(self.add_keys[32 * self.add_offsets[i] : 32 * self.add_offsets[i + 1]])
+        kck.update(xmrserialize.dump_uvarint_b(self.internal_indices[i]))
+        return kck.digest()
+
+
 async def yield_key_image_data(outputs):
     """
     Process outputs, yields out_key, tx pub key, additional tx pub keys data
     yield in async from py3.6
 
+    KeyImageColumns are already in the processed form and are returned as they are.
+
     :param outputs:
     :return:
     """
+    if isinstance(outputs, KeyImageColumns):
+        return outputs
+
     res = []
     for idx, td in enumerate(outputs):  # type: xmrtypes.TransferDetails
-        if common.is_empty(td.m_tx.vout):
-            raise ValueError("Tx with no outputs %s" % idx)
-
-        tx_pub_key = await monero.get_tx_pub_key_from_received_outs(td)
-        extras = await monero.parse_extra_fields(list(td.m_tx.extra))
-        additional_pub_keys = monero.find_tx_extra_field_by_type(
-            extras, xmrtypes.TxExtraAdditionalPubKeys
-        )
-        out_key = td.m_tx.vout[td.m_internal_output_index].target.key
-        cres = MoneroTransferDetails(
-            out_key=out_key,
-            tx_pub_key=tx_pub_key,
-            additional_tx_pub_keys=additional_pub_keys.data
-            if additional_pub_keys
-            else None,
-            internal_output_index=td.m_internal_output_index,
-        )
-        res.append(cres)
+        res.append(await key_image_data(td, idx))
     return res
 
 
@@ -62,25 +190,34 @@ def compute_hash(rr):
     return kck.digest()
 
 
-async def generate_commitment(outputs):
+async def generate_commitment(outputs, tdis=None):
     """
     Generates num, hash commitment for initial message for ki syc
     :param outputs:
-    :type outputs: list[xmrtypes.TransferDetails]
+    :type outputs: list[xmrtypes.TransferDetails]|KeyImageColumns
+    :param tdis: already extracted key image data of outputs, computed if None
+    :type tdis: list[MoneroTransferDetails]
     :return:
     """
-    hashes = []
     sub_indices = collections.defaultdict(lambda: set())
-    for out in outputs:
-        sub_indices[out.m_subaddr_index.major].add(out.m_subaddr_index.minor)
-
     num = 0
     kck = crypto.get_keccak()
-    iter = await yield_key_image_data(outputs)
-    for rr in iter:  # type: MoneroTransferDetails
-        hash = compute_hash(rr)
-        kck.update(hash)
-        num += 1
+
+    if isinstance(outputs, KeyImageColumns):
+        for i in range(len(outputs)):
+            sub_indices[outputs.sub_major[i]].add(outputs.sub_minor[i])
+            kck.update(outputs.hash(i))
+            num += 1
+
+    else:
+        for out in outputs:
+            sub_indices[out.m_subaddr_index.major].add(out.m_subaddr_index.minor)
+
+        # Key image data computed one by one, not retained
+        for idx, out in enumerate(outputs):
+            rr = tdis[idx] if tdis is not None else await key_image_data(out, idx)
+            kck.update(compute_hash(rr))
+            num += 1
 
     final_hash = kck.digest()
     indices = []
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+#
+# Batch MLSAG verification, e.g., all inputs of a block.
+# Ring members are deduplicated over the batch, decompressed and hashed
+# to the curve once, in parallel. Each key image gets a precomputed table
+# as it is multiplied by every c_i of its ring. Only the hash chains remain
+# sequential, one task per signature.
+
+import asyncio
+
+from monero_glue.xmr import crypto, mlsag2
+from monero_glue.xmr.multiexp import precomp_table, table_mult
+
+_G_TABLE = None  # per process, built on the first use
+
+
+def _g_table():
+    global _G_TABLE
+    if _G_TABLE is None:
+        _G_TABLE = precomp_table(crypto.scalarmult_base(crypto.sc_init(1)))
+    return _G_TABLE
+
+
+def _prep_key(key, hp):
+    try:
+        return crypto.decodepoint(key), crypto.hash_to_ec(key) if hp else None
+    except Exception:
+        return None
+
+
+def _prep_keys(keys):
+    """
+    Decompresses the keys, hash to the curve for the signing keys
+    :param keys: list of (encoded key, needs H_p)
+    :return: list of (point, H_p point or None), None for an invalid key
+    """
+    return [_prep_key(key, hp) for key, hp in keys]
+
+
+def _prep_table(image):
+    try:
+        return precomp_table(crypto.decodepoint(image))
+    except Exception:
+        return None
+
+
+def _prep_tables(images):
+    """
+    Key image tables
+    :param images: encoded key images
+    :return: tables, None for an invalid key image
+    """
+    return [_prep_table(x) for x in images]
+
+
+def _ver_chain(message, pk, hp, tables, ss, cc, ds_rows):
+    """
+    MLSAG hash chain over the prepared ring, c.f. mlsag2.ver_mlsag_ext
+    :param message:
+    :param pk: matrix of points, pk[i][j] column i, row j
+    :param hp: H_p(pk[i][j]) for the rows j < ds_rows
+    :param tables: key image tables, ds_rows
+    :param ss: decoded ss matrix
+    :param cc: decoded cc
+    :param ds_rows:
+    :return:
+    """
+    g_table = _g_table()
+    c_old = cc
+    for i in range(len(pk)):
+        hasher = mlsag2.hasher_message(message)
+        for j in range(len(pk[i])):
+            L = crypto.point_add(
+                table_mult(g_table, ss[i][j]), crypto.scalarmult(pk[i][j], c_old)
+            )
+            hasher.update(crypto.encodepoint(pk[i][j]))
+            hasher.update(crypto.encodepoint(L))
+            if j < ds_rows:
+                R = crypto.point_add(
+                    crypto.scalarmult(hp[i][j], ss[i][j]),
+                    table_mult(tables[j], c_old),
+                )
+                hasher.update(crypto.encodepoint(R))
+
+        c_old = crypto.sc_reduce32(crypto.decodeint(hasher.digest()))
+    return not crypto.sc_isnonzero(crypto.sc_sub(c_old, cc))
+
+
+class MlsagBatchVerifier(object):
+    """
+    MLSAG batch verification context.
+    Add signatures with add_simple() / add_full(), then verify() all at once.
+    Signatures are byte encoded, with key images II set (expand_transaction).
+    Prepared keys and tables are kept for the next batches.
+    """
+
+    def __init__(self, executor=None, chunk_size=128):
+        self.executor = executor  # None = loop default executor
+        self.chunk_size = chunk_size
+        self.items = []
+        self.keys = {}  # encoded key -> (point, H_p)
+        self.tables = {}  # encoded key image -> table
+
+    def add_simple(self, message, mg, pubs, pseudo_out):
+        """
+        Simple RCT MLSAG, c.f. mlsag2.ver_rct_mg_simple
+        :param message:
+        :param mg:
+        :param pubs: vector of CtKeys, encoded
+        :param pseudo_out: encoded
+        :return: index of the result
+        """
+        if len(pubs) == 0:
+            raise ValueError("Empty pubs")
+        self.items.append((message, mg, [[x] for x in pubs], [pseudo_out], []))
+        return len(self.items) - 1
+
+    def add_full(self, message, mg, pubs, out_pk, fee):
+        """
+        Full RCT MLSAG, c.f. mlsag2.ver_rct_mg
+        :param message:
+        :param mg:
+        :param pubs: matrix of CtKeys, encoded, pubs[i][j] ring column i, input j
+        :param out_pk: vector of CtKeys, encoded
+        :param fee:
+        :return: index of the result
+        """
+        if len(pubs) == 0 or len(pubs[0]) == 0:
+            raise ValueError("Empty pubs")
+        if any(len(x) != len(pubs[0]) for x in pubs):
+            raise ValueError("pubs is not rectangular")
+        out_masks = [x.mask for x in out_pk]
+        self.items.append((message, mg, pubs, out_masks, [fee]))
+        return len(self.items) - 1
+
+    def _key(self, key):
+        res = self.keys.get(bytes(key))
+        if res is None:
+            raise ValueError("Invalid key")
+        return res
+
+    def _ring_matrix(self, pubs, minus, fee):
+        """
+        Key matrix with the commitment row: \\sum_j C_ij - \\sum minus - fee * H
+        """
+        pk = []
+        hp = []
+        for col in pubs:
+            row = [self._key(x.dest)[0] for x in col]
+            hp.append([self._key(x.dest)[1] for x in col])
+            csum = crypto.identity()
+            for x in col:
+                csum = crypto.point_add(csum, self._key(x.mask)[0])
+            for x in minus:
+                csum = crypto.point_sub(csum, self._key(x)[0])
+            if fee:
+                csum = crypto.point_sub(csum, crypto.scalarmult_h(fee[0]))
+            pk.append(row + [csum])
+        return pk, hp
+
+    async def _run_chunks(self, fnc, items):
+        loop = asyncio.get_event_loop()
+        chunks = [
+            items[i : i + self.chunk_size]
+            for i in range(0, len(items), self.chunk_size)
+        ]
+        res = await asyncio.gather(
+            *[loop.run_in_executor(self.executor, fnc, x) for x in chunks]
+        )
+        return [x for chunk in res for x in chunk]
+
+    async def prepare(self):
+        """
+        Deduplicated ring members and key image tables, computed in parallel
+        :return:
+        """
+        keys = {}
+        images = set()
+        for _, mg, pubs, minus, fee in self.items:
+            try:
+                item_keys = {}
+                for col in pubs:
+                    for x in col:
+                        item_keys[bytes(x.dest)] = True
+                        item_keys.setdefault(bytes(x.mask), False)
+                for x in minus:
+                    item_keys.setdefault(bytes(x), False)
+                item_images = [bytes(x) for x in mg.II]
+            except Exception:
+                continue  # malformed item, fails in verify()
+
+            for key, hp in item_keys.items():
+                keys[key] = keys.get(key, False) or hp
+            images.update(item_images)
+
+        keys = [
+            (key, hp)
+            for key, hp in keys.items()
+            if key not in self.keys
+            or (hp and self.keys[key] is not None and self.keys[key][1] is None)
+        ]
+        images = [x for x in images if x not in self.tables]
+        res_keys, res_tables = await asyncio.gather(
+            self._run_chunks(_prep_keys, keys),
+            self._run_chunks(_prep_tables, images),
+        )
+        self.keys.update(zip([x[0] for x in keys], res_keys))
+        self.tables.update(zip(images, res_tables))
+
+    def _ver_args(self, message, mg, pubs, minus, fee):
+        """
+        Arguments of _ver_chain, checks the signature shape, c.f. ver_mlsag_assert
+        """
+        pk, hp = self._ring_matrix(pubs, minus, fee)
+        ds_rows = len(pubs[0])
+        mlsag2.ver_mlsag_assert(pk, mg, ds_rows)
+
+        tables = [self.tables.get(bytes(x)) for x in mg.II]
+        if any(x is None for x in tables):
+            raise ValueError("Invalid key image")
+        ss = [[crypto.decodeint(x) for x in col] for col in mg.ss]
+        return message, pk, hp, tables, ss, crypto.decodeint(mg.cc), ds_rows
+
+    async def verify(self):
+        """
+        Verifies all added signatures, the batch is then cleared.
+        Malformed signatures are reported as failed.
+        :return: list of results, in the order of addition
+        """
+        await self.prepare()
+        items, self.items = self.items, []
+        loop = asyncio.get_event_loop()
+
+        tasks = []
+        for item in items:
+            try:
+                args = self._ver_args(*item)
+            except Exception:
+                tasks.append(asyncio.sleep(0, result=False))
+                continue
+            tasks.append(loop.run_in_executor(self.executor, _ver_chain, *args))
+
+        res = await asyncio.gather(*tasks, return_exceptions=True)
+        return [x is True for x in res]
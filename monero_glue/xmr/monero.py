@@ -360,10 +360,10 @@ def ecdh_decode_rv(rv, derivation, i):
     :return:
     """
     scalar = crypto.derivation_to_scalar(derivation, i)
-    if rv.type in [xmrtypes.RctType.Simple, xmrtypes.RctType.SimpleBulletproof]:
+    if is_rct_simple(rv.type):
         return ecdh_decode_simple(rv, scalar, i)
 
-    elif rv.type in [xmrtypes.RctType.Full, xmrtypes.RctType.FullBulletproof]:
+    elif rv.type == xmrtypes.RctType.Full:
         return ecdh_decode_simple(rv, scalar, i)
 
     else:
@@ -416,23 +416,47 @@ def expand_transaction(tx):
     :return:
     """
     rv = tx.rct_signatures
-    if rv.type in [xmrtypes.RctType.Full, xmrtypes.RctType.FullBulletproof]:
+    if rv.type == xmrtypes.RctType.Full:
         rv.p.MGs[0].II = [None] * len(tx.vin)
         for n in range(len(tx.vin)):
             rv.p.MGs[0].II[n] = tx.vin[n].k_image
 
-    elif rv.type in [xmrtypes.RctType.Simple, xmrtypes.RctType.SimpleBulletproof]:
+    elif is_rct_simple(rv.type):
         if len(rv.p.MGs) != len(tx.vin):
             raise ValueError("Bad MGs size")
         for n in range(len(tx.vin)):
             rv.p.MGs[n].II = [tx.vin[n].k_image]
 
+        if is_rct_bulletproof(rv.type):
+            expand_bulletproofs(rv)
+
     else:
         raise ValueError("Unsupported rct tx type %s" % rv.type)
 
     return tx
 
 
+def expand_bulletproofs(rv):
+    """
+    Bulletproof commitments V are not serialized, recomputes them from outPk.
+    Either one proof per output or one aggregated proof for all outputs.
+
+    :param rv:
+    :return:
+    """
+    from monero_glue.xmr import bulletproof
+
+    Vs = [bulletproof.commitment_to_v(x.mask) for x in rv.outPk]
+    if len(rv.p.bulletproofs) == len(Vs):
+        for proof, V in zip(rv.p.bulletproofs, Vs):
+            proof.V = [V]
+    elif len(rv.p.bulletproofs) == 1:
+        rv.p.bulletproofs[0].V = Vs
+    else:
+        raise ValueError("Bulletproofs do not match outputs")
+    return rv
+
+
 def compute_subaddresses(creds, account, indices, subaddresses=None):
     """
     Computes subaddress public spend key for receiving transactions.
@@ -459,26 +483,28 @@ def compute_subaddresses(creds, account, indices, subaddresses=None):
     return subaddresses
 
 
-async def get_tx_pub_key_from_received_outs(td):
+async def get_tx_pub_key_from_received_outs(td, extra_idx=None):
     """
     Extracts tx pub key from extras.
     Handles previous bug in Monero.
 
     :param td:
     :type td: xmrtypes.TransferDetails
+    :param extra_idx: scanned extra of the td.m_tx, scanned if None
+    :type extra_idx: TxExtraIndex
     :return:
     """
-    extras = await parse_extra_fields(list(td.m_tx.extra))
-    tx_pub = find_tx_extra_field_by_type(extras, xmrtypes.TxExtraPubKey, 0)
+    if extra_idx is None:
+        extra_idx = scan_extra_fields(td.m_tx.extra)
+    tx_pub = extra_idx.pub_key(0)
 
     # Due to a previous bug, there might be more than one tx pubkey in extra, one being
     # the result of a previously discarded signature.
     # For speed, since scanning for outputs is a slow process, we check whether extra
     # contains more than one pubkey. If not, the first one is returned. If yes, they're
     # checked for whether they yield at least one output
-    second_pub = find_tx_extra_field_by_type(extras, xmrtypes.TxExtraPubKey, 1)
-    if second_pub is None:
-        return tx_pub.pub_key
+    if len(extra_idx.pub_keys) <= 1:
+        return bytes(tx_pub) if tx_pub is not None else None
 
     # Workaround: resend all your funds to the wallet in a different transaction.
     # Proper handling would require derivation -> need trezor roundtrips.
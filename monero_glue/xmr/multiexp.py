@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+#
+# Multi-exponentiation \sum_i s_i * P_i over the crypto backend,
+# bucket method of Pippenger, c.f. https://eprint.iacr.org/2012/549 section 4
+
+from monero_glue.xmr import crypto
+
+SCALAR_BITS = 253  # scalars are reduced mod l < 2^253
+STRAUS_LIMIT = 4  # below this size plain scalar multiplications are used
+
+
+def scalar_int(x):
+    """
+    Backend scalar -> python int
+    :param x:
+    :return:
+    """
+    return int.from_bytes(crypto.encodeint(x), "little")
+
+
+def window_size(n):
+    """
+    Pippenger window minimizing the number of point additions for n points
+    :param n:
+    :return:
+    """
+    best, best_cost = 1, None
+    for c in range(1, 17):
+        windows = (SCALAR_BITS + c - 1) // c
+        cost = windows * (n + (2 << c)) + windows * c
+        if best_cost is None or cost < best_cost:
+            best, best_cost = c, cost
+    return best
+
+
+def _add(P, Q):
+    return Q if P is None else (P if Q is None else crypto.point_add(P, Q))
+
+
+def multiexp(scalars, points):
+    """
+    Computes \\sum_i scalars[i] * points[i]
+    :param scalars: backend scalars
+    :param points: backend points
+    :return: backend point
+    """
+    if len(scalars) != len(points):
+        raise ValueError("Scalars vs points size mismatch")
+
+    if len(points) < STRAUS_LIMIT:
+        res = None
+        for s, P in zip(scalars, points):
+            res = _add(res, crypto.scalarmult(P, s))
+        return res if res is not None else crypto.identity()
+
+    return multiexp_int([scalar_int(x) for x in scalars], points)
+
+
+def multiexp_int(ints, points):
+    """
+    Pippenger multiexp with python int scalars in [0, 2^253)
+    :param ints:
+    :param points:
+    :return:
+    """
+    c = window_size(len(points))
+    mask = (1 << c) - 1
+    windows = (SCALAR_BITS + c - 1) // c
+
+    res = None
+    for w in range(windows - 1, -1, -1):
+        if res is not None:
+            for _ in range(c):
+                res = crypto.point_add(res, res)
+
+        shift = w * c
+        buckets = [None] * (mask + 1)
+        for k, P in zip(ints, points):
+            d = (k >> shift) & mask
+            if d:
+                buckets[d] = _add(buckets[d], P)
+
+        # \sum_d d * bucket_d by running sums from the top bucket
+        running, acc = None, None
+        for d in range(mask, 0, -1):
+            running = _add(running, buckets[d])
+            acc = _add(acc, running)
+        res = _add(res, acc)
+
+    return res if res is not None else crypto.identity()
+
+
+TABLE_WINDOW = 4
+
+
+def precomp_table(P, window=TABLE_WINDOW):
+    """
+    Fixed base table for a point multiplied by many scalars,
+    table[k][d - 1] = d * 2^(window * k) * P.
+    Multiplication by the table is then only additions, no doublings.
+
+    :param P:
+    :param window:
+    :return:
+    """
+    table = []
+    base = P
+    for _ in range((SCALAR_BITS + window - 1) // window):
+        row = [base]
+        for _ in range(2, 1 << window):
+            row.append(crypto.point_add(row[-1], base))
+        table.append(row)
+        base = crypto.point_add(row[-1], base)
+    return table
+
+
+def table_mult(table, s):
+    """
+    s * P with the precomputed table of P
+    :param table:
+    :param s: backend scalar
+    :return:
+    """
+    window = len(table[0]).bit_length()
+    mask = (1 << window) - 1
+    k = scalar_int(s)
+    res = None
+    for row in table:
+        d = k & mask
+        if d:
+            res = _add(res, row[d - 1])
+        k >>= window
+    return res if res is not None else crypto.identity()
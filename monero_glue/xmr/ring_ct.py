@@ -43,6 +43,7 @@ def prove_range(
     decode=False,
     byte_enc=False,
     rsig=None,
+    bulletproof=False,
 ):
     """
     Range proof generator.
@@ -55,10 +56,16 @@ def prove_range(
     :param mem_opt: memory optimized
     :param backend_impl: backend implementation, if available
     :param decode: decodes output
-    :param byte_enc: decodes output
-    :param rsig: buffer for rsig
+    :param byte_enc: returns flat byte buffer instead of RangeSigView
+    :param rsig: buffer for the flat rsig, byte_enc only
+    :param bulletproof: Bulletproof instead of Borromean, returns xmrtypes.Bulletproof
     :return:
     """
+    if bulletproof:
+        mask = last_mask if last_mask is not None else crypto.random_scalar()
+        C, masks, proof = prove_range_bulletproof([amount], [mask])
+        return C[0], masks[0], proof
+
     if use_asnl and mem_opt:
         raise ValueError("ASNL not in memory optimized variant")
     if backend_impl and use_asnl:
@@ -69,11 +76,10 @@ def prove_range(
             raise ValueError("Conflicting options byte_enc, decode")
 
         C, a, R = crypto.prove_range(amount, last_mask)[:3]  # backend returns encoded
-        if not byte_enc:
-            R = monero.inflate_rsig(R)
         if decode:
-            R = monero.inflate_rsig(R)
-            R = monero.recode_rangesig(R, encode=False)
+            R = monero.recode_rangesig(monero.RangeSigView(R), encode=False, copy=True)
+        elif not byte_enc:
+            R = monero.RangeSigView(R)
 
         return C, a, R
 
@@ -87,13 +93,52 @@ def prove_range(
     C, a, R = ret[:3]
     if byte_enc:
         R = monero.recode_rangesig(R, encode=True)
-        R = monero.flatten_rsig(R)
+        R = monero.flatten_rsig(R, rsig)
     elif not decode:
         R = monero.recode_rangesig(R, encode=True)
 
     return C, a, R
 
 
+def prove_range_enc(amount, last_mask=None, bulletproof=False):
+    """
+    Flat range proof with byte encoded arguments and results,
+    picklable for the process pool workers.
+
+    :param amount:
+    :param last_mask: encoded mask of the proof, random if None
+    :param bulletproof:
+    :return: encoded C, encoded mask, flat rsig or xmrtypes.Bulletproof
+    """
+    if last_mask is not None:
+        last_mask = crypto.decodeint(last_mask)
+    C, a, R = prove_range(
+        amount, last_mask, backend_impl=True, byte_enc=True, bulletproof=bulletproof
+    )
+    return crypto.encodepoint(C), crypto.encodeint(a), R if bulletproof else bytes(R)
+
+
+def prove_range_bulletproof(amounts, masks=None):
+    """
+    Aggregated Bulletproof over up to 16 amounts.
+
+    :param amounts:
+    :param masks: commitment masks, random if None
+    :return: commitments C_i = masks_i * G + amounts_i * H, masks, xmrtypes.Bulletproof
+    """
+    from monero_glue.xmr import bulletproof as bp
+
+    if not crypto.get_backend().has_rangeproof_bulletproof():
+        raise ValueError("Bulletproof not supported by the EC backend")
+
+    if masks is None:
+        masks = [crypto.random_scalar() for _ in amounts]
+
+    proof = bp.prove(amounts, masks)
+    C = [crypto.scalarmult(crypto.decodepoint(V), crypto.sc_init(8)) for V in proof.V]
+    return C, masks, proof
+
+
 def prove_range_orig(amount, last_mask=None, use_asnl=False):
     """
     Gives C, and mask such that \sumCi = C
@@ -242,6 +287,9 @@ def ver_range(C=None, rsig=None, use_asnl=False, decode=True):
     :param decode: decodes encoded range proof
     :return:
     """
+    if isinstance(rsig, xmrtypes.Bulletproof):
+        return ver_bulletproof(C, rsig)
+
     n = ATOMS
     CiH = [None] * n
     C_tmp = crypto.identity()
@@ -266,6 +314,29 @@ def ver_range(C=None, rsig=None, use_asnl=False, decode=True):
         )
 
 
+def ver_bulletproof(C=None, proof=None):
+    """
+    Verifies the Bulletproof, C are the commitments in the proof (8 * V) if given.
+    :param C: commitment or list of commitments
+    :param proof: xmrtypes.Bulletproof with V, or list of proofs verified in a batch
+    :return:
+    """
+    from monero_glue.xmr import bulletproof as bp
+
+    proofs = proof if isinstance(proof, list) else [proof]
+    if C is not None:
+        C = C if isinstance(C, list) else [C]
+        Vs = [V for p in proofs for V in p.V]
+        if len(C) != len(Vs):
+            return 0
+        for Ci, V in zip(C, Vs):
+            V8 = crypto.scalarmult(crypto.decodepoint(V), crypto.sc_init(8))
+            if not crypto.point_eq(Ci, V8):
+                return 0
+
+    return bp.verify(proofs)
+
+
 # Ring-ct MG sigs
 # Prove:
 #   c.f. http:#eprint.iacr.org/2015/1098 section 4. definition 10.
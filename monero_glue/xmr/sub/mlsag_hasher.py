@@ -3,6 +3,8 @@ from monero_serialize.xmrtypes import RctType, ECKey, EcdhInfo, KeyV, RctSigBase
 
 from monero_glue.xmr import crypto
 from monero_glue.xmr.sub.keccak_hasher import HashWrapper
+from monero_glue.xmr.sub.recode_ext import RangeSigView
+from monero_glue.xmr.sub.tsx_helper import is_rct_bulletproof
 
 
 class PreMlsagHasher(object):
@@ -103,6 +105,10 @@ class PreMlsagHasher(object):
             self.rsig_hasher.update(p)
             return
 
+        if isinstance(p, RangeSigView):
+            self.rsig_hasher.update(p.buff)
+            return
+
         if bulletproof:
             self.rsig_hasher.update(p.A)
             self.rsig_hasher.update(p.S)
@@ -152,8 +158,7 @@ async def get_pre_mlsag_hash(rv):
     kc_master = HashWrapper(crypto.get_keccak())
     kc_master.update(rv.message)
 
-    is_simple = rv.type in [RctType.Simple, RctType.SimpleBulletproof]
-    inputs = len(rv.pseudoOuts) if is_simple else 0
+    inputs = len(rv.pseudoOuts) if rv.type == RctType.Simple else 0
     outputs = len(rv.ecdhInfo)
 
     kwriter = get_keccak_writer()
@@ -163,7 +168,7 @@ async def get_pre_mlsag_hash(rv):
     kc_master.update(c_hash)
 
     kc = crypto.get_keccak()
-    if rv.type in [RctType.FullBulletproof, RctType.SimpleBulletproof]:
+    if is_rct_bulletproof(rv.type):
         for p in rv.p.bulletproofs:
             kc.update(p.A)
             kc.update(p.S)
@@ -181,6 +186,10 @@ async def get_pre_mlsag_hash(rv):
 
     else:
         for r in rv.p.rangeSigs:
+            if isinstance(r, RangeSigView):
+                kc.update(r.buff)
+                continue
+
             for i in range(64):
                 kc.update(r.asig.s0[i])
             for i in range(64):
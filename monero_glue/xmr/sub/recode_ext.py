@@ -32,44 +32,114 @@ def recode_rangesig(rsig, encode=True, copy=False):
     return nrsig
 
 
-def flatten_rsig(rsig):
+RSIG_KEY = 32
+RSIG_ATOMS = 64
+RSIG_SIZE = RSIG_KEY * (3 * RSIG_ATOMS + 1)
+
+_RSIG_S0 = 0
+_RSIG_S1 = _RSIG_S0 + RSIG_KEY * RSIG_ATOMS
+_RSIG_EE = _RSIG_S1 + RSIG_KEY * RSIG_ATOMS
+_RSIG_CI = _RSIG_EE + RSIG_KEY
+
+
+class KeyVecView(object):
+    """
+    Read-only vector of 32 B keys over a memoryview, items are zero-copy slices
+    """
+
+    __slots__ = ("buff",)
+
+    def __init__(self, buff):
+        self.buff = buff
+
+    def __len__(self):
+        return len(self.buff) // RSIG_KEY
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("key index out of range")
+        return self.buff[idx * RSIG_KEY : (idx + 1) * RSIG_KEY]
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self.buff[idx * RSIG_KEY : (idx + 1) * RSIG_KEY]
+
+
+class RangeSigView(object):
+    """
+    Byte-encoded Borromean range signature in one flat buffer,
+    layout s0[64] || s1[64] || ee || Ci[64] as returned by the token.
+
+    Has the RangeSig / BoroSig field interface (rsig.asig.s0[i], rsig.Ci[i]),
+    so it is accepted by the serialization and verification as is.
     """
-    Rsig -> byte array
+
+    __slots__ = ("buff", "s0", "s1", "ee", "Ci")
+
+    def __init__(self, buff=None):
+        buff = memoryview(buff if buff is not None else bytearray(RSIG_SIZE))
+        if len(buff) != RSIG_SIZE:
+            raise ValueError("Invalid rsig size: %s" % len(buff))
+
+        self.buff = buff
+        self.s0 = KeyVecView(buff[_RSIG_S0:_RSIG_S1])
+        self.s1 = KeyVecView(buff[_RSIG_S1:_RSIG_EE])
+        self.ee = buff[_RSIG_EE:_RSIG_CI]
+        self.Ci = KeyVecView(buff[_RSIG_CI:])
+
+    @property
+    def asig(self):
+        return self
+
+    def __bytes__(self):
+        return bytes(self.buff)
+
+    def __reduce__(self):
+        return RangeSigView, (bytes(self.buff),)
+
+
+def flatten_rsig(rsig, buff=None):
+    """
+    Byte encoded rsig -> flat buffer
     :param rsig:
+    :param buff: destination buffer, allocated if None
     :return:
     """
-    res = b""
+    if buff is None:
+        if isinstance(rsig, RangeSigView):
+            return rsig.buff
+        buff = bytearray(RSIG_SIZE)
 
-    for i in range(len(rsig.asig.s0)):
-        res += bytes(rsig.asig.s0[i])
-    for i in range(len(rsig.asig.s1)):
-        res += bytes(rsig.asig.s1[i])
-    res += bytes(rsig.asig.ee)
-    for i in range(len(rsig.Ci)):
-        res += bytes(rsig.Ci[i])
-    return res
+    if isinstance(rsig, RangeSigView):
+        buff[:RSIG_SIZE] = rsig.buff
+        return buff
+
+    offset = 0
+    for keys in (rsig.asig.s0, rsig.asig.s1, (rsig.asig.ee,), rsig.Ci):
+        for key in keys:
+            buff[offset : offset + RSIG_KEY] = key
+            offset += RSIG_KEY
+    return buff
 
 
 def inflate_rsig(buff, rsig=None):
     """
-    Rsig binary repr -> byte encoded repr
+    Rsig binary repr -> byte encoded repr.
+    Prefer RangeSigView, which does not copy the keys.
     :param rsig:
     :return:
     """
+    view = RangeSigView(buff)
     if rsig is None:
         rsig = xmrtypes.RangeSig()
-        rsig.Ci = [None] * 64
         rsig.asig = xmrtypes.BoroSig()
-        rsig.asig.s0 = [None] * 64
-        rsig.asig.s1 = [None] * 64
-
-    for i in range(64):
-        rsig.asig.s0[i], buff = buff[:32], buff[32:]
-    for i in range(64):
-        rsig.asig.s1[i], buff = buff[:32], buff[32:]
-    rsig.asig.ee, buff = buff[:32], buff[32:]
-    for i in range(64):
-        rsig.Ci[i], buff = buff[:32], buff[32:]
+
+    rsig.asig.s0 = [bytes(x) for x in view.s0]
+    rsig.asig.s1 = [bytes(x) for x in view.s1]
+    rsig.asig.ee = bytes(view.ee)
+    rsig.Ci = [bytes(x) for x in view.Ci]
     return rsig
 
 
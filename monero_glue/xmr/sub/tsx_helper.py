@@ -6,6 +6,8 @@ from monero_serialize.xmrtypes import (
     TxExtraField,
     AccountPublicAddress,
     TxExtraAdditionalPubKeys,
+    TxExtraPadding,
+    RctType,
 )
 
 from monero_glue.xmr import crypto
@@ -13,6 +15,25 @@ from monero_serialize import xmrserialize
 from monero_serialize.core.readwriter import MemoryReaderWriter
 
 
+def is_rct_simple(rct_type):
+    """
+    True for simple RingCT, MLSAG per input and pseudo outputs.
+    Bulletproof RingCT types are simple.
+    :param rct_type:
+    :return:
+    """
+    return rct_type in (RctType.Simple, RctType.Bulletproof, RctType.Bulletproof2)
+
+
+def is_rct_bulletproof(rct_type):
+    """
+    True if range proofs are Bulletproofs, pseudo outputs are then prunable
+    :param rct_type:
+    :return:
+    """
+    return rct_type in (RctType.Bulletproof, RctType.Bulletproof2)
+
+
 async def parse_extra_fields(extra_buff):
     """
     Parses extra buffer to the extra fields vector
@@ -44,6 +65,157 @@ def find_tx_extra_field_by_type(extra_fields, msg, idx=0):
     return None
 
 
+class TxExtraIndex(object):
+    """
+    Offsets of the tx extra fields, produced by scan_extra_fields() in a single pass.
+    Field values are memoryview slices of the scanned buffer, no copies are made.
+    """
+
+    __slots__ = ["buff", "pub_keys", "additional_pub_keys", "nonce"]
+
+    def __init__(self, buff=None):
+        self.buff = buff  # type: memoryview
+        self.pub_keys = []  # offsets of TxExtraPubKey keys
+        self.additional_pub_keys = None  # (offset, count) of the first additional keys
+        self.nonce = None  # (offset, length) of the first nonce
+
+    def pub_key(self, idx=0):
+        """
+        Returns idx-th tx pub key or None
+        :param idx:
+        :return:
+        """
+        if idx >= len(self.pub_keys):
+            return None
+        off = self.pub_keys[idx]
+        return self.buff[off : off + 32]
+
+    def additional_keys(self):
+        """
+        Returns list of additional tx pub keys or None if not present
+        :return:
+        """
+        if self.additional_pub_keys is None:
+            return None
+        off, cnt = self.additional_pub_keys
+        return [self.buff[off + 32 * i : off + 32 * (i + 1)] for i in range(cnt)]
+
+    def nonce_data(self):
+        """
+        Returns the extra nonce or None
+        :return:
+        """
+        if self.nonce is None:
+            return None
+        off, ln = self.nonce
+        return self.buff[off : off + ln]
+
+    def payment_id(self):
+        """
+        Returns unencrypted payment id from the nonce or None
+        :return:
+        """
+        nonce = self.nonce_data()
+        if nonce is None or not has_payment_id(nonce):
+            return None
+        return nonce[1:]
+
+    def encrypted_payment_id(self):
+        """
+        Returns encrypted payment id from the nonce or None
+        :return:
+        """
+        nonce = self.nonce_data()
+        if nonce is None or not has_encrypted_payment_id(nonce):
+            return None
+        return nonce[1:]
+
+
+def _scan_uvarint(buff, off):
+    """
+    Reads unsigned varint from the buffer
+    :param buff:
+    :param off:
+    :return: value, new offset
+    """
+    res = 0
+    shift = 0
+    while True:
+        if off >= len(buff):
+            raise ValueError("Extra truncated")
+        b = buff[off]
+        off += 1
+        res |= (b & 0x7F) << shift
+        shift += 7
+        if b < 0x80:
+            return res, off
+
+
+def scan_extra_fields(extra_buff):
+    """
+    Walks tag/length structure of the extra buffer once and records field offsets.
+    Lightweight alternative to parse_extra_fields(), fields are not deserialized.
+
+    :param extra_buff:
+    :return:
+    :rtype: TxExtraIndex
+    """
+    if not isinstance(extra_buff, (bytes, bytearray, memoryview)):
+        extra_buff = bytes(extra_buff)
+    buff = memoryview(extra_buff)
+    res = TxExtraIndex(buff)
+    ln = len(buff)
+    off = 0
+
+    while off < ln:
+        tag = buff[off]
+        off += 1
+
+        if tag == 0x00:  # padding till the end
+            if ln - off + 1 > TxExtraPadding.TX_EXTRA_PADDING_MAX_COUNT:
+                raise ValueError("Padding too big")
+            if any(buff[off:]):
+                raise ValueError("Padding error")
+            break
+
+        elif tag == 0x01:  # TxExtraPubKey
+            if off + 32 > ln:
+                raise ValueError("Extra truncated")
+            res.pub_keys.append(off)
+            off += 32
+
+        elif tag == 0x02:  # TxExtraNonce
+            nlen, off = _scan_uvarint(buff, off)
+            if off + nlen > ln:
+                raise ValueError("Extra truncated")
+            if res.nonce is None:
+                res.nonce = (off, nlen)
+            off += nlen
+
+        elif tag == 0x03:  # TxExtraMergeMiningTag
+            flen, off = _scan_uvarint(buff, off)
+            off += flen
+
+        elif tag == 0x04:  # TxExtraAdditionalPubKeys
+            cnt, off = _scan_uvarint(buff, off)
+            if off + 32 * cnt > ln:
+                raise ValueError("Extra truncated")
+            if res.additional_pub_keys is None:
+                res.additional_pub_keys = (off, cnt)
+            off += 32 * cnt
+
+        elif tag == 0xDE:  # TxExtraMysteriousMinergate
+            blen, off = _scan_uvarint(buff, off)
+            off += blen
+
+        else:
+            raise ValueError("Unknown extra variant tag: %x" % tag)
+
+    if off > ln:
+        raise ValueError("Extra truncated")
+    return res
+
+
 def has_encrypted_payment_id(extra_nonce):
     """
     Returns true if encrypted payment id is present
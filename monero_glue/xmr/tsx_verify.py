@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+#
+# Whole transaction verification: range proofs, MLSAGs, commitment balance.
+# Proofs are checked concurrently in the executor (e.g., process pool),
+# workers get byte encoded arguments only so they are picklable.
+
+import asyncio
+import copy
+import logging
+import time
+
+from monero_glue.xmr import crypto, mlsag2, monero, ring_ct
+from monero_glue.xmr.multiexp import multiexp
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentResult(object):
+    """
+    Result of one verified component, e.g., range proof of the output idx
+    """
+
+    __slots__ = ["name", "idx", "ok", "elapsed", "error"]
+
+    def __init__(self, name, idx=None, ok=False, elapsed=0.0, error=None):
+        self.name = name
+        self.idx = idx
+        self.ok = ok
+        self.elapsed = elapsed
+        self.error = error
+
+    def __repr__(self):
+        return "%s%s: %s, %.4f s%s" % (
+            self.name,
+            "[%s]" % self.idx if self.idx is not None else "",
+            "ok" if self.ok else "FAILED",
+            self.elapsed,
+            ", %s" % self.error if self.error else "",
+        )
+
+
+class TransactionReport(object):
+    """
+    Transaction verification report
+    """
+
+    __slots__ = ["ok", "prefix_hash", "mlsag_hash", "results", "elapsed"]
+
+    def __init__(self):
+        self.ok = False
+        self.prefix_hash = None
+        self.mlsag_hash = None
+        self.results = []  # type: list[ComponentResult]
+        self.elapsed = 0.0
+
+    def failed(self):
+        return [x for x in self.results if not x.ok]
+
+    def component(self, name):
+        return [x for x in self.results if x.name == name]
+
+    def __repr__(self):
+        return "TransactionReport(ok=%s, %.4f s, %s)" % (
+            self.ok,
+            self.elapsed,
+            self.results,
+        )
+
+
+def _timed(name, idx, fnc, *args):
+    """
+    Runs the check, exceptions are failed checks
+    :return: ComponentResult
+    """
+    time_start = time.perf_counter()
+    res = ComponentResult(name, idx)
+    try:
+        res.ok = bool(fnc(*args))
+    except Exception as e:
+        logger.debug("Verification of %s %s failed: %s" % (name, idx, e))
+        res.error = str(e)
+    res.elapsed = time.perf_counter() - time_start
+    return res
+
+
+def _ver_rsig(C, rsig):
+    if isinstance(rsig, (bytes, bytearray)):
+        rsig = monero.RangeSigView(rsig)
+    return ring_ct.ver_range(crypto.decodepoint(C), rsig)
+
+
+def _ver_bulletproofs(proofs):
+    return ring_ct.ver_bulletproof(None, proofs)
+
+
+def _ver_mg_simple(message, mg, ring, pseudo_out):
+    mg = monero.recode_msg([copy.deepcopy(mg)], encode=False)[0]
+    return mlsag2.ver_rct_mg_simple(message, mg, ring, crypto.decodepoint(pseudo_out))
+
+
+def _ver_mg_full(message, mg, rings, out_pk, fee):
+    mg = monero.recode_msg([copy.deepcopy(mg)], encode=False)[0]
+    pubs = [[rings[j][i] for j in range(len(rings))] for i in range(len(rings[0]))]
+    return mlsag2.ver_rct_mg(mg, pubs, out_pk, crypto.scalarmult_h(fee), message)
+
+
+def _ver_balance(pseudo_outs, out_pk, fee):
+    """
+    \\sum pseudo_outs - \\sum out_pk - fee * H == 0, one multiexp
+    """
+    one = crypto.sc_init(1)
+    minus_one = crypto.sc_sub(crypto.sc_0(), one)
+    scalars = [one] * len(pseudo_outs) + [minus_one] * len(out_pk)
+    scalars.append(crypto.sc_sub(crypto.sc_0(), crypto.sc_init(fee)))
+    points = [crypto.decodepoint(x) for x in pseudo_outs]
+    points += [crypto.decodepoint(x.mask) for x in out_pk]
+    points.append(crypto.gen_H())
+    return crypto.point_eq(multiexp(scalars, points), crypto.identity())
+
+
+async def verify_transaction(tx, ring_members, executor=None):
+    """
+    Verifies the signed transaction: range proofs, MLSAG signatures and
+    commitment balance. Prefix hash and pre-MLSAG hash are computed once,
+    all proofs are then verified concurrently in the executor.
+
+    :param tx: transaction, byte encoded as deserialized
+    :type tx: xmrtypes.Transaction
+    :param ring_members: list of rings, ring of the input i is the list of
+        xmrtypes.CtKey (dest, mask) in the MLSAG column order
+    :param executor: None = loop default executor
+    :return:
+    :rtype: TransactionReport
+    """
+    time_start = time.perf_counter()
+    rv = tx.rct_signatures
+    if len(ring_members) != len(tx.vin):
+        raise ValueError("Ring members do not match the inputs")
+
+    monero.expand_transaction(tx)
+    report = TransactionReport()
+    report.prefix_hash = await monero.get_transaction_prefix_hash(tx)
+    rv.message = report.prefix_hash
+    report.mlsag_hash = await monero.get_pre_mlsag_hash(rv)
+
+    loop = asyncio.get_event_loop()
+
+    def submit(name, idx, fnc, *args):
+        return loop.run_in_executor(executor, _timed, name, idx, fnc, *args)
+
+    tasks = []
+    if monero.is_rct_bulletproof(rv.type):
+        tasks.append(
+            submit("bulletproofs", None, _ver_bulletproofs, rv.p.bulletproofs)
+        )
+    else:
+        for idx, rsig in enumerate(rv.p.rangeSigs):
+            tasks.append(submit("rsig", idx, _ver_rsig, rv.outPk[idx].mask, rsig))
+
+    if monero.is_rct_simple(rv.type):
+        pseudo_outs = (
+            rv.p.pseudoOuts if monero.is_rct_bulletproof(rv.type) else rv.pseudoOuts
+        )
+        if len(pseudo_outs) != len(tx.vin) or len(rv.p.MGs) != len(tx.vin):
+            raise ValueError("Pseudo outs or MGs do not match the inputs")
+
+        for idx, mg in enumerate(rv.p.MGs):
+            tasks.append(
+                submit(
+                    "mlsag",
+                    idx,
+                    _ver_mg_simple,
+                    report.mlsag_hash,
+                    mg,
+                    ring_members[idx],
+                    pseudo_outs[idx],
+                )
+            )
+        tasks.append(
+            submit("balance", None, _ver_balance, pseudo_outs, rv.outPk, rv.txnFee)
+        )
+
+    else:
+        # Full RCT, the balance is part of the MLSAG
+        tasks.append(
+            submit(
+                "mlsag",
+                0,
+                _ver_mg_full,
+                report.mlsag_hash,
+                rv.p.MGs[0],
+                ring_members,
+                rv.outPk,
+                rv.txnFee,
+            )
+        )
+
+    report.results = list(await asyncio.gather(*tasks))
+    report.ok = all(x.ok for x in report.results)
+    report.elapsed = time.perf_counter() - time_start
+    return report
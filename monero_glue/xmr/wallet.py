@@ -3,10 +3,12 @@
 # Author: Dusan Klinec, ph4r05, 2018
 
 import binascii
+import io
 import json
+import mmap
 import re
 
-from monero_glue.xmr import common, crypto, monero
+from monero_glue.xmr import common, crypto, key_image, monero
 from monero_glue.xmr.enc import chacha
 from monero_serialize import xmrboost, xmrjson, xmrrpc, xmrserialize, xmrtypes
 
@@ -171,6 +173,66 @@ async def gen_keys_file(password, wkeyfile):
     return bytes(writer.get_buffer())
 
 
+def _check_file_header(data, prefix, version, msg):
+    """
+    Checks the magic prefix of the wallet file and the version
+    :param data:
+    :param prefix:
+    :param version:
+    :param msg:
+    :return:
+    """
+    magic_len = len(prefix)
+    magic = bytes(data[: magic_len - 1])
+    if len(data) < magic_len or magic != prefix[:-1]:
+        raise ValueError("Invalid file header")
+    if int(data[magic_len - 1]) != version:
+        raise ValueError(msg)
+    return magic_len
+
+
+async def load_unsigned_tx_stream(priv_key, buff, chunk_size=chacha.STREAM_CHUNK_SIZE):
+    """
+    Loads unsigned transaction from the encrypted buffer in the streaming manner.
+    Signature is verified over the buffer in chunks, the ciphertext is then
+    decrypted in chunks as the archive reader consumes it.
+
+    :param priv_key:
+    :param buff: bytes-like object, e.g., mmap of the file
+    :param chunk_size:
+    :return:
+    """
+    # All views of the buffer are released explicitly, even on error, as
+    # the traceback keeps them alive and the mmap cannot be closed otherwise
+    mv = memoryview(buff)
+    body = None
+    try:
+        magic_len = _check_file_header(
+            mv, UNSIGNED_TX_PREFIX, 4, "Unsigned transaction v4 is supported only"
+        )
+        body = mv[magic_len:]
+        reader = chacha.decrypt_xmr_stream(
+            priv_key, body, authenticated=True, chunk_size=chunk_size
+        )
+        try:
+            ar = xmrboost.Archive(reader, False)
+            msg = xmrtypes.UnsignedTxSet()
+            await ar.root()
+            await ar.message(msg)
+            return msg
+
+        except EOFError:
+            raise ValueError("Unsigned transaction truncated")
+
+        finally:
+            reader.close()
+
+    finally:
+        if body is not None:
+            body.release()
+        mv.release()
+
+
 async def load_unsigned_tx(priv_key, data):
     """
     Loads unsigned transaction from the encrypted file
@@ -178,25 +240,38 @@ async def load_unsigned_tx(priv_key, data):
     :param data:
     :return:
     """
-    magic_len = len(UNSIGNED_TX_PREFIX)
-    magic = data[: magic_len - 1]
-    version = int(data[magic_len - 1])
-    data = data[magic_len:]
+    return await load_unsigned_tx_stream(priv_key, data)
 
-    if magic != UNSIGNED_TX_PREFIX[:-1]:
-        raise ValueError("Invalid file header")
-    if version != 4:
-        raise ValueError("Unsigned transaction v4 is supported only")
 
-    tx_uns_ser = chacha.decrypt_xmr(priv_key, data, authenticated=True)
+async def load_unsigned_tx_file(priv_key, file):
+    """
+    Loads unsigned transaction from the file, mmaped so the file is not read at once
+    :param priv_key:
+    :param file:
+    :return:
+    """
+    with open(file, "rb") as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return await load_unsigned_tx_stream(priv_key, mm)
 
-    reader = xmrserialize.MemoryReaderWriter(bytearray(tx_uns_ser))
-    ar = xmrboost.Archive(reader, False)
 
-    msg = xmrtypes.UnsignedTxSet()
+async def dump_tx_stream(priv_key, prefix, msg, fh):
+    """
+    Serializes the message to the boost archive, encrypts and signs it in chunks,
+    writes the result to the file object.
+
+    :param priv_key:
+    :param prefix: file magic
+    :param msg:
+    :param fh:
+    :return:
+    """
+    fh.write(prefix)
+    writer = chacha.encrypt_xmr_stream(priv_key, fh, authenticated=True)
+    ar = xmrboost.Archive(writer, True)
     await ar.root()
     await ar.message(msg)
-    return msg
+    writer.close()
 
 
 async def dump_unsigned_tx(priv_key, unsigned_tx):
@@ -206,15 +281,9 @@ async def dump_unsigned_tx(priv_key, unsigned_tx):
     :param unsigned_tx:
     :return:
     """
-    writer = xmrserialize.MemoryReaderWriter()
-    ar = xmrboost.Archive(writer, True)
-    await ar.root()
-    await ar.message(unsigned_tx)
-
-    ciphertext = chacha.encrypt_xmr(
-        priv_key, bytes(writer.get_buffer()), authenticated=True
-    )
-    return UNSIGNED_TX_PREFIX + ciphertext
+    fh = io.BytesIO()
+    await dump_tx_stream(priv_key, UNSIGNED_TX_PREFIX, unsigned_tx, fh)
+    return fh.getvalue()
 
 
 async def dump_signed_tx(priv_key, signed_tx):
@@ -225,15 +294,21 @@ async def dump_signed_tx(priv_key, signed_tx):
     :param signed_tx:
     :return:
     """
-    writer = xmrserialize.MemoryReaderWriter()
-    ar = xmrboost.Archive(writer, True)
-    await ar.root()
-    await ar.message(signed_tx)
+    fh = io.BytesIO()
+    await dump_tx_stream(priv_key, SIGNED_TX_PREFIX, signed_tx, fh)
+    return fh.getvalue()
 
-    ciphertext = chacha.encrypt_xmr(
-        priv_key, bytes(writer.get_buffer()), authenticated=True
-    )
-    return SIGNED_TX_PREFIX + ciphertext
+
+async def dump_signed_tx_file(priv_key, signed_tx, file):
+    """
+    Dumps signed_tx directly to the file
+    :param priv_key:
+    :param signed_tx:
+    :param file:
+    :return:
+    """
+    with open(file, "wb+") as fh:
+        await dump_tx_stream(priv_key, SIGNED_TX_PREFIX, signed_tx, fh)
 
 
 def construct_pending_tsx(tx, cd):
@@ -272,23 +347,26 @@ def conv_disp_amount(amount):
     return amount / float(10 ** monero.DISPLAY_DECIMAL_POINT)
 
 
-async def load_exported_outputs(priv_key, data):
+def _decrypt_exported_outputs(priv_key, data):
     """
-    Loads exported outputs file
+    Checks the exported outputs file header, decrypts the payload
+    :param priv_key:
     :param data:
     :return:
     """
-    magic_len = len(OUTPUTS_PREFIX)
-    magic = data[: magic_len - 1]
-    version = int(data[magic_len - 1])
-    data = data[magic_len:]
+    magic_len = _check_file_header(
+        data, OUTPUTS_PREFIX, 3, "Exported outputs v3 is supported only"
+    )
+    return chacha.decrypt_xmr(priv_key, data[magic_len:], authenticated=True)
 
-    if magic != OUTPUTS_PREFIX[:-1]:
-        raise ValueError("Invalid file header")
-    if version != 3:
-        raise ValueError("Exported outputs v3 is supported only")
 
-    data_dec = chacha.decrypt_xmr(priv_key, data, authenticated=True)
+async def load_exported_outputs(priv_key, data):
+    """
+    Loads exported outputs file
+    :param data:
+    :return:
+    """
+    data_dec = _decrypt_exported_outputs(priv_key, data)
 
     spend_pub = data_dec[:32]
     view_pub = data_dec[32:64]
@@ -303,3 +381,92 @@ async def load_exported_outputs(priv_key, data):
     return OutputsDump(
         m_spend_public_key=spend_pub, m_view_public_key=view_pub, tds=exps
     )
+
+
+class ExportedOutputsReader(object):
+    """
+    Incremental reader of the decrypted exported outputs archive.
+    TransferDetails are deserialized one by one, usable as an async iterator:
+
+        async for td in reader:
+            ...
+    """
+
+    def __init__(self, data_dec):
+        self.m_spend_public_key = bytes(data_dec[:32])
+        self.m_view_public_key = bytes(data_dec[32:64])
+        self.reader = xmrserialize.MemoryReaderWriter(memoryview(data_dec)[64:])
+        self.ar = xmrboost.Archive(self.reader, False)
+        self.num = None
+        self.idx = 0
+
+    async def init(self):
+        """
+        Reads the archive header and the container size
+        :return:
+        """
+        await self.ar.root()
+        await self.ar.version(ExportedOutputs, None)
+        if self.ar.is_tracked():
+            raise ValueError("Tracked container not supported")
+        self.ar.pop_track()
+
+        self.num = await xmrboost.load_uvarint(self.reader)
+        await xmrboost.load_uvarint(self.reader)  # element version
+        return self
+
+    async def read(self):
+        """
+        Returns next TransferDetails or None if there are no more
+        :return:
+        :rtype: xmrtypes.TransferDetails
+        """
+        if self.num is None:
+            await self.init()
+        if self.idx >= self.num:
+            return None
+
+        self.idx += 1
+        return await self.ar.field(elem_type=xmrtypes.TransferDetails)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        td = await self.read()
+        if td is None:
+            raise StopAsyncIteration
+        return td
+
+
+async def load_exported_outputs_stream(priv_key, data):
+    """
+    Loads exported outputs file lazily, returns initialized ExportedOutputsReader
+    :param priv_key:
+    :param data:
+    :return:
+    :rtype: ExportedOutputsReader
+    """
+    data_dec = _decrypt_exported_outputs(priv_key, data)
+    return await ExportedOutputsReader(data_dec).init()
+
+
+async def load_exported_outputs_columns(priv_key, data):
+    """
+    Loads exported outputs file to the compact columnar form for the key image sync.
+    Full TransferDetails are not retained.
+
+    :param priv_key:
+    :param data:
+    :return:
+    """
+    reader = await load_exported_outputs_stream(priv_key, data)
+    cols = key_image.KeyImageColumns()
+    async for td in reader:
+        await cols.add(td, reader.idx - 1)
+
+    return OutputsDump(
+        m_spend_public_key=reader.m_spend_public_key,
+        m_view_public_key=reader.m_view_public_key,
+        tds=cols,
+    )
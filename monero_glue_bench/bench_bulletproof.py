@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+"""
+Range proof benchmark: Borromean vs. Bulletproof (one per output and
+aggregated over all outputs). Proof size, prove time and verify time.
+"""
+
+import argparse
+import asyncio
+
+from monero_glue.hwtoken import misc as tmisc
+from monero_glue.xmr import bulletproof, crypto, monero, ring_ct
+from monero_glue_bench import common as bcommon
+from monero_serialize import xmrtypes
+
+
+def amounts_of(n):
+    return [crypto.random_scalar() % (2 ** 64) for _ in range(n)]
+
+
+async def bench_borromean(amounts, rounds):
+    res = []
+
+    async def prove():
+        res[:] = [ring_ct.prove_range(x, byte_enc=True) for x in amounts]
+
+    async def verify():
+        for C, _, rsig in res:
+            assert ring_ct.ver_range(C, monero.RangeSigView(rsig))
+
+    n = len(amounts)
+    bcommon.report("borromean prove", await bcommon.measure(prove, rounds), n)
+    bcommon.report("borromean verify", await bcommon.measure(verify, rounds), n)
+    print("%-32s %10d B" % ("borromean size", sum(len(x[2]) for x in res)))
+
+
+async def bench_bulletproof(name, amounts, rounds, aggregated):
+    res = []
+
+    async def prove():
+        if aggregated:
+            res[:] = [ring_ct.prove_range_bulletproof(amounts)[2]]
+        else:
+            res[:] = [ring_ct.prove_range(x, bulletproof=True)[2] for x in amounts]
+
+    async def verify():
+        assert bulletproof.verify(res)
+
+    n = len(amounts)
+    bcommon.report(name + " prove", await bcommon.measure(prove, rounds), n)
+    bcommon.report(name + " verify", await bcommon.measure(verify, rounds), n)
+    size = 0
+    for proof in res:
+        size += len(await tmisc.dump_msg(proof, msg_type=xmrtypes.Bulletproof))
+    print("%-32s %10d B" % (name + " size", size))
+
+
+async def main_bench(args):
+    amounts = amounts_of(args.outputs)
+    bulletproof.get_generators(bulletproof.BP_N * 16)  # cached, not measured
+
+    print("Outputs: %d" % args.outputs)
+    await bench_borromean(amounts, args.rounds)
+    await bench_bulletproof("bulletproof", amounts, args.rounds, False)
+    if args.outputs > 1:
+        await bench_bulletproof("bulletproof aggregated", amounts, args.rounds, True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Range proof benchmark")
+    parser.add_argument("--outputs", type=int, default=2, help="Number of outputs")
+    parser.add_argument("--rounds", type=int, default=1, help="Rounds, best is taken")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main_bench(args))
+
+
+if __name__ == "__main__":
+    main()
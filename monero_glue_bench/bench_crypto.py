@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+"""
+Crypto microbenchmark suite over all available EC backends.
+Backend primitives and the composite operations (Borromean range proof,
+MLSAG at several ring sizes). Each backend runs in its own process with
+the deterministic randomness pool, results are written as JSON and
+compared against the baseline with the regression threshold.
+
+    python -m monero_glue_bench.bench_crypto --output res.json
+    python -m monero_glue_bench.bench_crypto --baseline res.json --threshold 0.2
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from monero_glue.xmr.core import ec_picker, random_pool
+from monero_glue_bench import common as bcommon
+
+RESULTS_VERSION = 1
+BACKENDS = {"py": ec_picker.EC_BACKEND_PY, "trezor": ec_picker.EC_BACKEND_TREZOR}
+RING_SIZES = (7, 11, 16)
+
+
+def build_cases():
+    """
+    Benchmark cases of the current backend
+    :return: list of (name, function)
+    """
+    from monero_glue.xmr import crypto, mlsag2, ring_ct
+
+    sk = crypto.random_scalar()
+    P = crypto.scalarmult_base(crypto.random_scalar())
+    P_enc = crypto.encodepoint(P)
+    sk_enc = crypto.encodeint(sk)
+    data32 = crypto.random_bytes(32)
+    data1k = crypto.random_bytes(1024)
+
+    cases = [
+        ("scalarmult_base", lambda: crypto.scalarmult_base(sk)),
+        ("scalarmult", lambda: crypto.scalarmult(P, sk)),
+        ("point_add", lambda: crypto.point_add(P, P)),
+        ("hash_to_ec", lambda: crypto.hash_to_ec(P_enc)),
+        ("hash_to_scalar", lambda: crypto.hash_to_scalar(data32)),
+        ("generate_key_derivation", lambda: crypto.generate_key_derivation(P, sk)),
+        ("keccak_32", lambda: crypto.keccak_hash(data32)),
+        ("keccak_1k", lambda: crypto.keccak_hash(data1k)),
+        ("hmac_1k", lambda: crypto.compute_hmac(data32, data1k)),
+        ("encodepoint", lambda: crypto.encodepoint(P)),
+        ("decodepoint", lambda: crypto.decodepoint(P_enc)),
+        ("encodeint", lambda: crypto.encodeint(sk)),
+        ("decodeint", lambda: crypto.decodeint(sk_enc)),
+        ("random_scalar", crypto.random_scalar),
+    ]
+
+    C, _, rsig = ring_ct.prove_range_mem(123456789)
+    cases += [
+        ("prove_range_mem", lambda: ring_ct.prove_range_mem(123456789)),
+        ("ver_range", lambda: ring_ct.ver_range(C, rsig, decode=False)),
+    ]
+
+    # Simple RCT MLSAG: 2 rows, key image for the first one
+    for ring_size in RING_SIZES:
+        xx = [crypto.random_scalar(), crypto.random_scalar()]
+        pk = [
+            [crypto.scalarmult_base(crypto.random_scalar()) for _ in range(2)]
+            for _ in range(ring_size)
+        ]
+        index = ring_size // 2
+        pk[index] = [crypto.scalarmult_base(x) for x in xx]
+        mg, _ = mlsag2.gen_mlsag_ext(data32, pk, xx, None, None, index, 1)
+
+        def gen(pk=pk, xx=xx, index=index):
+            return mlsag2.gen_mlsag_ext(data32, pk, xx, None, None, index, 1)
+
+        def ver(pk=pk, mg=mg):
+            if not mlsag2.ver_mlsag_ext(data32, pk, mg, 1):
+                raise ValueError("MLSAG verification failed")
+
+        cases += [
+            ("gen_mlsag_ext_%d" % ring_size, gen),
+            ("ver_mlsag_ext_%d" % ring_size, ver),
+        ]
+    return cases
+
+
+def run_cases(args):
+    """
+    Runs the cases in this process, the backend is already selected.
+    Number of calls per round is calibrated to args.time seconds.
+    :param args:
+    :return: results, case name -> {"us": us/op, "number": calls per round}
+    """
+    results = {}
+    for name, fnc in build_cases():
+        if args.filter and not any(x in name for x in args.filter):
+            continue
+
+        number = max(1, int(args.time / max(1e-9, bcommon.measure_sync(fnc))))
+        elapsed = bcommon.measure_sync(fnc, number, args.rounds)
+        bcommon.report(name, elapsed * number, number)
+        results[name] = {"us": 1e6 * elapsed, "number": number}
+    return results
+
+
+def run_backend(name, args):
+    """
+    Runs the suite for the backend in a subprocess
+    :param name:
+    :param args:
+    :return: results or None if the backend is not available
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["EC_BACKEND"] = str(BACKENDS[name])
+    env["EC_BACKEND_FORCE"] = "1"
+    env["PYTHONPATH"] = os.pathsep.join(
+        [root] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+
+    fd, output = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        cmd = [sys.executable, "-m", "monero_glue_bench.bench_crypto", "--worker"]
+        cmd += ["--output", output, "--time", str(args.time)]
+        cmd += ["--rounds", str(args.rounds), "--seed", str(args.seed)]
+        for flt in args.filter or []:
+            cmd += ["--filter", flt]
+
+        print("Backend: %s" % name)
+        sys.stdout.flush()
+        proc = subprocess.run(cmd, env=env, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            err = proc.stderr.decode("utf8", "replace").strip().splitlines()
+            print("Backend %s not available: %s" % (name, err[-1] if err else "?"))
+            return None
+
+        with open(output) as fh:
+            return json.load(fh)
+    finally:
+        os.unlink(output)
+
+
+def compare(baseline, current, threshold):
+    """
+    Compares the results with the baseline
+    :param baseline: results JSON
+    :param current: results JSON
+    :param threshold: relative slowdown considered a regression, e.g. 0.2
+    :return: list of regressions (backend, case, base us, current us)
+    """
+    regressions = []
+    print("\n%-8s %-28s %14s %14s %9s" % ("backend", "case", "base us", "us", "change"))
+    for backend, results in sorted(current["backends"].items()):
+        base = baseline.get("backends", {}).get(backend, {})
+        for case, res in sorted(results.items()):
+            if case not in base:
+                continue
+
+            base_us, cur_us = base[case]["us"], res["us"]
+            change = cur_us / base_us - 1 if base_us > 0 else 0.0
+            regressed = change > threshold
+            if regressed:
+                regressions.append((backend, case, base_us, cur_us))
+            mark = " !" if regressed else ""
+            print(
+                "%-8s %-28s %14.2f %14.2f %+8.1f%%%s"
+                % (backend, case, base_us, cur_us, 100 * change, mark)
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crypto microbenchmark suite")
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=sorted(BACKENDS.keys()),
+        help="Backends to run, all by default",
+    )
+    parser.add_argument("--output", help="Write results JSON")
+    parser.add_argument("--baseline", help="Compare with the baseline results JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown reported as a regression",
+    )
+    parser.add_argument("--filter", action="append", help="Case name substring")
+    parser.add_argument("--time", type=float, default=0.2, help="Seconds per round")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds, best is taken")
+    parser.add_argument("--seed", default="bench_crypto", help="Randomness seed")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        random_pool.set_deterministic(args.seed)
+        with open(args.output, "w") as fh:
+            json.dump(run_cases(args), fh)
+        return
+
+    res = {
+        "version": RESULTS_VERSION,
+        "date": datetime.datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "backends": {},
+    }
+    for name in args.backend or sorted(BACKENDS.keys()):
+        backend_res = run_backend(name, args)
+        if backend_res is not None:
+            res["backends"][name] = backend_res
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(res, fh, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        regressions = compare(baseline, res, args.threshold)
+        if regressions:
+            print(
+                "\nRegressions over %.0f%%: %d"
+                % (100 * args.threshold, len(regressions))
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+"""
+Tx extra processing benchmark over exported outputs:
+full parse_extra_fields() deserialization vs. the single-pass scan_extra_fields().
+"""
+
+import argparse
+import asyncio
+
+from monero_glue.xmr import key_image, monero, wallet
+from monero_glue_bench import common as bcommon
+from monero_serialize import xmrtypes
+
+
+async def key_image_data_parse(td):
+    """
+    Reference: extra deserialized twice, as done previously
+    :param td:
+    :return:
+    """
+    extras = await monero.parse_extra_fields(list(td.m_tx.extra))
+    tx_pub = monero.find_tx_extra_field_by_type(extras, xmrtypes.TxExtraPubKey, 0)
+    extras = await monero.parse_extra_fields(list(td.m_tx.extra))
+    add = monero.find_tx_extra_field_by_type(extras, xmrtypes.TxExtraAdditionalPubKeys)
+    return tx_pub.pub_key, add.data if add else None
+
+
+async def main_bench(args):
+    creds = bcommon.get_test_creds()
+    data = bcommon.get_data_file(args.file)
+    exported = await wallet.load_exported_outputs(creds.view_key_private, data)
+    tds = exported.tds * max(1, args.multiply)
+    print("Outputs: %d" % len(tds))
+
+    async def run_parse():
+        for td in tds:
+            await key_image_data_parse(td)
+
+    async def run_scan():
+        for idx, td in enumerate(tds):
+            await key_image.key_image_data(td, idx)
+
+    async def run_scan_only():
+        for td in tds:
+            monero.scan_extra_fields(td.m_tx.extra)
+
+    bcommon.report("parse_extra_fields x2", await bcommon.measure(run_parse, args.rounds), len(tds))
+    bcommon.report("key_image_data (scan)", await bcommon.measure(run_scan, args.rounds), len(tds))
+    bcommon.report("scan_extra_fields", await bcommon.measure(run_scan_only, args.rounds), len(tds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tx extra scanning benchmark")
+    parser.add_argument(
+        "--file", default="ki_sync_01.txt", help="Exported outputs file (test creds)"
+    )
+    parser.add_argument(
+        "--multiply", type=int, default=50, help="Repeat the outputs N times"
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds, best is taken")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main_bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+"""
+MLSAG verification benchmark: one by one vs. the batch context.
+Simple RCT signatures with rings drawn from a shared decoy pool,
+as the inputs of a block share ring members.
+"""
+
+import argparse
+import asyncio
+import copy
+import random
+
+from monero_glue.xmr import crypto, mlsag2, monero
+from monero_glue.xmr.mlsag_batch import MlsagBatchVerifier
+from monero_glue_bench import common as bcommon
+from monero_serialize import xmrtypes
+
+
+def gen_ctkey():
+    return xmrtypes.CtKey(
+        dest=crypto.encodepoint(crypto.scalarmult_base(crypto.random_scalar())),
+        mask=crypto.encodepoint(crypto.scalarmult_base(crypto.random_scalar())),
+    )
+
+
+def gen_signatures(count, ring_size, pool_size):
+    """
+    Simple MLSAGs over the shared decoy pool
+    :return: list of (message, mg encoded, ring, pseudo out encoded)
+    """
+    pool = [gen_ctkey() for _ in range(pool_size)]
+    res = []
+    for _ in range(count):
+        sk = xmrtypes.CtKey(dest=crypto.random_scalar(), mask=crypto.random_scalar())
+        amount = crypto.sc_init(random.randrange(1, 2 ** 32))
+        real = xmrtypes.CtKey(
+            dest=crypto.encodepoint(crypto.scalarmult_base(sk.dest)),
+            mask=crypto.encodepoint(crypto.gen_c(sk.mask, amount)),
+        )
+
+        index = random.randrange(ring_size)
+        ring = random.sample(pool, ring_size - 1)
+        ring.insert(index, real)
+
+        a = crypto.random_scalar()
+        cout = crypto.gen_c(a, amount)
+        message = crypto.random_bytes(32)
+        mg, _ = mlsag2.prove_rct_mg_simple(
+            message, ring, sk, a, cout, None, None, index
+        )
+        mg = monero.recode_msg([mg])[0]
+        res.append((message, mg, ring, crypto.encodepoint(cout)))
+    return res
+
+
+async def main_bench(args):
+    sigs = gen_signatures(args.count, args.ring, args.pool)
+    print(
+        "Signatures: %d, ring: %d, decoy pool: %d" % (args.count, args.ring, args.pool)
+    )
+
+    async def sequential():
+        for message, mg, ring, pseudo_out in sigs:
+            mg = monero.recode_msg([copy.deepcopy(mg)], encode=False)[0]
+            C = crypto.decodepoint(pseudo_out)
+            assert mlsag2.ver_rct_mg_simple(message, mg, ring, C)
+
+    async def batch():
+        verifier = MlsagBatchVerifier()
+        for message, mg, ring, pseudo_out in sigs:
+            verifier.add_simple(message, mg, ring, pseudo_out)
+        assert all(await verifier.verify())
+
+    n = len(sigs)
+    for name, fnc in [("mlsag sequential", sequential), ("mlsag batch", batch)]:
+        bcommon.report(name, await bcommon.measure(fnc, args.rounds), n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MLSAG batch verification benchmark")
+    parser.add_argument("--count", type=int, default=16, help="Number of signatures")
+    parser.add_argument("--ring", type=int, default=11, help="Ring size")
+    parser.add_argument("--pool", type=int, default=64, help="Decoy pool size")
+    parser.add_argument("--rounds", type=int, default=1, help="Rounds, best is taken")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main_bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+"""
+Protobuf codec benchmark: streaming async codec vs. the compiled
+synchronous one, over the Monero* message set. Message conversion
+round trip to trezorlib (own messages when trezorlib is missing).
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from monero_glue import messages, protobuf
+from monero_glue.protocol_base.messages import MessageConverter
+from monero_glue_bench import common as bcommon
+from monero_glue_test.test_protobuf import sample_message
+from monero_serialize import xmrserialize
+
+
+def message_set(seed=0):
+    rnd = random.Random(seed)
+    msg_types = [getattr(messages, x) for x in dir(messages) if x.startswith("Monero")]
+    msg_types = [x for x in msg_types if isinstance(x, type)]
+    return [sample_message(x, rnd) for x in msg_types]
+
+
+async def bench_stream(msgs, iters):
+    for _ in range(iters):
+        for msg in msgs:
+            writer = xmrserialize.MemoryReaderWriter()
+            await protobuf.dump_message_stream(writer, msg)
+            reader = xmrserialize.MemoryReaderWriter(bytearray(writer.get_buffer()))
+            await protobuf.load_message_stream(reader, msg.__class__)
+
+
+async def bench_async(msgs, iters):
+    for _ in range(iters):
+        for msg in msgs:
+            writer = xmrserialize.MemoryReaderWriter()
+            await protobuf.dump_message(writer, msg)
+            reader = xmrserialize.MemoryReaderWriter(bytearray(writer.get_buffer()))
+            await protobuf.load_message(reader, msg.__class__)
+
+
+async def bench_sync(msgs, iters):
+    for _ in range(iters):
+        for msg in msgs:
+            protobuf.decode_message(protobuf.encode_message(msg), msg.__class__)
+
+
+async def bench_convert(conv, msgs, iters):
+    for _ in range(iters):
+        for msg in msgs:
+            conv.to_phlib(conv.to_trezorlib(msg))
+
+
+def converter():
+    try:
+        conv = MessageConverter(fix_bytes=True)
+        conv._init()
+        return conv, "trezorlib"
+    except ImportError:
+        conv = MessageConverter(fix_bytes=True, tlib_msgs=messages, tlib_p=protobuf)
+        return conv, "loopback"
+
+
+async def main_bench(args):
+    msgs = message_set()
+    total = sum(len(protobuf.encode_message(x)) for x in msgs)
+    print("%d messages, %d B serialized" % (len(msgs), total))
+
+    time_start = time.perf_counter()
+    protobuf._CODECS.clear()
+    for msg in msgs:
+        protobuf.encode_message(msg)
+    bcommon.report("plan compile", time.perf_counter() - time_start, len(msgs))
+
+    count = len(msgs) * args.iters
+    for name, fnc in (
+        ("stream roundtrip", bench_stream),
+        ("async wrapper roundtrip", bench_async),
+        ("sync roundtrip", bench_sync),
+    ):
+        elapsed = await bcommon.measure(lambda: fnc(msgs, args.iters), args.rounds)
+        bcommon.report(name, elapsed, count)
+
+    conv, name = converter()
+    elapsed = await bcommon.measure(
+        lambda: bench_convert(conv, msgs, args.iters), args.rounds
+    )
+    bcommon.report("convert roundtrip %s" % name, elapsed, count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Protobuf codec benchmark")
+    parser.add_argument("--iters", type=int, default=200, help="Iterations")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds, best is taken")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main_bench(args))
+
+
+if __name__ == "__main__":
+    main()
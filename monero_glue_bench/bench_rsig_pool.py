@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+"""
+Host-side signing benchmark: Borromean range proofs computed sequentially
+in the builder vs. concurrently in a process pool (DirectSigner rsig_pool).
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from monero_glue.agent import direct_signer
+from monero_glue.xmr import wallet
+from monero_glue_bench import common as bcommon
+
+
+async def sign(creds, data, pool=None):
+    unsigned_tx = await wallet.load_unsigned_tx(creds.view_key_private, data)
+    signer = direct_signer.DirectSigner(creds, rsig_pool=pool)
+    return await signer.sign_unsigned_tx(unsigned_tx)
+
+
+async def main_bench(args):
+    creds = bcommon.get_test_creds()
+    data = bcommon.get_data_file(args.file)
+
+    elapsed = await bcommon.measure(lambda: sign(creds, data), args.rounds)
+    bcommon.report("sign sequential rsig", elapsed)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        await sign(creds, data, pool)  # warm up the workers
+        elapsed = await bcommon.measure(lambda: sign(creds, data, pool), args.rounds)
+        bcommon.report("sign rsig pool (%d)" % args.workers, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Range proof pool benchmark")
+    parser.add_argument(
+        "--file", default="tsx_t_uns_05.txt", help="Unsigned tx file (test creds)"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Pool workers")
+    parser.add_argument("--rounds", type=int, default=1, help="Rounds, best is taken")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main_bench(args))
+
+
+if __name__ == "__main__":
+    main()
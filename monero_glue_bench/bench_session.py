@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+"""
+Token signing session benchmark: builder state save / restore on each protocol
+message vs. the live builder kept in the TokenLite session.
+"""
+
+import argparse
+import asyncio
+import time
+
+from monero_glue.agent import agent_lite
+from monero_glue.hwtoken import token
+from monero_glue.xmr import wallet
+from monero_glue_bench import common as bcommon
+
+
+class TimedToken(token.TokenLite):
+    """
+    Token measuring the overhead of the state handling: total time of the
+    tsx_sign() calls minus the time spent in the builder protocol steps.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.messages = 0
+        self.total = 0
+
+    async def tsx_sign(self, msg, session_id=None):
+        time_start = time.perf_counter()
+        res = await super().tsx_sign(msg, session_id)
+        self.total += time.perf_counter() - time_start
+        self.messages += 1
+        return res
+
+
+async def sign(creds, unsigned_tx, live):
+    trez = TimedToken(live_session=live)
+    trez.creds = creds
+    trez.debug = False
+    agent = agent_lite.Agent(trez)
+    await agent.sign_unsigned_tx(unsigned_tx)
+    return trez
+
+
+async def main_bench(args):
+    from monero_glue.protocol.tsx_sign_builder import TTransactionBuilder
+
+    creds = bcommon.get_test_creds()
+    data = bcommon.get_data_file(args.file)
+    unsigned_tx = await wallet.load_unsigned_tx(creds.view_key_private, data)
+    tx = unsigned_tx.txes[0]
+    print("Inputs: %d, outputs: %d" % (len(tx.sources), len(tx.splitted_dsts)))
+
+    for live in (False, True):
+        best = None
+        for _ in range(args.rounds):
+            unsigned_tx = await wallet.load_unsigned_tx(creds.view_key_private, data)
+            trez = await sign(creds, unsigned_tx, live)
+            best = trez if best is None or trez.total < best.total else best
+
+        name = "tsx_sign %s" % ("live session" if live else "state save/load")
+        bcommon.report(name, best.total, best.messages)
+
+    # Isolated per-message state handling cost in the middle of the transaction
+    unsigned_tx = await wallet.load_unsigned_tx(creds.view_key_private, data)
+    holder = None
+
+    class SnapshotToken(token.TokenLite):
+        async def tsx_sign(self, msg, session_id=None):
+            nonlocal holder
+            res = await super().tsx_sign(msg, session_id)
+            if msg.sign_input is not None and holder is None:
+                holder = self.tsx_snapshot(session_id)
+            return res
+
+    trez = SnapshotToken(live_session=True)
+    trez.creds = creds
+    await agent_lite.Agent(trez).sign_unsigned_tx(unsigned_tx)
+
+    async def run_save_load():
+        for _ in range(args.iters):
+            TTransactionBuilder(creds=creds, state=holder).state_save()
+
+    elapsed = await bcommon.measure(run_save_load, args.rounds)
+    bcommon.report("state_load + state_save", elapsed, args.iters)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token signing session benchmark")
+    parser.add_argument(
+        "--file", default="tsx_t_uns_10.txt", help="Unsigned tx file (test creds)"
+    )
+    parser.add_argument("--iters", type=int, default=1000, help="State handling iterations")
+    parser.add_argument("--rounds", type=int, default=1, help="Rounds, best is taken")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main_bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+"""
+Token transport benchmark: round-trip time per protocol step of the
+TokenProxy transports - hex / JSON, binary frames over HTTP and over
+a raw TCP / Unix socket. Runs the token server in-process.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from monero_glue.agent import agent_lite
+from monero_glue.hwtoken import token
+from monero_glue.messages import MoneroTransactionSetOutputAck
+from monero_glue.xmr import crypto, wallet
+from monero_glue_bench import common as bcommon
+from monero_poc.utils import binproto, rest_server
+from monero_poc.utils.trezor_server_proxy import TokenProxy
+
+
+class TimedToken(token.TokenLite):
+    """
+    Token measuring the time spent in the protocol steps
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.total = 0
+
+    async def tsx_sign(self, msg, session_id=None):
+        time_start = time.perf_counter()
+        try:
+            return await super().tsx_sign(msg, session_id)
+        finally:
+            self.total += time.perf_counter() - time_start
+
+
+class BenchServer(object):
+    """
+    In-process token server, JSON and binary transport
+    """
+
+    def __init__(self, trez, port, sock_urls):
+        self.trez = trez
+        self.port = port
+        self.sock_urls = sock_urls
+        self.loop = asyncio.new_event_loop()
+        self.started = threading.Event()
+
+    async def handler(self, method, session_id, msg):
+        if method == "echo":
+            return msg
+        return await self.trez.tsx_sign(msg, session_id)
+
+    async def on_json(self, request):
+        js = request.json
+        payload = js["payload"]
+        msg = await binproto.load_msg(payload["msg_type"], bytes.fromhex(payload["msg"]))
+        res = await self.handler(request.path.rsplit("/", 1)[1], js.get("session_id"), msg)
+        msg_type, data = await binproto.dump_msg(res)
+        return {"result": True, "payload": {"msg_type": msg_type, "msg": data.hex()}}
+
+    async def on_bin(self, request):
+        res = await binproto.handle_frame(self.handler, binproto.strip_len(request.body))
+        return rest_server.RestResponse(res, content_type="application/octet-stream")
+
+    async def start(self):
+        server = rest_server.RestServer(host="127.0.0.1", port=self.port)
+        for method in ("tx_sign", "echo"):
+            server.route("/api/v1.0/%s" % method, methods=["POST"])(self.on_json)
+        server.route(binproto.BIN_PATH, methods=["POST"])(self.on_bin)
+        await server.start()
+        for url in self.sock_urls:
+            await binproto.start_stream_server(self.handler, url)
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.start())
+        self.started.set()
+        self.loop.run_forever()
+
+
+async def bench_echo(proxy, msg, iters):
+    for _ in range(iters):
+        await proxy.transfer_protobuf("echo", msg)
+
+
+async def main_bench(args):
+    creds = bcommon.get_test_creds()
+    data = bcommon.get_data_file(args.file)
+    trez = TimedToken()
+    trez.creds = creds
+    trez.debug = False
+
+    tmpdir = tempfile.mkdtemp()
+    unix_url = "unix://%s" % os.path.join(tmpdir, "token.sock")
+    tcp_url = "tcp://127.0.0.1:%d" % (args.port + 1)
+    server = BenchServer(trez, args.port, [tcp_url, unix_url])
+    threading.Thread(target=server.run, daemon=True).start()
+    server.started.wait()
+
+    http_url = "http://127.0.0.1:%d" % args.port
+    transports = [
+        ("json", http_url),
+        ("http+bin", http_url.replace("http://", "http+bin://")),
+        ("tcp", tcp_url),
+        ("unix", unix_url),
+    ]
+
+    # Range proof sized ack round trip
+    ack = MoneroTransactionSetOutputAck(
+        tx_out=crypto.random_bytes(43),
+        vouti_hmac=crypto.random_bytes(32),
+        rsig=crypto.random_bytes(6 * 1024),
+        out_pk=crypto.random_bytes(64),
+        ecdh_info=crypto.random_bytes(64),
+    )
+    for name, url in transports:
+        proxy = TokenProxy(url)
+        await proxy.transfer_protobuf("echo", ack)  # connect
+        elapsed = await bcommon.measure(
+            lambda: bench_echo(proxy, ack, args.iters), args.rounds
+        )
+        bcommon.report("echo 6 kB %s" % name, elapsed, args.iters)
+        proxy.close()
+
+    # Transaction signing, time of the transfers minus the token time
+    for name, url in transports:
+        unsigned_tx = await wallet.load_unsigned_tx(creds.view_key_private, data)
+        proxy = TokenProxy(url)
+        steps = 0
+        total = 0
+        transfer = proxy.transfer_protobuf
+
+        async def timed(*a, **kw):
+            nonlocal steps, total
+            time_start = time.perf_counter()
+            try:
+                return await transfer(*a, **kw)
+            finally:
+                total += time.perf_counter() - time_start
+                steps += 1
+
+        proxy.transfer_protobuf = timed
+        trez.total = 0
+        await agent_lite.Agent(proxy).sign_unsigned_tx(unsigned_tx)
+        proxy.close()
+        bcommon.report("tsx_sign step %s" % name, total - trez.total, steps)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token transport benchmark")
+    parser.add_argument(
+        "--file", default="tsx_t_uns_06.txt", help="Unsigned tx file (test creds)"
+    )
+    parser.add_argument("--port", type=int, default=46180, help="Server port")
+    parser.add_argument("--iters", type=int, default=200, help="Echo iterations")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds, best is taken")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main_bench(args))
+
+
+if __name__ == "__main__":
+    main()
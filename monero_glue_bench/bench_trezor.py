@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+"""
+Trezor step latency benchmark: transport session opened for each protocol
+message vs. one session for the whole signing / key image sync flow.
+Reports the trezorlib message conversion share of the step.
+Needs a device or the emulator with the test seed loaded, TREZOR_PATH.
+"""
+
+import argparse
+import asyncio
+import time
+
+from monero_glue.agent import agent_lite
+from monero_glue.hwtoken import token
+from monero_glue.trezor import manager as tmanager
+from monero_glue.xmr import monero, wallet
+from monero_glue_bench import common as bcommon
+
+
+class TimedTrezor(tmanager.Trezor):
+    """
+    Trezor measuring the protocol step latency
+    """
+
+    def __init__(self, *args, flow=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flow = flow
+        self.steps = 0
+        self.total = 0
+        self.conv = 0
+
+    def _to_tlib(self, msg):
+        time_start = time.perf_counter()
+        try:
+            return super()._to_tlib(msg)
+        finally:
+            self.conv += time.perf_counter() - time_start
+
+    def _from_tlib(self, msg):
+        time_start = time.perf_counter()
+        try:
+            return super()._from_tlib(msg)
+        finally:
+            self.conv += time.perf_counter() - time_start
+
+    def flow_session(self):
+        return super().flow_session() if self.flow else token.NullSession()
+
+    async def call_retry(self, msg, idempotent=False):
+        time_start = time.perf_counter()
+        try:
+            return await super().call_retry(msg, idempotent)
+        finally:
+            self.total += time.perf_counter() - time_start
+            self.steps += 1
+
+
+async def main_bench(args):
+    creds = bcommon.get_test_creds()
+    data = bcommon.get_data_file(args.file)
+    ki_data = bcommon.get_data_file(args.ki_file)
+
+    for flow in (False, True):
+        trez = TimedTrezor(path=args.path, flow=flow)
+        agent = agent_lite.Agent(trez, network_type=monero.NetworkTypes.TESTNET)
+        name = "flow session" if flow else "session per step"
+
+        unsigned_tx = await wallet.load_unsigned_tx(creds.view_key_private, data)
+        sessions = trez.session_ctr
+        await agent.sign_unsigned_tx(unsigned_tx)
+        bcommon.report("tsx_sign %s" % name, trez.total, trez.steps)
+        bcommon.report("  conversion", trez.conv, trez.steps)
+        print("  transport sessions: %d" % (trez.session_ctr - sessions))
+
+        trez.steps, trez.total, trez.conv = 0, 0, 0
+        ki_loaded = await wallet.load_exported_outputs(creds.view_key_private, ki_data)
+        await agent.import_outputs(ki_loaded.tds)
+        bcommon.report("ki_sync %s" % name, trez.total, trez.steps)
+        bcommon.report("  conversion", trez.conv, trez.steps)
+        trez.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trezor step latency benchmark")
+    parser.add_argument("--path", default=None, help="Trezor path, TREZOR_PATH")
+    parser.add_argument(
+        "--file", default="tsx_t_uns_06.txt", help="Unsigned tx file (test creds)"
+    )
+    parser.add_argument(
+        "--ki-file", default="ki_sync_01.txt", help="Exported outputs file"
+    )
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(main_bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import os
+import time
+
+import pkg_resources
+from monero_glue.xmr import monero
+from monero_glue.xmr.sub.seed import SeedDerivation
+
+
+TEST_MNEMONIC = (
+    "permit universe parent weapon amused modify essay borrow tobacco budget "
+    "walnut lunch consider gallery ride amazing frog forget treat market "
+    "chapter velvet useless topple"
+)
+
+
+def get_test_creds():
+    """
+    Testnet credentials the test data files were generated for
+    :return:
+    """
+    sd = SeedDerivation.from_mnemonics(TEST_MNEMONIC)
+    return sd.creds(monero.NetworkTypes.TESTNET)
+
+
+def get_data_file(fl):
+    """
+    Reads the file from the monero_glue_test data directory or the given path
+    :param fl:
+    :return:
+    """
+    if os.path.exists(fl):
+        with open(fl, "rb") as fh:
+            return fh.read()
+    return pkg_resources.resource_string(
+        "monero_glue_test", os.path.join("data", fl)
+    )
+
+
+async def measure(fnc, rounds=1):
+    """
+    Runs the coroutine function rounds times, returns the best time in seconds
+    :param fnc:
+    :param rounds:
+    :return:
+    """
+    best = None
+    for _ in range(rounds):
+        time_start = time.perf_counter()
+        await fnc()
+        elapsed = time.perf_counter() - time_start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_sync(fnc, number=1, rounds=1):
+    """
+    Runs the function number times per round, returns the best time
+    of one call in seconds
+    :param fnc:
+    :param number:
+    :param rounds:
+    :return:
+    """
+    best = None
+    for _ in range(rounds):
+        time_start = time.perf_counter()
+        for _ in range(number):
+            fnc()
+        elapsed = (time.perf_counter() - time_start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(name, elapsed, count=1):
+    """
+    Prints the benchmark line
+    :param name:
+    :param elapsed:
+    :param count:
+    :return:
+    """
+    print(
+        "%-32s %10.4f s  %12.2f us/op"
+        % (name, elapsed, 1e6 * elapsed / max(1, count))
+    )
@@ -5,6 +5,8 @@
 import os
 import binascii
 import collections
+from unittest import mock
+
 import aiounittest
 import pkg_resources
 
@@ -17,6 +19,22 @@ from monero_glue.xmr.sub.addr import get_change_addr_idx
 from monero_glue.xmr.sub.seed import SeedDerivation
 
 
+def seeded_random_scalar(seed=b"seed"):
+    """
+    Deterministic random_scalar replacement for differential tests
+    :param seed:
+    :return:
+    """
+    ctr = [0]
+
+    def random_scalar():
+        ctr[0] += 1
+        h = crypto.keccak_2hash(seed + ctr[0].to_bytes(8, "big"))
+        return crypto.sc_reduce32(crypto.decodeint(h))
+
+    return random_scalar
+
+
 class BaseAgentTest(aiounittest.AsyncTestCase):
 
     def get_trezor_mnemonics(self):
@@ -91,6 +109,49 @@ class BaseAgentTest(aiounittest.AsyncTestCase):
             __name__, os.path.join("data", fl)
         )
 
+    async def sign_seeded(self, agent, creds, unsigned_tx_c):
+        """
+        Signs unsigned transaction file with deterministic randomness
+        :param agent:
+        :param creds:
+        :param unsigned_tx_c:
+        :return:
+        """
+        from monero_glue.xmr import wallet
+
+        unsigned_tx = await wallet.load_unsigned_tx(
+            creds.view_key_private, unsigned_tx_c
+        )
+        with mock.patch.object(crypto, "random_scalar", seeded_random_scalar()):
+            return await agent.sign_unsigned_tx(unsigned_tx)
+
+    async def sign_direct(self, fl, **kwargs):
+        """
+        Signs the test file with the direct signer
+        :param fl:
+        :param kwargs: DirectSigner arguments
+        :return: parsed transaction, rings of the sources
+        """
+        from monero_glue.agent import direct_signer
+        from monero_glue.xmr import wallet
+
+        creds = self.get_trezor_creds(0)
+        unsigned_tx = await wallet.load_unsigned_tx(
+            creds.view_key_private, self.get_data_file(fl)
+        )
+        signer = direct_signer.DirectSigner(creds, **kwargs)
+        txes = await signer.sign_unsigned_tx(unsigned_tx)
+        sources = signer.last_transaction_data().tx_data.sources
+        return (
+            await self.parse_tx(txes[0]),
+            [[x[1] for x in src.outputs] for src in sources],
+        )
+
+    async def parse_tx(self, tx_bin):
+        reader = xmrserialize.MemoryReaderWriter(bytearray(tx_bin))
+        ar = xmrserialize.Archive(reader, False)
+        return await ar.message(None, xmrtypes.Transaction)
+
     async def verify_ki_export(self, res, exp):
         """
         Verifies key image export
@@ -174,15 +235,19 @@ class BaseAgentTest(aiounittest.AsyncTestCase):
         additional_pub_keys = [crypto.decodepoint(x) for x in additional_pub_keys.data] if additional_pub_keys is not None else None
 
         # Verify range proofs
-        for idx, rsig in enumerate(tx_obj.rct_signatures.p.rangeSigs):
-            out_pk = tx_obj.rct_signatures.outPk[idx]
-            C = crypto.decodepoint(out_pk.mask)
-            res = ring_ct.ver_range(C, rsig)
-            self.assertTrue(res)
+        if monero.is_rct_bulletproof(tx_obj.rct_signatures.type):
+            self.assertTrue(ring_ct.ver_bulletproof(None, tx_obj.rct_signatures.p.bulletproofs))
+
+        else:
+            for idx, rsig in enumerate(tx_obj.rct_signatures.p.rangeSigs):
+                out_pk = tx_obj.rct_signatures.outPk[idx]
+                C = crypto.decodepoint(out_pk.mask)
+                res = ring_ct.ver_range(C, rsig)
+                self.assertTrue(res)
 
         # Prefix hash
         prefix_hash = await monero.get_transaction_prefix_hash(tx_obj)
-        is_simple = len(tx_obj.vin) > 1
+        is_simple = monero.is_rct_simple(tx_obj.rct_signatures.type)
 
         self.assertEqual(prefix_hash, con_data.tx_prefix_hash)
         tx_obj.rct_signatures.message = prefix_hash
@@ -203,7 +268,11 @@ class BaseAgentTest(aiounittest.AsyncTestCase):
         for idx in range(len(tx_obj.vin)):
             if is_simple:
                 mix_ring = [x[1] for x in con_data.tx_data.sources[idx].outputs]
-                pseudo_out = crypto.decodepoint(bytes(tx_obj.rct_signatures.pseudoOuts[idx]))
+                if monero.is_rct_bulletproof(tx_obj.rct_signatures.type):
+                    pseudo_outs = tx_obj.rct_signatures.p.pseudoOuts
+                else:
+                    pseudo_outs = tx_obj.rct_signatures.pseudoOuts
+                pseudo_out = crypto.decodepoint(bytes(pseudo_outs[idx]))
                 self.assertTrue(mlsag2.ver_rct_mg_simple(
                     mlsag_hash, tx_obj.rct_signatures.p.MGs[idx], mix_ring, pseudo_out
                 ))
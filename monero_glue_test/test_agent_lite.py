@@ -2,8 +2,10 @@
 # -*- coding: utf-8 -*-
 # Author: Dusan Klinec, ph4r05, 2018
 
+import asyncio
 import binascii
 import os
+import tempfile
 import unittest
 import zlib
 
@@ -11,7 +13,9 @@ from monero_serialize import xmrboost, xmrserialize, xmrtypes
 
 from monero_glue.agent import agent_lite
 from monero_glue.hwtoken import token
-from monero_glue.xmr import crypto, monero, wallet
+from monero_glue.messages import MoneroTransferDetails
+from monero_glue.xmr import crypto, key_image, monero, wallet
+from monero_glue.xmr.enc import chacha
 from monero_glue_test.base_agent_test import BaseAgentTest
 
 
@@ -99,6 +103,255 @@ class AgentLiteTest(BaseAgentTest):
         )
         await self.tx_sign_unsigned_msg(unsigned_tx, "tsx_uns_enc02.txt")
 
+    async def test_unsigned_tx_file(self):
+        creds = self.get_trezor_creds(0)
+        unsigned_tx_c = self.get_data_file("tsx_t_uns_09.txt")
+        unsigned_tx = await wallet.load_unsigned_tx(creds.view_key_private, unsigned_tx_c)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "unsigned_monero_tx")
+            with open(fname, "wb") as fh:
+                fh.write(unsigned_tx_c)
+
+            unsigned_tx2 = await wallet.load_unsigned_tx_file(creds.view_key_private, fname)
+
+            # Tampered, truncated, header-only: ValueError, the mmap is closed cleanly
+            for data in [
+                unsigned_tx_c[:-100] + bytes(100),
+                unsigned_tx_c[: len(unsigned_tx_c) // 2],
+                unsigned_tx_c[:70],
+                unsigned_tx_c[:3],
+            ]:
+                with open(fname, "wb") as fh:
+                    fh.write(data)
+                with self.assertRaises(ValueError):
+                    await wallet.load_unsigned_tx_file(creds.view_key_private, fname)
+
+        self.assertEqual(len(unsigned_tx2.txes), len(unsigned_tx.txes))
+        self.assertEqual(len(unsigned_tx2.transfers), len(unsigned_tx.transfers))
+        for tx, tx2 in zip(unsigned_tx.txes, unsigned_tx2.txes):
+            self.assertEqual(tx2.extra, tx.extra)
+            self.assertEqual(tx2.selected_transfers, tx.selected_transfers)
+            self.assertEqual(
+                [x.outputs for x in tx2.sources], [x.outputs for x in tx.sources]
+            )
+
+        with self.assertRaises(ValueError):
+            await wallet.load_unsigned_tx(
+                creds.view_key_private, unsigned_tx_c[:-100] + bytes(100)
+            )
+
+        signed_tx = xmrtypes.SignedTxSet(ptx=[], key_images=[bytes([i]) * 32 for i in range(3)])
+        signed_data = await wallet.dump_signed_tx(creds.view_key_private, signed_tx)
+        self.assertTrue(signed_data.startswith(wallet.SIGNED_TX_PREFIX))
+
+        plain = chacha.decrypt_xmr(
+            creds.view_key_private, signed_data[len(wallet.SIGNED_TX_PREFIX) :]
+        )
+        ar = xmrboost.Archive(xmrserialize.MemoryReaderWriter(bytearray(plain)), False)
+        signed_tx2 = xmrtypes.SignedTxSet()
+        await ar.root()
+        await ar.message(signed_tx2)
+        self.assertEqual(signed_tx2.key_images, signed_tx.key_images)
+
+    async def test_tx_sign_live_session(self):
+        creds = self.get_trezor_creds(0)
+        unsigned_tx_c = self.get_data_file("tsx_t_uns_08.txt")
+
+        res_state = await self.sign_seeded(
+            self.init_agent(creds=creds), creds, unsigned_tx_c
+        )
+
+        trez = token.TokenLite(live_session=True)
+        trez.creds = creds
+        res_live = await self.sign_seeded(agent_lite.Agent(trez), creds, unsigned_tx_c)
+        self.assertEqual(res_live, res_state)
+        self.assertEqual(len(trez.sessions), 0)
+
+        # Snapshot and resume the session after each message
+        class SnapshotToken(token.TokenLite):
+            async def tsx_sign(self, msg, session_id=None):
+                res = await super().tsx_sign(msg, session_id)
+                snap = self.tsx_snapshot(session_id)
+                if snap is not None:
+                    self.tsx_resume(snap, session_id)
+                return res
+
+        trez = SnapshotToken(live_session=True)
+        trez.creds = creds
+        res_snap = await self.sign_seeded(agent_lite.Agent(trez), creds, unsigned_tx_c)
+        self.assertEqual(res_snap, res_state)
+
+    async def test_tx_sign_bulletproof(self):
+        creds = self.get_trezor_creds(0)
+        all_creds = [self.get_trezor_creds(i) for i in range(3)]
+        fl = "tsx_t_uns_01.txt"
+        unsigned_tx = await wallet.load_unsigned_tx(
+            creds.view_key_private, self.get_data_file(fl)
+        )
+
+        agent = agent_lite.Agent(self.init_trezor(creds=creds), bulletproof=True)
+        await self.tx_sign_test(agent, unsigned_tx, creds, all_creds, fl)
+        rv = agent.ct.tx.rct_signatures
+        self.assertEqual(rv.type, xmrtypes.RctType.Bulletproof)
+        self.assertEqual(len(rv.p.bulletproofs), len(rv.outPk))
+
+    async def test_tx_sign_batched(self):
+        creds = self.get_trezor_creds(0)
+        unsigned_tx_c = self.get_data_file("tsx_t_uns_09.txt")
+
+        trez = self.init_trezor(creds=creds)
+        res_single = await self.sign_seeded(
+            agent_lite.Agent(trez, max_batch=1), creds, unsigned_tx_c
+        )
+
+        class CountingToken(token.TokenLite):
+            messages = 0
+
+            async def tsx_sign(self, msg, session_id=None):
+                self.messages += 1
+                return await super().tsx_sign(msg, session_id)
+
+        trez = CountingToken()
+        trez.creds = creds
+        agent = agent_lite.Agent(trez)
+        res_batch = await self.sign_seeded(agent, creds, unsigned_tx_c)
+        self.assertEqual(res_batch, res_single)
+
+        # 11 inputs, 4 outputs, batch of 4: init, perm, all_out, mlsag, final,
+        # 3 batches of set_input, input_vini, sign_input and 1 set_output batch
+        self.assertEqual(trez.messages, 5 + 3 * 3 + 1)
+
+        trez = CountingToken()
+        trez.creds = creds
+        trez.debug = False
+        tx = (await wallet.load_unsigned_tx(creds.view_key_private, unsigned_tx_c)).txes[0]
+        agent = agent_lite.Agent(trez)
+        agent.batch_size = lambda count, max_batch=None: 64
+        with self.assertRaises(agent_lite.agent_misc.TrezorReturnedError):
+            await agent.sign_transaction_data(tx)
+
+    async def test_tx_sign_prefix_check(self):
+        creds = self.get_trezor_creds(0)
+        unsigned_tx_c = self.get_data_file("tsx_t_uns_06.txt")
+        unsigned_tx = await wallet.load_unsigned_tx(creds.view_key_private, unsigned_tx_c)
+
+        class TamperingToken(token.TokenLite):
+            signed = 0
+
+            async def tsx_sign(self, msg, session_id=None):
+                res = await super().tsx_sign(msg, session_id)
+                if msg.all_out_set:
+                    res.tx_prefix_hash = bytes(32)
+                if msg.sign_input or msg.sign_input_batch:
+                    self.signed += 1
+                return res
+
+        trez = TamperingToken()
+        trez.creds = creds
+        agent = agent_lite.Agent(trez)
+        with self.assertRaises(ValueError):
+            await agent.sign_transaction_data(unsigned_tx.txes[0])
+        self.assertEqual(trez.signed, 0)
+        self.assertEqual(agent.bg_tasks, [])
+
+    async def test_batch_size(self):
+        agent = agent_lite.Agent(None)
+        self.assertEqual(agent.batch_size(11, None), 1)
+        self.assertEqual(agent.batch_size(11, 5), 4)
+        self.assertEqual(agent.batch_size(10, 5), 5)
+        self.assertEqual(agent.batch_size(1, 5), 1)
+        agent.max_batch = 2
+        self.assertEqual(agent.batch_size(11, 5), 2)
+
+    async def test_tx_sign_sessions(self):
+        """
+        Concurrent signing and key image sync sessions on one token
+        """
+        creds = self.get_trezor_creds(0)
+        all_creds = [self.get_trezor_creds(i) for i in range(3)]
+        files = ["tsx_t_uns_06.txt", "tsx_t_uns_12.txt"]
+        ki_loaded = await wallet.load_exported_outputs(
+            creds.view_key_private, self.get_data_file("ki_sync_01.txt")
+        )
+        ki_loaded.tds = ki_loaded.tds[:10]
+
+        trez = token.TokenLite(live_session=True, max_sessions=3, workers=3)
+        trez.creds = creds
+        trez.debug = False
+        try:
+            agents = [agent_lite.Agent(trez, session_id=x) for x in range(3)]
+            unsigned = [
+                await wallet.load_unsigned_tx(
+                    creds.view_key_private, self.get_data_file(fl)
+                )
+                for fl in files
+            ]
+            res = await asyncio.gather(
+                agents[0].sign_unsigned_tx(unsigned[0]),
+                agents[1].sign_unsigned_tx(unsigned[1]),
+                agents[2].import_outputs(ki_loaded.tds),
+            )
+        finally:
+            trez.close()
+
+        for idx, fl in enumerate(files):
+            cdata = agents[idx].last_transaction_data()
+            await self.verify(res[idx][0], cdata, creds=creds)
+            await self.receive(
+                res[idx][0], all_creds, cdata, self.get_expected_payment_id(fl)
+            )
+        await self.verify_ki_export(res[2], ki_loaded)
+        self.assertEqual(len(trez.sessions), 0)
+
+    async def test_tx_sign_sessions_eviction(self):
+        creds = self.get_trezor_creds(0)
+        unsigned_tx_c = self.get_data_file("tsx_t_uns_06.txt")
+
+        class AbandoningToken(token.TokenLite):
+            """Host of the session "a" disappears after the init"""
+
+            async def tsx_sign(self, msg, session_id=None):
+                res = await super().tsx_sign(msg, session_id)
+                if msg.init and session_id == "a":
+                    raise ConnectionError("Host disconnected")
+                return res
+
+        async def sign(trez, session_id):
+            unsigned_tx = await wallet.load_unsigned_tx(
+                creds.view_key_private, unsigned_tx_c
+            )
+            agent = agent_lite.Agent(trez, session_id=session_id)
+            return await agent.sign_unsigned_tx(unsigned_tx)
+
+        # Session cap, abandoned session is evicted after the timeout
+        trez = AbandoningToken(max_sessions=1)
+        trez.creds = creds
+        trez.debug = False
+        with self.assertRaises(ConnectionError):
+            await sign(trez, "a")
+        self.assertEqual(list(trez.sessions.keys()), ["a"])
+        self.assertGreater(trez.sessions["a"].mem, 0)
+
+        with self.assertRaises(agent_lite.agent_misc.TrezorReturnedError):
+            await sign(trez, "b")
+
+        trez.session_timeout = 0
+        await sign(trez, "b")
+        self.assertEqual(len(trez.sessions), 0)
+        self.assertEqual(trez.evict_ctr, 1)
+
+        # Memory limit, least recently used idle session is evicted
+        trez = AbandoningToken(live_session=True, mem_limit=1)
+        trez.creds = creds
+        trez.debug = False
+        with self.assertRaises(ConnectionError):
+            await sign(trez, "a")
+        self.assertEqual(trez.evict_ctr, 0)
+        await sign(trez, "b")
+        self.assertEqual(len(trez.sessions), 0)
+        self.assertEqual(trez.evict_ctr, 1)
+
     async def test_trezor_ki(self):
         creds = self.get_trezor_creds(0)
         ki_data = self.get_data_file("ki_sync_01.txt")
@@ -113,6 +366,81 @@ class AgentLiteTest(BaseAgentTest):
         res = await tagent.import_outputs(ki_loaded.tds)
         await self.verify_ki_export(res, ki_loaded)
 
+    async def test_trezor_ki_batches(self):
+        creds = self.get_trezor_creds(0)
+        ki_data = self.get_data_file("ki_sync_01.txt")
+        ki_loaded = await wallet.load_exported_outputs(
+            creds.view_key_private, ki_data
+        )
+
+        # 20 outputs split evenly must not produce an empty trailing step
+        ki_loaded.tds = ki_loaded.tds[:20]
+        for batcher in [
+            agent_lite.KiSyncBatcher(batch_size=10, min_batch=10, max_batch=10),
+            agent_lite.KiSyncBatcher(batch_size=1, max_batch=7, target_rtt=10),
+            agent_lite.KiSyncBatcher(max_msg_size=1),
+        ]:
+            tagent = self.init_agent(creds=creds)
+            res = await tagent.import_outputs(ki_loaded.tds, batcher=batcher)
+            await self.verify_ki_export(res, ki_loaded)
+
+    async def test_trezor_ki_columns(self):
+        creds = self.get_trezor_creds(0)
+        ki_data = self.get_data_file("ki_sync_01.txt")
+        ki_loaded = await wallet.load_exported_outputs(
+            creds.view_key_private, ki_data
+        )
+
+        reader = await wallet.load_exported_outputs_stream(
+            creds.view_key_private, ki_data
+        )
+        self.assertEqual(reader.m_spend_public_key, ki_loaded.m_spend_public_key)
+        self.assertEqual(reader.num, len(ki_loaded.tds))
+        streamed = []
+        async for td in reader:
+            streamed.append(td)
+        self.assertEqual(len(streamed), len(ki_loaded.tds))
+        for td, td_exp in zip(streamed, ki_loaded.tds):
+            self.assertEqual(td.m_tx.extra, td_exp.m_tx.extra)
+            self.assertEqual(td.m_internal_output_index, td_exp.m_internal_output_index)
+
+        ki_cols = await wallet.load_exported_outputs_columns(
+            creds.view_key_private, ki_data
+        )
+        cols = ki_cols.tds
+        tdis = await key_image.yield_key_image_data(ki_loaded.tds)
+        self.assertEqual(len(cols), len(tdis))
+        for i, tdi in enumerate(tdis):
+            self.assertEqual(cols[i], tdi)
+            self.assertEqual(cols.hash(i), key_image.compute_hash(tdi))
+
+        init_cols = await key_image.generate_commitment(cols)
+        init_exp = await key_image.generate_commitment(ki_loaded.tds)
+        self.assertEqual(init_cols, init_exp)
+
+        tagent = self.init_agent(creds=creds)
+        res = await tagent.import_outputs(cols)
+        await self.verify_ki_export(res, ki_loaded)
+
+    async def test_ki_batcher(self):
+        batcher = agent_lite.KiSyncBatcher(batch_size=8, max_batch=64, target_rtt=1.0)
+        batcher.update(8, 0.1)
+        self.assertEqual(batcher.batch_size, 16)
+        batcher.update(16, 8.0)
+        self.assertEqual(batcher.batch_size, 8)
+        batcher.update(8, 1.0)
+        self.assertEqual(batcher.batch_size, 8)
+
+        batcher = agent_lite.KiSyncBatcher(batch_size=64, max_msg_size=1)
+        tdis = [
+            MoneroTransferDetails(
+                out_key=bytes(32), tx_pub_key=bytes(32), internal_output_index=0
+            )
+        ] * 100
+        self.assertEqual(len(batcher.next_batch(tdis, 0)), 1)
+        self.assertEqual(len(batcher.next_batch(tdis, 99)), 1)
+        self.assertEqual(len(batcher.next_batch(tdis, 100)), 0)
+
     async def test_trezor_txs(self):
         if os.getenv('SKIP_TREZOR_TSX', False):
             self.skipTest('Skipped by ENV var')
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import socket
+import threading
+import time
+import unittest
+
+import aiounittest
+from monero_poc.utils import binproto
+
+
+class FrameServer(object):
+    """
+    Blocking frame server, echoes the request frames.
+    close_after: connection is closed after that many responses.
+    drop: connection is closed after reading the request, without response.
+    """
+
+    def __init__(self, close_after=None, drop=False):
+        self.close_after = close_after
+        self.drop = drop
+        self.requests = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(4)
+        self.url = "tcp://127.0.0.1:%d" % self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def recv_exact(self, conn, size):
+        buf = b""
+        while len(buf) < size:
+            data = conn.recv(size - len(buf))
+            if not data:
+                raise ConnectionError
+            buf += data
+        return buf
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    for _ in range(self.close_after or 1 << 30):
+                        hdr = self.recv_exact(conn, binproto.FRAME_LEN.size)
+                        (flen,) = binproto.FRAME_LEN.unpack(hdr)
+                        body = self.recv_exact(conn, flen)
+                        self.requests.append(body)
+                        if self.drop:
+                            break
+                        conn.sendall(hdr + body)
+                except ConnectionError:
+                    pass
+
+    def close(self):
+        self.sock.close()
+
+
+class BinProtoTest(aiounittest.AsyncTestCase):
+    """Binary token transport tests"""
+
+    def __init__(self, *args, **kwargs):
+        super(BinProtoTest, self).__init__(*args, **kwargs)
+
+    def test_frames(self):
+        frame = binproto.encode_request("tsx_sign", "sess", 513, b"data")
+        body = binproto.strip_len(frame)
+        self.assertEqual(
+            binproto.decode_request(body), ("tsx_sign", "sess", 513, b"data")
+        )
+
+        resp = binproto.encode_response(binproto.STATUS_OK, 7, b"ack")
+        body = binproto.strip_len(resp)
+        self.assertEqual(binproto.decode_response(body), (7, b"ack"))
+
+        resp = binproto.encode_response(binproto.STATUS_ERROR, 0, b"failed")
+        with self.assertRaises(binproto.BinProtoError):
+            binproto.decode_response(binproto.strip_len(resp))
+        with self.assertRaises(binproto.BinProtoError):
+            binproto.decode_request(b"\x05ab")
+
+    def test_stale_reconnect(self):
+        server = FrameServer(close_after=1)
+        chan = binproto.SocketChannel(server.url, timeout=5)
+        try:
+            frames = [
+                binproto.encode_request("m", None, 1, bytes([x])) for x in range(3)
+            ]
+            for frame in frames:
+                self.assertEqual(bytes(chan.exchange(frame)), frame[4:])
+                time.sleep(0.05)  # server closes the kept-alive connection
+            self.assertEqual(server.requests, [x[4:] for x in frames])
+        finally:
+            chan.close()
+            server.close()
+
+    def test_no_resend(self):
+        server = FrameServer(drop=True)
+        chan = binproto.SocketChannel(server.url, timeout=5)
+        try:
+            frame = binproto.encode_request("m", None, 1, b"step")
+            with self.assertRaises(ConnectionError):
+                chan.exchange(frame)
+            self.assertEqual(server.requests, [frame[4:]])
+
+            # Kept-alive connection broken after the request was written
+            server.drop = False
+            chan.exchange(frame)
+            server.drop = True
+            with self.assertRaises(ConnectionError):
+                chan.exchange(frame)
+            self.assertEqual(len(server.requests), 3)
+        finally:
+            chan.close()
+            server.close()
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
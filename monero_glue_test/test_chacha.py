@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 # Author: Dusan Klinec, ph4r05, 2018
 
+import io
 import unittest
 
 import aiounittest
@@ -63,6 +64,69 @@ class ChachaTest(aiounittest.AsyncTestCase):
                 if not authenticated:
                     raise
 
+    def test_encrypt_stream(self):
+        for chunk_size in [1, 7, 64, 1000]:
+            priv_key = crypto.random_scalar()
+            data = crypto.cn_fast_hash(crypto.encodeint(priv_key)) * 31
+
+            fh = io.BytesIO()
+            writer = chacha.encrypt_xmr_stream(priv_key, fh, chunk_size=chunk_size)
+            for i in range(0, len(data), 13):
+                writer.write(data[i : i + 13])
+            writer.close()
+            blob = fh.getvalue()
+            self.assertEqual(chacha.decrypt_xmr(priv_key, blob), data)
+
+            blob = chacha.encrypt_xmr(priv_key, data)
+            reader = chacha.decrypt_xmr_stream(priv_key, blob, chunk_size=chunk_size)
+            buf = bytearray(10)
+            plain = bytearray()
+            while not reader.is_empty():
+                nread = reader.readinto(buf)
+                plain += buf[:nread]
+            reader.close()
+            self.assertEqual(plain, data)
+
+            with self.assertRaises(ValueError):
+                chacha.decrypt_xmr_stream(
+                    priv_key, blob[:8] + bytes([blob[8] ^ 0xff]) + blob[9:]
+                )
+
+    def test_key_cache(self):
+        priv_key = crypto.random_scalar()
+        data = b"cached data" * 10
+        blob = chacha.encrypt_xmr(priv_key, data)
+        key_exp = chacha.generate_key(crypto.encodeint(priv_key))
+
+        cache = chacha.KeyCache(max_entries=2)
+        try:
+            chacha.set_key_cache(cache)
+            cache.warmup_xmr(priv_key)
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(chacha.decrypt_xmr(priv_key, blob), data)
+            self.assertEqual(chacha.generate_key(crypto.encodeint(priv_key)), key_exp)
+            self.assertEqual(len(cache), 1)
+
+            blob2 = chacha.encrypt_xmr(priv_key, data)
+            self.assertEqual(len(cache), 1)
+            self.assertNotIn(crypto.encodeint(priv_key), cache.keys)
+
+            cached = list(cache.keys.values())[0]
+            for i in range(3):
+                chacha.generate_key(b"password %d" % i)
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cached, bytearray(32))
+
+            keys = list(cache.keys.values())
+            cache.wipe()
+            self.assertEqual(len(cache), 0)
+            self.assertTrue(all(x == bytearray(32) for x in keys))
+
+        finally:
+            chacha.set_key_cache(None)
+
+        self.assertEqual(chacha.decrypt_xmr(priv_key, blob2), data)
+
 
 if __name__ == "__main__":
     unittest.main()  # pragma: no cover
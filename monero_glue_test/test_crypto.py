@@ -755,6 +755,39 @@ class CryptoTest(aiounittest.AsyncTestCase):
             crypto.encodepoint(crypto.generate_key_derivation(key_pub, key_priv)),
         )
 
+    def test_generate_key_derivation_ladder(self):
+        backend = ec_py.get_backend()
+        torsion = ec_py.decodepoint(
+            bytes.fromhex(
+                "26e8958fc2b227b045c3f489f2ef98f0d5dfac05d3c63339b13802886d53fc05"
+            )
+        )
+
+        for i in range(16):
+            key_priv = ec_py.random_scalar()
+            key_pub = ec_py.scalarmult_base(ec_py.random_scalar())
+            if i % 2:
+                key_pub = ec_py.point_add(key_pub, torsion)
+
+            try:
+                backend.key_derivation_ladder = True
+                deriv = ec_py.generate_key_derivation(key_pub, key_priv)
+                backend.key_derivation_ladder = False
+                deriv_exp = ec_py.generate_key_derivation(key_pub, key_priv)
+            finally:
+                backend.key_derivation_ladder = True
+
+            self.assertEqual(ec_py.encodepoint(deriv_exp), ec_py.encodepoint(deriv))
+
+        # Exceptional points of the birational map
+        for P in [ec_py.identity(), (0, ec_py.q - 1, 1, 0)]:
+            for k in [0, 3, 8]:
+                self.assertTrue(
+                    ec_py.point_eq(
+                        ec_py.ge_scalarmult_ladder(k, P), ec_py.scalarmult(P, k)
+                    )
+                )
+
     def test_h(self):
         H = bytes(
             [
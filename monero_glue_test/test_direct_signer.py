@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import os
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from monero_glue.agent import agent_lite, direct_signer
+from monero_glue.hwtoken import token
+from monero_glue.protocol.tsx_sign_self_check import TSelfCheck
+from monero_glue.xmr import wallet
+from monero_serialize import xmrtypes
+from monero_glue_test.base_agent_test import BaseAgentTest
+
+
+class DirectSignerTest(BaseAgentTest):
+    """Direct signer tests"""
+
+    def __init__(self, *args, **kwargs):
+        super(DirectSignerTest, self).__init__(*args, **kwargs)
+
+    async def test_tx_sign(self):
+        files = ["tsx_t_uns_01.txt", "tsx_t_uns_08.txt", "tsx_t_uns_13.txt"]
+        creds = self.get_trezor_creds(0)
+        all_creds = [self.get_trezor_creds(i) for i in range(3)]
+
+        for fl in files:
+            with self.subTest(msg=fl):
+                unsigned_tx = await wallet.load_unsigned_tx(
+                    creds.view_key_private, self.get_data_file(fl)
+                )
+                signer = direct_signer.DirectSigner(creds)
+                await self.tx_sign_test(signer, unsigned_tx, creds, all_creds, fl)
+
+    async def test_tx_sign_rsig_pool(self):
+        files = ["tsx_t_uns_01.txt", "tsx_t_uns_08.txt"]
+        creds = self.get_trezor_creds(0)
+        all_creds = [self.get_trezor_creds(i) for i in range(3)]
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for fl in files:
+                with self.subTest(msg=fl):
+                    unsigned_tx = await wallet.load_unsigned_tx(
+                        creds.view_key_private, self.get_data_file(fl)
+                    )
+                    signer = direct_signer.DirectSigner(creds, rsig_pool=pool)
+                    await self.tx_sign_test(signer, unsigned_tx, creds, all_creds, fl)
+
+    async def test_tx_sign_bulletproof(self):
+        files = ["tsx_t_uns_01.txt", "tsx_t_uns_08.txt"]
+        creds = self.get_trezor_creds(0)
+        all_creds = [self.get_trezor_creds(i) for i in range(3)]
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for fl, rsig_pool in zip(files, [None, pool]):
+                with self.subTest(msg=fl):
+                    unsigned_tx = await wallet.load_unsigned_tx(
+                        creds.view_key_private, self.get_data_file(fl)
+                    )
+                    signer = direct_signer.DirectSigner(
+                        creds, rsig_pool=rsig_pool, bulletproof=True
+                    )
+                    await self.tx_sign_test(signer, unsigned_tx, creds, all_creds, fl)
+
+                    rv = signer.ct.tx.rct_signatures
+                    self.assertEqual(rv.type, xmrtypes.RctType.Bulletproof)
+                    self.assertEqual(len(rv.p.bulletproofs), len(rv.outPk))
+
+    async def test_tx_sign_self_check(self):
+        files = ["tsx_t_uns_01.txt", "tsx_t_uns_08.txt"]
+        creds = self.get_trezor_creds(0)
+        all_creds = [self.get_trezor_creds(i) for i in range(3)]
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            for fl in files:
+                for mode in [TSelfCheck.OFF, TSelfCheck.DEFERRED]:
+                    with self.subTest(msg="%s %s" % (fl, mode)):
+                        unsigned_tx = await wallet.load_unsigned_tx(
+                            creds.view_key_private, self.get_data_file(fl)
+                        )
+                        signer = direct_signer.DirectSigner(
+                            creds, rsig_pool=pool, self_check=mode
+                        )
+                        await self.tx_sign_test(
+                            signer, unsigned_tx, creds, all_creds, fl
+                        )
+
+    async def test_self_check_policy(self):
+        with self.assertRaises(ValueError):
+            TSelfCheck(3)
+
+        check = TSelfCheck(TSelfCheck.OFF)
+        check.check("x", 0, bool, 0)
+        self.assertFalse(check.enabled())
+
+        check = TSelfCheck(TSelfCheck.IMMEDIATE)
+        check.check("x", 0, bool, 1)
+        with self.assertRaises(ValueError):
+            check.check("x", 1, bool, 0)
+
+        check = TSelfCheck(TSelfCheck.DEFERRED)
+        args = [1]
+        check.check("x", 0, bool, args)
+        check.check("x", 1, bool, 0)
+        args.clear()  # arguments are copied
+        self.assertEqual(len(check.copy().checks), 2)
+        with self.assertRaises(ValueError) as ctx:
+            await check.flush()
+        self.assertIn("x[1]", str(ctx.exception))
+        self.assertNotIn("x[0]", str(ctx.exception))
+        self.assertEqual(check.checks, [])
+        self.assertEqual(await check.flush(), [])
+
+    async def test_tx_sign_differential(self):
+        """
+        Direct signer and the token protocol produce the same transaction
+        with the same randomness.
+        """
+        files = ["tsx_t_uns_%02d.txt" % i for i in [1, 6, 9, 12, 16]]
+        if os.getenv("SKIP_TREZOR_TSX", False):
+            files = files[:2]
+
+        creds = self.get_trezor_creds(0)
+        for fl in files:
+            with self.subTest(msg=fl):
+                unsigned_tx_c = self.get_data_file(fl)
+
+                trez = token.TokenLite()
+                trez.creds = creds
+                res_proto = await self.sign_seeded(
+                    agent_lite.Agent(trez), creds, unsigned_tx_c
+                )
+                res_direct = await self.sign_seeded(
+                    direct_signer.DirectSigner(creds), creds, unsigned_tx_c
+                )
+                self.assertEqual(res_direct, res_proto)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -50,6 +50,20 @@ class EcTrezorTest(aiounittest.AsyncTestCase):
         self.assertEqual(yy[0], 0xaa)
         self.assertEqual(yy[1], 0x00)
 
+    def test_key_derivation_ladder(self):
+        if not LOADED:
+            self.skipTest("Trezor crypto missing")
+
+        for _ in range(16):
+            key_priv = ec_py.random_scalar()
+            key_pub = ec_py.encodepoint(ec_py.scalarmult_base(ec_py.random_scalar()))
+            deriv = ec_py.ge_scalarmult_ladder(8 * key_priv, ec_py.decodepoint(key_pub))
+            deriv_exp = ec_trezor.generate_key_derivation(
+                ec_trezor.decodepoint(key_pub),
+                ec_trezor.decodeint(ec_py.encodeint(key_priv)),
+            )
+            self.assertEqual(ec_trezor.encodepoint(deriv_exp), ec_py.encodepoint(deriv))
+
 
 if __name__ == "__main__":
     unittest.main()  # pragma: no cover
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import unittest
+
+from monero_glue.xmr import monero
+from monero_glue.xmr.mlsag_batch import MlsagBatchVerifier
+from monero_glue_test.base_agent_test import BaseAgentTest
+
+
+class MlsagBatchTest(BaseAgentTest):
+    """Batch MLSAG verification tests"""
+
+    def __init__(self, *args, **kwargs):
+        super(MlsagBatchTest, self).__init__(*args, **kwargs)
+
+    async def sign(self, fl):
+        """
+        Signs the test file, returns expanded transaction, MLSAG hash and rings
+        :param fl:
+        :return:
+        """
+        tx, rings = await self.sign_direct(fl)
+        monero.expand_transaction(tx)
+        tx.rct_signatures.message = await monero.get_transaction_prefix_hash(tx)
+        message = await monero.get_pre_mlsag_hash(tx.rct_signatures)
+        return tx, message, rings
+
+    async def add_tx(self, verifier, fl):
+        tx, message, rings = await self.sign(fl)
+        rv = tx.rct_signatures
+        if monero.is_rct_simple(rv.type):
+            for idx, mg in enumerate(rv.p.MGs):
+                verifier.add_simple(message, mg, rings[idx], rv.pseudoOuts[idx])
+        else:
+            pubs = [[ring[i] for ring in rings] for i in range(len(rings[0]))]
+            verifier.add_full(message, rv.p.MGs[0], pubs, rv.outPk, rv.txnFee)
+        return rv.p.MGs
+
+    async def test_batch(self):
+        verifier = MlsagBatchVerifier()
+        mgs = await self.add_tx(verifier, "tsx_t_uns_08.txt")
+        mgs += await self.add_tx(verifier, "tsx_t_uns_01.txt")
+        mgs += await self.add_tx(verifier, "tsx_t_uns_12.txt")
+
+        items = list(verifier.items)
+        res = await verifier.verify()
+        self.assertEqual(len(res), len(mgs))
+        self.assertTrue(all(res))
+
+        # Verified batch is cleared
+        self.assertEqual(verifier.items, [])
+        self.assertEqual(await verifier.verify(), [])
+
+        # Next batch reuses the prepared keys and tables
+        num_keys = len(verifier.keys)
+        verifier.items = items
+        self.assertEqual(await verifier.verify(), res)
+        self.assertEqual(len(verifier.keys), num_keys)
+
+    async def test_batch_tampered(self):
+        verifier = MlsagBatchVerifier(chunk_size=5)
+        mgs = await self.add_tx(verifier, "tsx_t_uns_08.txt")
+        mgs += await self.add_tx(verifier, "tsx_t_uns_01.txt")
+
+        mgs[1].ss[3][0] = bytes(32)
+        mgs[4].cc = bytes(32)
+        self.assertEqual(await verifier.verify(), [True, False, True, True, False])
+
+    async def test_batch_malformed(self):
+        verifier = MlsagBatchVerifier()
+        mgs = await self.add_tx(verifier, "tsx_t_uns_08.txt")
+        self.assertEqual(len(mgs), 4)
+
+        mgs[0].ss[1] = mgs[0].ss[1][:1]  # short ss column
+        mgs[1].II = []  # missing key image
+        verifier.items[2][2][4][0].dest = b"\xff" * 32  # undecodable ring key
+        await self.add_tx(verifier, "tsx_t_uns_01.txt")
+
+        # Single column ring
+        message, mg, pubs, minus, fee = verifier.items[-1]
+        verifier.add_simple(message, mg, [x[0] for x in pubs[:1]], minus[0])
+        res = await verifier.verify()
+        self.assertEqual(res, [False, False, False, True, True, False])
+
+    async def test_batch_empty(self):
+        verifier = MlsagBatchVerifier()
+        self.assertEqual(await verifier.verify(), [])
+        with self.assertRaises(ValueError):
+            verifier.add_simple(bytes(32), None, [], bytes(32))
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -325,6 +325,47 @@ class MoneroTest(aiounittest.AsyncTestCase):
         )
         self.assertEqual(pkey_ex, crypto.encodepoint(pkey_comp))
 
+    async def test_scan_extra_fields(self):
+        pub1 = crypto.encodepoint(crypto.scalarmult_base(crypto.random_scalar()))
+        pub2 = crypto.encodepoint(crypto.scalarmult_base(crypto.random_scalar()))
+        pid = bytes(range(32))
+        add_keys = [pub2, pub1, pub2]
+
+        extra = b"\x01" + pub1
+        extra = monero.add_extra_nonce_to_tx_extra(
+            extra, monero.set_payment_id_to_tx_extra_nonce(pid)
+        )
+        extra += b"\x04" + bytes([len(add_keys)]) + b"".join(add_keys)
+        extra += b"\x00" * 5
+
+        extras = await monero.parse_extra_fields(extra)
+        idx = monero.scan_extra_fields(list(extra))
+        self.assertEqual(bytes(idx.pub_key(0)), extras[0].pub_key)
+        self.assertIsNone(idx.pub_key(1))
+        self.assertEqual(bytes(idx.nonce_data()), extras[1].nonce)
+        self.assertEqual(bytes(idx.payment_id()), pid)
+        self.assertIsNone(idx.encrypted_payment_id())
+        self.assertEqual([bytes(x) for x in idx.additional_keys()], extras[2].data)
+
+        enc_pid = bytes(range(8))
+        extra = monero.add_extra_nonce_to_tx_extra(
+            b"", monero.set_encrypted_payment_id_to_tx_extra_nonce(enc_pid)
+        )
+        extra += b"\x01" + pub1 + b"\x01" + pub2
+        idx = monero.scan_extra_fields(extra)
+        self.assertEqual(bytes(idx.encrypted_payment_id()), enc_pid)
+        self.assertIsNone(idx.payment_id())
+        self.assertIsNone(idx.additional_keys())
+        self.assertEqual(bytes(idx.pub_key(1)), pub2)
+
+        td = xmrtypes.TransferDetails(m_tx=xmrtypes.Transaction(extra=list(extra)))
+        with self.assertRaises(ValueError):
+            await monero.get_tx_pub_key_from_received_outs(td)
+
+        for bad in [b"\x01" + pub1[:31], b"\x00\x01", b"\x07", b"\x04\x02" + pub1]:
+            with self.assertRaises(ValueError):
+                monero.scan_extra_fields(bad)
+
     async def test_node_transaction(self):
         tx_j = pkg_resources.resource_string(
             __name__, os.path.join("data", "tsx_01.json")
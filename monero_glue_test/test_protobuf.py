@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import random
+import types
+
+import aiounittest
+from monero_serialize import xmrserialize
+
+from monero_glue import messages, protobuf
+from monero_glue.protocol_base.messages import MessageConverter
+
+
+def sample_value(ftype, rnd, depth=0):
+    if ftype is protobuf.UVarintType:
+        return rnd.choice([0, 1, 127, 128, 300, 2 ** 32 - 1, 2 ** 64 - 1])
+    elif ftype is protobuf.SVarintType:
+        return rnd.choice([0, -1, 1, -300, 2 ** 31])
+    elif ftype is protobuf.BoolType:
+        return rnd.choice([True, False])
+    elif ftype is protobuf.BytesType:
+        return bytearray(rnd.getrandbits(8) for _ in range(rnd.choice([0, 32, 200])))
+    elif ftype is protobuf.UnicodeType:
+        return "monero %d" % rnd.randint(0, 1000)
+    return sample_message(ftype, rnd, depth + 1)
+
+
+def sample_message(msg_type, rnd, depth=0):
+    msg = msg_type()
+    if depth > 3:
+        return msg
+    for fname, ftype, fflags in msg_type.FIELDS.values():
+        if fflags & protobuf.FLAG_REPEATED:
+            val = [sample_value(ftype, rnd, depth) for _ in range(rnd.randint(0, 3))]
+        else:
+            val = sample_value(ftype, rnd, depth)
+        setattr(msg, fname, val)
+    return msg
+
+
+class ProtobufTest(aiounittest.AsyncTestCase):
+    """Protobuf codec tests"""
+
+    def __init__(self, *args, **kwargs):
+        super(ProtobufTest, self).__init__(*args, **kwargs)
+
+    def test_encode(self):
+        msg = messages.MoneroTransactionSetInputAck(
+            vini=b"\x01\x02", vini_hmac=b"", pseudo_out=None
+        )
+        self.assertEqual(protobuf.encode_message(msg), b"\x0a\x02\x01\x02\x12\x00")
+
+        msg.vini = [1, 2]  # keys as lists of ints
+        self.assertEqual(protobuf.encode_message(msg), b"\x0a\x02\x01\x02\x12\x00")
+
+        msg = messages.MoneroKeyImageSyncStepAck(
+            kis=[messages.MoneroExportedKeyImage(iv=b"\xaa", blob=b"\xbb" * 200)]
+        )
+        self.assertEqual(
+            protobuf.encode_message(msg),
+            b"\x0a\xce\x01\x0a\x01\xaa\x1a\xc8\x01" + b"\xbb" * 200,
+        )
+
+    async def test_roundtrip(self):
+        rnd = random.Random(1)
+        msg_types = [
+            getattr(messages, x) for x in dir(messages) if x.startswith("Monero")
+        ]
+        msg_types = [x for x in msg_types if isinstance(x, type)]
+        self.assertGreater(len(msg_types), 30)
+
+        for msg_type in msg_types:
+            msg = sample_message(msg_type, rnd)
+            data = protobuf.encode_message(msg)
+
+            writer = xmrserialize.MemoryReaderWriter()
+            await protobuf.dump_message_stream(writer, msg)
+            self.assertEqual(bytes(writer.get_buffer()), bytes(data), msg_type)
+
+            msg2 = protobuf.decode_message(data, msg_type)
+            self.assertEqual(msg2, msg, msg_type)
+
+            reader = xmrserialize.MemoryReaderWriter(bytearray(data))
+            msg3 = await protobuf.load_message_stream(reader, msg_type)
+            self.assertEqual(msg3, msg, msg_type)
+
+            writer = xmrserialize.MemoryReaderWriter()
+            await protobuf.dump_message(writer, msg)
+            reader = xmrserialize.MemoryReaderWriter(bytearray(writer.get_buffer()))
+            self.assertEqual(await protobuf.load_message(reader, msg_type), msg)
+            self.assertTrue(reader.is_empty())
+
+    def test_decode_errors(self):
+        msg = messages.MoneroExportedKeyImage(iv=b"\xaa" * 16, blob=b"\xbb" * 32)
+        data = protobuf.encode_message(msg)
+
+        # Unknown fields are skipped
+        unknown = b"\x78\x05\x82\x01\x02\x00\x00"
+        self.assertEqual(
+            protobuf.decode_message(unknown + data, messages.MoneroExportedKeyImage),
+            msg,
+        )
+
+        with self.assertRaises(EOFError):
+            protobuf.decode_message(data[:-1], messages.MoneroExportedKeyImage)
+        with self.assertRaises(TypeError):
+            protobuf.decode_message(b"\x08\x01", messages.MoneroExportedKeyImage)
+
+    def test_converter(self):
+        # Destination package with distinct classes of the same names
+        dst = types.ModuleType("tlib_messages")
+        for name in dir(messages):
+            cls = getattr(messages, name)
+            if isinstance(cls, type) and issubclass(cls, protobuf.MessageType):
+                setattr(dst, name, type(name, (cls,), {}))
+
+        conv = MessageConverter(fix_bytes=True, tlib_msgs=dst, tlib_p=protobuf)
+        msg = messages.MoneroKeyImageSyncStepAck(
+            kis=[
+                messages.MoneroExportedKeyImage(
+                    iv=bytearray(b"\xaa"), tag=[1, 2], blob=bytearray(8)
+                )
+            ]
+        )
+
+        tmsg = conv.to_trezorlib(msg)
+        self.assertIs(type(tmsg), dst.MoneroKeyImageSyncStepAck)
+        self.assertIs(type(tmsg.kis[0]), dst.MoneroExportedKeyImage)
+        self.assertIs(type(tmsg.kis[0].iv), bytes)
+        self.assertEqual(tmsg.kis[0].tag, b"\x01\x02")
+        self.assertIs(type(msg.kis[0].iv), bytearray)  # source is kept
+
+        pmsg = conv.to_phlib([tmsg])[0]
+        self.assertIs(type(pmsg.kis[0]), messages.MoneroExportedKeyImage)
+        self.assertEqual(
+            protobuf.encode_message(pmsg), protobuf.encode_message(msg)
+        )
+        self.assertIn((messages.MoneroExportedKeyImage, dst), conv.plans)
+
+
+if __name__ == "__main__":
+    aiounittest.main()  # pragma: no cover
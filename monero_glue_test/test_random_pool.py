@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import unittest
+
+import aiounittest
+from monero_glue.xmr import crypto, ring_ct
+from monero_glue.xmr.core import random_pool
+from monero_glue.xmr.core.backend.ed25519 import l
+
+
+class RandomPoolTest(aiounittest.AsyncTestCase):
+    """Randomness source tests"""
+
+    def __init__(self, *args, **kwargs):
+        super(RandomPoolTest, self).__init__(*args, **kwargs)
+
+    def tearDown(self):
+        random_pool.set_source(None)
+        super().tearDown()
+
+    def test_pool(self):
+        pool = random_pool.RandomPool(block_size=100)
+        chunks = [pool.random_bytes(x) for x in [1, 33, 64, 250, 7]]
+        self.assertEqual([len(x) for x in chunks], [1, 33, 64, 250, 7])
+        self.assertEqual(len(set(chunks[1:])), 4)
+
+        scalars = [pool.random_scalar() for _ in range(64)]
+        self.assertTrue(all(0 <= x < l for x in scalars))
+        self.assertEqual(len(set(scalars)), len(scalars))
+
+        # Buffered bytes are dropped in the forked child
+        pool.random_bytes(1)
+        pool.after_fork()
+        self.assertEqual(pool.buffer, b"")
+        self.assertFalse(pool.deterministic)
+
+    def test_deterministic(self):
+        pool1 = random_pool.DeterministicPool(1)
+        pool2 = random_pool.DeterministicPool(1, block_size=64)
+        self.assertTrue(pool1.deterministic)
+        self.assertEqual(
+            [pool1.random_bytes(x) for x in [5, 70, 300]],
+            [pool2.random_bytes(x) for x in [5, 70, 300]],
+        )
+        self.assertEqual(pool1.random_scalar(), pool2.random_scalar())
+
+        pool3 = random_pool.DeterministicPool("2")
+        self.assertNotEqual(pool3.random_bytes(32), pool1.random_bytes(32))
+
+    def test_backend(self):
+        def gen():
+            C, mask, rsig = ring_ct.prove_range(123, byte_enc=True)
+            return crypto.encodepoint(C), crypto.encodeint(mask), bytes(rsig)
+
+        random_pool.set_deterministic(b"bench")
+        self.assertTrue(random_pool.is_deterministic())
+        res = gen()
+
+        random_pool.set_deterministic(b"bench")
+        self.assertEqual(gen(), res)
+
+        random_pool.set_source(None)
+        self.assertFalse(random_pool.is_deterministic())
+        self.assertNotEqual(gen(), res)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
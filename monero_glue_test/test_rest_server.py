@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import asyncio
+import json
+import unittest
+
+import aiounittest
+from monero_poc.utils import rest_server
+
+
+class RestServerTest(aiounittest.AsyncTestCase):
+    """PoC REST server tests"""
+
+    def __init__(self, *args, **kwargs):
+        super(RestServerTest, self).__init__(*args, **kwargs)
+
+    async def start(self):
+        server = rest_server.RestServer(host="127.0.0.1", port=0)
+
+        @server.route("/ping")
+        async def ping(request):
+            return {"result": True}
+
+        @server.route("/echo", methods=("POST",))
+        async def echo(request):
+            return {"echo": request.json}
+
+        @server.route("/slow")
+        async def slow(request):
+            await asyncio.sleep(0.05)
+            return {"slow": True}
+
+        srv = await server.start()
+        port = srv.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        return server, reader, writer
+
+    async def stop(self, server, writer):
+        """
+        Closes the client, the connection handler has to finish without leaks
+        """
+        writer.close()
+        for _ in range(100):
+            if not self.pending_tasks():
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.pending_tasks(), [])
+        await server.stop()
+
+    def pending_tasks(self):
+        cur = asyncio.current_task()
+        return [x for x in asyncio.all_tasks() if x is not cur and not x.done()]
+
+    async def read_response(self, reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        headers = dict(
+            (k.strip().lower(), v.strip())
+            for k, v in (x.split(":", 1) for x in lines[1:] if x)
+        )
+        body = await reader.readexactly(int(headers["content-length"]))
+        return status, headers, json.loads(body.decode("utf8"))
+
+    def request(self, method, path, body=b"", headers=None):
+        head = ["%s %s HTTP/1.1" % (method, path), "Content-Length: %d" % len(body)]
+        head += headers or []
+        return ("\r\n".join(head) + "\r\n\r\n").encode("ascii") + body
+
+    async def test_get_post(self):
+        server, reader, writer = await self.start()
+        try:
+            writer.write(self.request("GET", "/ping?x=1"))
+            status, headers, body = await self.read_response(reader)
+            self.assertEqual((status, body), (200, {"result": True}))
+            self.assertEqual(headers["connection"], "keep-alive")
+
+            writer.write(self.request("POST", "/echo", json.dumps([1, 2]).encode()))
+            status, _, body = await self.read_response(reader)
+            self.assertEqual((status, body), (200, {"echo": [1, 2]}))
+
+            writer.write(self.request("GET", "/missing"))
+            self.assertEqual((await self.read_response(reader))[0], 404)
+
+            writer.write(self.request("GET", "/echo"))
+            self.assertEqual((await self.read_response(reader))[0], 405)
+
+            writer.write(self.request("GET", "/ping", headers=["Connection: close"]))
+            status, headers, _ = await self.read_response(reader)
+            self.assertEqual(headers["connection"], "close")
+            self.assertEqual(await reader.read(), b"")
+        finally:
+            await self.stop(server, writer)
+
+    async def test_pipelining(self):
+        server, reader, writer = await self.start()
+        try:
+            writer.write(
+                self.request("GET", "/slow")
+                + self.request("POST", "/echo", b'"a"')
+                + self.request("GET", "/ping")
+            )
+            res = [(await self.read_response(reader))[2] for _ in range(3)]
+            self.assertEqual(res, [{"slow": True}, {"echo": "a"}, {"result": True}])
+        finally:
+            await self.stop(server, writer)
+
+    async def test_truncated_body(self):
+        server, reader, writer = await self.start()
+        try:
+            req = self.request("POST", "/echo", b"[1, 2, 3, 4]")
+            writer.write(self.request("GET", "/ping") + req[:-5])
+            writer.write_eof()
+
+            # Complete request is answered, the connection is then closed
+            self.assertEqual((await self.read_response(reader))[2], {"result": True})
+            self.assertEqual(await reader.read(), b"")
+        finally:
+            await self.stop(server, writer)
+
+    async def test_oversized_header(self):
+        server, reader, writer = await self.start()
+        try:
+            big = ["X-Pad: %s" % ("a" * 1000) for _ in range(80)]
+            writer.write(self.request("GET", "/ping", headers=big))
+            status, headers, _ = await self.read_response(reader)
+            self.assertEqual(status, 400)
+            self.assertEqual(headers["connection"], "close")
+        finally:
+            await self.stop(server, writer)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
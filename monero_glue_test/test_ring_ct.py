@@ -6,7 +6,9 @@ import binascii
 import unittest
 
 import aiounittest
-from monero_glue.xmr import crypto, monero, ring_ct
+from monero_glue.xmr import bulletproof, crypto, monero, ring_ct
+from monero_glue.xmr.sub.mlsag_hasher import PreMlsagHasher
+from monero_serialize import xmrserialize, xmrtypes
 
 
 class RingCtTest(aiounittest.AsyncTestCase):
@@ -109,6 +111,167 @@ class RingCtTest(aiounittest.AsyncTestCase):
         )
         self.assertFalse(res)
 
+    async def test_range_sig_view(self):
+        C, _, flat = ring_ct.prove_range(123456789, byte_enc=True)
+        rsig = monero.RangeSigView(flat)
+        inflated = monero.inflate_rsig(flat)
+
+        self.assertEqual(len(rsig.Ci), 64)
+        self.assertEqual(bytes(rsig.asig.s1[-1]), inflated.asig.s1[63])
+        self.assertEqual(bytes(rsig.ee), inflated.asig.ee)
+        self.assertEqual(bytes(monero.flatten_rsig(inflated)), bytes(flat))
+        self.assertTrue(ring_ct.ver_range(C, rsig))
+        with self.assertRaises(ValueError):
+            monero.RangeSigView(flat[:-1])
+
+        # Serialization and hashing match the RangeSig
+        digests = []
+        for r in (rsig, inflated):
+            writer = xmrserialize.MemoryReaderWriter()
+            ar = xmrserialize.Archive(writer, True)
+            await ar.message(r, xmrtypes.RangeSig)
+            self.assertEqual(bytes(writer.get_buffer()), bytes(flat))
+
+            hasher = PreMlsagHasher()
+            await hasher.rsig_val(r, False)
+            digests.append(hasher.rsig_hasher.digest())
+        self.assertEqual(digests[0], digests[1])
+
+    async def test_bulletproof(self):
+        C, mask, proof = ring_ct.prove_range(2 ** 64 - 1, bulletproof=True)
+        self.assertTrue(ring_ct.ver_range(C, proof))
+        self.assertTrue(
+            crypto.point_eq(
+                C,
+                crypto.point_add(
+                    crypto.scalarmult_base(mask), crypto.scalarmult_h(2 ** 64 - 1)
+                ),
+            )
+        )
+        self.assertFalse(ring_ct.ver_range(crypto.scalarmult_h(1), proof))
+        with self.assertRaises(ValueError):
+            ring_ct.prove_range(2 ** 64, bulletproof=True)
+
+        # Serialized without V, recomputed from the output commitment
+        writer = xmrserialize.MemoryReaderWriter()
+        ar = xmrserialize.Archive(writer, True)
+        await ar.message(proof, xmrtypes.Bulletproof)
+        self.assertEqual(len(writer.get_buffer()), 32 * (9 + 2 * 6) + 2)
+
+        ar = xmrserialize.Archive(xmrserialize.MemoryReaderWriter(writer.get_buffer()), False)
+        proof2 = await ar.message(None, xmrtypes.Bulletproof)
+        proof2.V = [bulletproof.commitment_to_v(crypto.encodepoint(C))]
+        self.assertTrue(ring_ct.ver_bulletproof(C, proof2))
+
+        proof2.taux = crypto.encodeint(crypto.sc_add(crypto.decodeint(proof2.taux), 1))
+        self.assertFalse(ring_ct.ver_bulletproof(C, proof2))
+
+    def test_bulletproof_aggregated(self):
+        amounts = [0, 123456789]
+        C, masks, proof = ring_ct.prove_range_bulletproof(amounts)
+        self.assertEqual(len(proof.L), 7)
+        self.assertTrue(ring_ct.ver_bulletproof(C, proof))
+        for Ci, mask, amount in zip(C, masks, amounts):
+            self.assertTrue(crypto.point_eq(Ci, crypto.gen_c(mask, amount)))
+
+        # Batch with a single proof, one invalid proof fails the batch
+        C1, _, proof1 = ring_ct.prove_range(7, bulletproof=True)
+        self.assertTrue(ring_ct.ver_bulletproof(C + [C1], [proof, proof1]))
+
+        proof1.L = list(reversed(proof1.L))
+        self.assertFalse(ring_ct.ver_bulletproof(None, [proof, proof1]))
+
+    def get_mainnet_bulletproof(self):
+        """
+        Bulletproof of the mainnet transaction
+        feef88257730d444bff75ffa9f4c985d06810b544b247cfe8105070a0f897dc9
+        (3 outputs, v0.13 proof format), and the output commitments.
+        """
+        u = binascii.unhexlify
+        proof = xmrtypes.Bulletproof()
+        proof.A = u(b"27c4fd1b5ef998e2b59f249fb9d11f3ebc694c10d49faa8abfde62d8e20cd40b")
+        proof.S = u(b"f2200d7cdcb8fb7d891fef3c3a6bf3afcddcbcb4eab1691f81d3466f006af86d")
+        proof.T1 = u(
+            b"a80df3dc6e44b24fb92dc808fc585459f9134201b98f4da853832943fb49947a"
+        )
+        proof.T2 = u(
+            b"93230f19813f4a08dbfb622f6aa833242e1e3665604e3f74b9fc54f64f3cca55"
+        )
+        proof.taux = u(
+            b"45c75cafd802795f3088be5df2d111c54d64f78d9e1ee53d0a9c48845226430f"
+        )
+        proof.mu = u(
+            b"b71bf568b8eef605617c43a2de46eb9607451034d261e74bf20dc35a19c94c0f"
+        )
+        proof.L = [
+            u(b"58a5736936530fa448d5e36067bc48fc0264a904594e689712ca67ba8c270726"),
+            u(b"d1e41e1fc599f144cdecff5920c98ff4dec717f64e47fb57543c6199c679d336"),
+            u(b"54ed7b291c37b32c6da208ed3d9521b8ecf80aaffb4ad19a05834c7c0c7203e2"),
+            u(b"98b844505a4a523a3c6a142b293a5d0521b361d7639b5d30fe06d294a29682dd"),
+            u(b"c18a0a467b6f41c9865984e470dfac9ea583f0d86dcae828d737b75802e8fde2"),
+            u(b"c214e1f79d3f0fc70928492c96019ad0b31e088e3b567253af9b34a88e4979b0"),
+            u(b"e77e4092b2ad8c2b83a2523d81c7eebb9d5bc48c20be89c399b9f46f3822244b"),
+            u(b"bd1d63ecece2a353d056ab3ed7424ac50e7dbbb2019f6b1065e1e9b03abf5b6d"),
+        ]
+        proof.R = [
+            u(b"ad757a96f1c960b66308cde063845947101593914f8cdbec78daa8a86dccdb06"),
+            u(b"a5e46819dafffcce813a2e4a04c604957937a91f073813d5ccd410fe6cecb3ff"),
+            u(b"927dc74d0c19a51a65c79efb72023298947edc44579a6169e193d881001b021e"),
+            u(b"9b842800a4fc0ed71f5f1527cd4de03d95a9a319526022032ff1aad4aceb9875"),
+            u(b"f2152f6ebc4c40c598d24c5165e13aeeda0a8c38c459f4f97857f7042c67caf5"),
+            u(b"4695c58839ea1989031b5a5391c427debbc0f0a2a401373c44ef931d062cd089"),
+            u(b"6d2eb23b1400e6344d5f4fe477eb3def50a3be8afd28b8e6173aa61b8886c5e2"),
+            u(b"0aeb3ec6b1ff7909e8d9f9c87267321109265abb48e3ed28b5bfb1149141501e"),
+        ]
+        proof.a = u(b"cf22a8d77595498714b79bfb34246a0418c7c4c1ab8732623afbc32ab4781806")
+        proof.b = u(b"80361d243aae7eb2c100ec88f0603cf449297127e887f664144c3c3e47465f00")
+        proof.t = u(b"60cdd1d74fa6d470a96ce29e3b6480b3a33026a37ef38d1fa6f933c57b08e40c")
+
+        C = [
+            u(b"7aed2303152ae5541e9685b90a07be65e1718c0fe9fa8223d3f13aed15b90b80"),
+            u(b"b550004c54f51d9b53f2e078fd3f4359de14d094e8d2b5dcb4f38da178b2be1d"),
+            u(b"ec458f6233ce4c52bbd4479f37459e92d3009fc041130a790d236426533059a9"),
+        ]
+        proof.V = [bulletproof.commitment_to_v(x) for x in C]
+        return [crypto.decodepoint(x) for x in C], proof
+
+    def test_bulletproof_mainnet(self):
+        C, proof = self.get_mainnet_bulletproof()
+        self.assertTrue(ring_ct.ver_bulletproof(C, proof))
+
+        # Generated proof verifies in one batch with the mainnet one
+        C1, _, proof1 = ring_ct.prove_range_bulletproof([1, 2])
+        self.assertTrue(ring_ct.ver_bulletproof(C + C1, [proof, proof1]))
+
+        proof.t = proof.a
+        self.assertFalse(ring_ct.ver_bulletproof(C, proof))
+
+    def test_bulletproof_generators(self):
+        """
+        Generators the mainnet proof above verifies with (Hi = idx 2i, Gi = 2i+1)
+        """
+        self.assertEqual(
+            crypto.encodepoint(crypto.gen_H()),
+            binascii.unhexlify(
+                b"8b655970153799af2aeadc9ff1add0ea6c7251d54154cfa92c173a0dd39c1f94"
+            ),
+        )
+        Gi, Hi = bulletproof.get_generators(256)
+        exp = [
+            (Hi[0], "42ba668a007d0fcd6fea4009de8a6437248f2d445230af004a89fd04279bc297"),
+            (Gi[0], "0b48be50e49cad13fb3e014f3fa7d68baca7c8a91083dc9c59b379aaab218f15"),
+            (
+                Hi[-1],
+                "af9fe695d98c8852eb781cbaabe35df921d191e1874843c1be60d4f357069ada",
+            ),
+            (
+                Gi[-1],
+                "1b16cb19b0733e63540efe90fe6554e23f7e8f1e61544d5189c9dc1ec13c2565",
+            ),
+        ]
+        for point, hexval in exp:
+            self.assertEqual(crypto.encodepoint(point), binascii.unhexlify(hexval))
+
     def test_key_image_signature(self):
         ki = binascii.unhexlify(
             b"a248206cea806a7d60ea936cdc35efdf44a189b1026c4e658f42216aec155383"
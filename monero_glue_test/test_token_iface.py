@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import asyncio
+import unittest
+
+from monero_glue.agent import agent_lite
+from monero_glue.hwtoken import token
+from monero_glue.xmr import wallet
+from monero_glue_test.base_agent_test import BaseAgentTest
+from monero_poc.utils import token_iface
+
+
+class StubServer(object):
+    """Server side of the interface, records the confirmation requests"""
+
+    def __init__(self):
+        self.requests = []
+        self.signed = 0
+
+    def update_prompt(self):
+        pass
+
+    def on_confirm_start(self, pending):
+        self.requests.append(pending)
+
+    def on_confirm_ki_sync(self, pending):
+        self.requests.append(pending)
+
+    def on_transaction_signed(self):
+        self.signed += 1
+
+
+class TokenIfaceTest(BaseAgentTest):
+    """PoC server token interface tests"""
+
+    def __init__(self, *args, **kwargs):
+        super(TokenIfaceTest, self).__init__(*args, **kwargs)
+
+    async def wait_pending(self, tiface, num):
+        for _ in range(3000):
+            pending = tiface.list_pending(token_iface.KIND_TSX)
+            pending += tiface.list_pending(token_iface.KIND_KI_SYNC)
+            if len(pending) >= num:
+                return pending
+            await asyncio.sleep(0.01)
+        self.fail("Sessions did not ask for the confirmation")
+
+    async def test_concurrent_confirmations(self):
+        """
+        Two signing sessions and a key image sync wait for the operator at once,
+        each confirmation goes to its own session
+        """
+        creds = self.get_trezor_creds(0)
+        files = ["tsx_t_uns_06.txt", "tsx_t_uns_12.txt"]
+        ki_loaded = await wallet.load_exported_outputs(
+            creds.view_key_private, self.get_data_file("ki_sync_01.txt")
+        )
+        ki_loaded.tds = ki_loaded.tds[:10]
+
+        server = StubServer()
+        tiface = token_iface.TokenInterface(server)
+        trez = token.TokenLite(live_session=True, max_sessions=3, workers=3)
+        trez.creds = creds
+        trez.debug = False
+        trez.iface = tiface
+        try:
+            agents = [agent_lite.Agent(trez, session_id=x) for x in ("a", "b", "c")]
+            unsigned = [
+                await wallet.load_unsigned_tx(
+                    creds.view_key_private, self.get_data_file(fl)
+                )
+                for fl in files
+            ]
+            tasks = asyncio.gather(
+                agents[0].sign_unsigned_tx(unsigned[0]),
+                agents[1].sign_unsigned_tx(unsigned[1]),
+                agents[2].import_outputs(ki_loaded.tds),
+                return_exceptions=True,
+            )
+
+            await self.wait_pending(tiface, 3)
+            self.assertEqual(len(server.requests), 3)
+            self.assertIsNone(tiface.get_pending(token_iface.KIND_TSX))
+
+            pa = tiface.get_pending(token_iface.KIND_TSX, "a")
+            pb = tiface.get_pending(token_iface.KIND_TSX, "b")
+            pc = tiface.get_pending(token_iface.KIND_KI_SYNC)
+            self.assertEqual(pc.session_id, "c")
+            self.assertEqual(pc.data.num, len(ki_loaded.tds))
+            self.assertEqual(
+                [len(x.data.outputs) for x in (pa, pb)],
+                [len(x.txes[0].dests) + 1 for x in unsigned],
+            )
+            self.assertNotEqual(pa.data.fee, pb.data.fee)
+
+            tiface.confirmation(pb, False)
+            tiface.confirmation(pc, True)
+            tiface.confirmation(pa, True)
+            res = await tasks
+
+        finally:
+            trez.close()
+
+        self.assertEqual(tiface.pending, [])
+        cdata = agents[0].last_transaction_data()
+        await self.verify(res[0][0], cdata, creds=creds)
+        self.assertIsInstance(res[1], agent_lite.agent_misc.TrezorReturnedError)
+        await self.verify_ki_export(res[2], ki_loaded)
+        self.assertEqual(server.signed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
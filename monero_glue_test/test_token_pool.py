@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import copy
+import unittest
+
+from monero_glue.agent import agent_lite, agent_misc, token_pool
+from monero_glue.hwtoken import token
+from monero_glue.xmr import wallet
+from monero_glue_test.base_agent_test import BaseAgentTest
+
+
+class FailingToken(token.TokenLite):
+    """
+    Token with broken transport
+    """
+
+    async def tsx_sign(self, msg, session_id=None):
+        raise ConnectionError("Token disconnected")
+
+
+class RejectingToken(token.TokenLite):
+    """
+    Token returning Failure, e.g., the user rejected the transaction
+    """
+
+    calls = 0
+
+    async def tsx_sign(self, msg, session_id=None):
+        self.calls += 1
+        raise agent_misc.TrezorReturnedError(resp="Rejected")
+
+
+class TokenPoolTest(BaseAgentTest):
+    """Token pool tests"""
+
+    def __init__(self, *args, **kwargs):
+        super(TokenPoolTest, self).__init__(*args, **kwargs)
+
+    def init_agent(self, creds, token_cls=token.TokenLite):
+        trez = token_cls()
+        trez.creds = creds
+        trez.debug = False
+        return agent_lite.Agent(trez)
+
+    async def load_txset(self, creds, fl="tsx_t_uns_06.txt", num=3):
+        unsig = await wallet.load_unsigned_tx(
+            creds.view_key_private, self.get_data_file(fl)
+        )
+        unsig.txes = [copy.deepcopy(unsig.txes[0]) for _ in range(num)]
+        return unsig
+
+    async def test_sign(self):
+        creds = self.get_trezor_creds(0)
+        all_creds = [self.get_trezor_creds(i) for i in range(3)]
+        unsig = await self.load_txset(creds)
+        orig_sources = [[x.outputs for x in tx.sources] for tx in unsig.txes]
+
+        pool = token_pool.TokenPool([self.init_agent(creds) for _ in range(2)])
+        try:
+            signed_tx, results = await pool.sign_unsigned_tx(unsig)
+        finally:
+            pool.close()
+
+        self.assertEqual([x.idx for x in results], list(range(len(unsig.txes))))
+        self.assertEqual(len(signed_tx.ptx), len(unsig.txes))
+        self.assertEqual(
+            orig_sources, [[x.outputs for x in tx.sources] for tx in unsig.txes]
+        )
+
+        for res in results:
+            txb = await agent_lite.Agent(None).serialize_tx(res.tx)
+            await self.verify(txb, res.cdata, creds=creds)
+            await self.receive(txb, all_creds, res.cdata)
+
+        # Spent key images are mapped back to the transfers
+        tx = unsig.txes[0]
+        key_images = set(bytes(x.k_image) for x in results[-1].tx.vin)
+        for idx in tx.selected_transfers:
+            self.assertIn(bytes(signed_tx.key_images[idx]), key_images)
+
+    async def test_failure_isolation(self):
+        creds = self.get_trezor_creds(0)
+        unsig = await self.load_txset(creds, num=2)
+
+        agents = [self.init_agent(creds, FailingToken), self.init_agent(creds)]
+        pool = token_pool.TokenPool(agents, threaded=False)
+        results = await pool.sign(unsig.txes)
+
+        self.assertEqual(pool.retired, {0})
+        self.assertTrue(all(x.token_idx == 1 for x in results))
+        self.assertTrue(all(x.error is None for x in results))
+
+        pool = token_pool.TokenPool(
+            [self.init_agent(creds, FailingToken) for _ in range(2)], threaded=False
+        )
+        with self.assertRaises(token_pool.TokenPoolError) as ctx:
+            await pool.sign(unsig.txes)
+        self.assertEqual(set(ctx.exception.errors.keys()), {0, 1})
+
+    async def test_failure_no_retry(self):
+        creds = self.get_trezor_creds(0)
+        unsig = await self.load_txset(creds, num=2)
+
+        agents = [self.init_agent(creds, RejectingToken) for _ in range(2)]
+        pool = token_pool.TokenPool(agents, threaded=False)
+        with self.assertRaises(token_pool.TokenPoolError) as ctx:
+            await pool.sign(unsig.txes)
+
+        errors = ctx.exception.errors
+        self.assertEqual(set(errors.keys()), {0, 1})
+        self.assertTrue(
+            all(isinstance(x, agent_misc.TrezorReturnedError) for x in errors.values())
+        )
+        self.assertEqual(pool.retired, set())
+        self.assertEqual(sum(x.trezor.calls for x in agents), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
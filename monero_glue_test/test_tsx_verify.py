@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from monero_glue.xmr import tsx_verify
+from monero_glue_test.base_agent_test import BaseAgentTest
+
+
+class TsxVerifyTest(BaseAgentTest):
+    """Whole transaction verification tests"""
+
+    def __init__(self, *args, **kwargs):
+        super(TsxVerifyTest, self).__init__(*args, **kwargs)
+
+    async def test_verify(self):
+        for fl, bulletproof, names in [
+            ("tsx_t_uns_01.txt", False, {"rsig", "mlsag"}),
+            ("tsx_t_uns_08.txt", False, {"rsig", "mlsag", "balance"}),
+            ("tsx_t_uns_01.txt", True, {"bulletproofs", "mlsag", "balance"}),
+        ]:
+            with self.subTest(msg="%s %s" % (fl, bulletproof)):
+                tx, rings = await self.sign_direct(fl, bulletproof=bulletproof)
+                report = await tsx_verify.verify_transaction(tx, rings)
+                self.assertTrue(report.ok, report)
+                self.assertEqual(set(x.name for x in report.results), names)
+                self.assertEqual(
+                    len(report.component("mlsag")), len(tx.rct_signatures.p.MGs)
+                )
+                self.assertEqual(report.prefix_hash, tx.rct_signatures.message)
+
+    async def test_verify_tampered(self):
+        tx, rings = await self.sign_direct("tsx_t_uns_08.txt")
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            report = await tsx_verify.verify_transaction(tx, rings, pool)
+            self.assertTrue(report.ok, report)
+
+            # Fee changes the message and the balance
+            tx.rct_signatures.txnFee += 1
+            report = await tsx_verify.verify_transaction(tx, rings, pool)
+            self.assertFalse(report.ok)
+            self.assertEqual(
+                set(x.name for x in report.failed()), {"mlsag", "balance"}
+            )
+            tx.rct_signatures.txnFee -= 1
+
+            # Range sigs are in the pre-MLSAG hash too
+            tx.rct_signatures.p.rangeSigs[1].asig.ee = bytes(32)
+            report = await tsx_verify.verify_transaction(tx, rings, pool)
+            self.assertEqual(
+                [(x.name, x.idx) for x in report.failed()],
+                [("rsig", 1), ("mlsag", 0), ("mlsag", 1), ("mlsag", 2), ("mlsag", 3)],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -19,7 +19,7 @@ import sys
 import threading
 import time
 
-from monero_glue.agent import agent_lite, agent_misc
+from monero_glue.agent import agent_lite, agent_misc, token_pool
 from monero_glue.messages import DebugMoneroDiagRequest, GetEntropy, Entropy
 from monero_glue.xmr import common, crypto, monero, wallet, wallet_rpc
 from monero_glue.xmr.enc import chacha_poly, chacha
@@ -75,6 +75,7 @@ class HostAgent(cli.BaseCli):
 
         self.trezor_proxy = None  # type: TokenProxy
         self.agent = None  # type: agent_lite.Agent
+        self.token_pool = None  # type: token_pool.TokenPool
         self.token_debug = False
         self.token_path = None
 
@@ -282,6 +283,9 @@ class HostAgent(cli.BaseCli):
     def set_network_type(self, ntype):
         self.network_type = ntype
         self.agent.network_type = ntype
+        if self.token_pool:
+            for agent in self.token_pool.agents:
+                agent.network_type = ntype
 
     async def is_connected(self):
         """
@@ -371,6 +375,16 @@ class HostAgent(cli.BaseCli):
         ntype = self.agent.network_type if self.agent else self.network_type
         self.agent = agent_lite.Agent(self.trezor_proxy, network_type=ntype)
 
+        # Additional token servers for concurrent signing
+        self.token_pool = None
+        if self.args.token_pool:
+            agents = [self.agent] + [
+                agent_lite.Agent(TokenProxy(url=url.strip()), network_type=ntype)
+                for url in self.args.token_pool.split(",")
+                if url.strip()
+            ]
+            self.token_pool = token_pool.TokenPool(agents)
+
     async def open_account(self):
         """
         Opens the watch only account
@@ -396,6 +410,11 @@ class HostAgent(cli.BaseCli):
             await self.check_params(True)
             await self.prompt_password(True)
 
+        # Session cache of wallet file encryption keys, slow hash runs once per session
+        key_cache = chacha.set_key_cache(chacha.KeyCache())
+        if self.args.warmup_keys:
+            key_cache.warmup_xmr(self.priv_view)
+
         # Create watch only wallet file for monero-wallet-rpc
         await self.ensure_watch_only()
 
@@ -731,18 +750,22 @@ class HostAgent(cli.BaseCli):
         misc.install_sarge_filter()
 
         await self.connect()
-        await self.open_account()
+        try:
+            await self.open_account()
 
-        if self.args.sign:
-            res = await self.sign_wrap(self.args.sign)
-            return res if isinstance(res, int) else 0
+            if self.args.sign:
+                res = await self.sign_wrap(self.args.sign)
+                return res if isinstance(res, int) else 0
 
-        await self.wallet_rpc()
+            await self.wallet_rpc()
 
-        self.update_intro()
-        self.cmdloop()
-        self.shutdown_rpc()
-        logger.info("Terminating")
+            self.update_intro()
+            self.cmdloop()
+            self.shutdown_rpc()
+            logger.info("Terminating")
+
+        finally:
+            chacha.set_key_cache(None)
 
     #
     # Sign op
@@ -895,12 +918,13 @@ class HostAgent(cli.BaseCli):
         if file and not os.path.exists(file):
             raise ValueError("Could not find unsigned transaction file")
 
-        data = fdata
-        if data is None:
-            with open(file, "rb") as fh:
-                data = fh.read()
+        if fdata is None:
+            msg = await wallet.load_unsigned_tx_file(self.priv_view, file)
+        else:
+            msg = await wallet.load_unsigned_tx(self.priv_view, fdata)
 
-        msg = await wallet.load_unsigned_tx(self.priv_view, data)
+        if self.token_pool:
+            return await self.sign_pool(msg)
 
         # Key image sync
         # key_images = await self.agent.import_outputs(msg.transfers)
@@ -933,10 +957,44 @@ class HostAgent(cli.BaseCli):
         # Key images array has to cover all transfers sent.
         # Watch only wallet does not have key images.
         signed_tx = xmrtypes.SignedTxSet(ptx=pendings, key_images=key_images)
-        signed_data = await wallet.dump_signed_tx(self.priv_view, signed_tx)
-        with open("signed_monero_tx", "wb+") as fh:
-            fh.write(signed_data)
-            print("Signed transaction file: signed_monero_tx")
+        return await self.store_signed(signed_tx, txes)
+
+    async def sign_pool(self, msg):
+        """
+        Signs transactions concurrently with the token pool
+        :param msg:
+        :type msg: xmrtypes.UnsignedTxSet
+        :return:
+        """
+        print(
+            "Signing %s transactions with %s tokens"
+            % (len(msg.txes), len(self.token_pool.agents))
+        )
+        print("Please check the Trezor and confirm / reject the transaction\n")
+
+        try:
+            signed_tx, results = await self.token_pool.sign_unsigned_tx(msg)
+        except token_pool.TokenPoolError as e:
+            self.trace_logger.log(e)
+            print("Token pool could not sign transactions: %s" % e)
+            return 1
+
+        txes = []
+        for res in results:
+            await self.store_cdata(res.cdata, res.tx, res.cdata.tx_data, msg.transfers)
+            txes.append(await self.agent.serialize_tx(res.tx))
+        return await self.store_signed(signed_tx, txes)
+
+    async def store_signed(self, signed_tx, txes):
+        """
+        Stores signed transaction set and the transactions
+        :param signed_tx:
+        :param txes:
+        :return:
+        """
+        key_images = signed_tx.key_images
+        await wallet.dump_signed_tx_file(self.priv_view, signed_tx, "signed_monero_tx")
+        print("Signed transaction file: signed_monero_tx")
 
         print(
             "Key images: %s"
@@ -963,7 +1021,6 @@ class HostAgent(cli.BaseCli):
             # print('Relay response: %s' % resp.json())
 
         # print('Please note that by manual relaying hot wallet key images get out of sync')
-        return signed_data
 
     async def store_cdata(self, cdata, signed_tx, tx, transfers):
         """
@@ -1040,7 +1097,7 @@ class HostAgent(cli.BaseCli):
         outputs_data_hex = res["result"]["outputs_data_hex"]
 
         outs_data = binascii.unhexlify(outputs_data_hex)
-        exps = await wallet.load_exported_outputs(self.priv_view, outs_data)
+        exps = await wallet.load_exported_outputs_columns(self.priv_view, outs_data)
 
         # Check if for this address
         match = exps.m_spend_public_key == crypto.encodepoint(
@@ -1159,6 +1216,22 @@ class HostAgent(cli.BaseCli):
             "--trezor-path", dest="trezor_path", default=None, help="Trezor path"
         )
 
+        parser.add_argument(
+            "--token-pool",
+            dest="token_pool",
+            default=None,
+            help="Comma separated URLs of additional Trezor servers, signs transactions concurrently",
+        )
+
+        parser.add_argument(
+            "--warmup-keys",
+            dest="warmup_keys",
+            default=False,
+            action="store_const",
+            const=True,
+            help="Derive wallet file encryption keys on account open",
+        )
+
         args_src = sys.argv
         self.args, unknown = parser.parse_known_args(args=args_src[1:])
 
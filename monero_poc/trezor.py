@@ -20,84 +20,27 @@ import sys
 import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from monero_glue import protobuf
-from monero_glue.hwtoken import iface, token
-from monero_glue.messages import MoneroWatchKey
+from monero_glue.hwtoken import token
+from monero_glue.messages import DebugMoneroDiagAck, MoneroWatchKey
 from monero_glue.misc.bip import bip32
 from monero_glue.protocol_base import messages
 from monero_glue.xmr import crypto, monero, wallet
 from monero_glue.xmr.core import mnemonic
 from monero_poc.utils import cli
+from monero_poc.utils import binproto
 from monero_poc.utils import misc
-from monero_serialize import xmrserialize
+from monero_poc.utils import rest_server
+from monero_poc.utils import token_iface
+from monero_poc.utils.rest_server import RestError
 
 import coloredlogs
-import eventlet
-from eventlet import wsgi
-from flask import Flask, abort, jsonify, request
 
 logger = logging.getLogger(__name__)
 coloredlogs.CHROOT_FILES = []
 coloredlogs.install(level=logging.WARNING, use_chroot=False)
-eventlet.monkey_patch(socket=True)
-
-
-class TokenInterface(iface.TokenInterface):
-    def __init__(self, server=None):
-        self.server = server
-        self.tsx_waiter = misc.CliPrompt(pre_wait_hook=server.update_prompt)
-        self.ki_sync_waiter = misc.CliPrompt(pre_wait_hook=server.update_prompt)
-        self.tsx_data = None
-        self.confirmed_result = False
-
-    def get_tx_data(self):
-        return self.tsx_data
-
-    @property
-    def in_confirmation(self):
-        return self.tsx_waiter.in_confirmation
-
-    def confirmation(self, confirmed):
-        self.confirmed_result = confirmed
-        self.tsx_waiter.confirmation(confirmed)
-
-    async def confirm_transaction(self, tsx_data, creds=None, ctx=None):
-        self.confirmed_result = False
-        self.tsx_data = tsx_data
-        try:
-            self.server.on_confirm_start()
-            self.tsx_waiter.wait_confirmation()
-            return self.confirmed_result
-
-        finally:
-            self.tsx_data = None
-
-    async def transaction_signed(self, ctx=None):
-        logger.debug("Transaction signed")
-
-    async def transaction_error(self, *args, **kwargs):
-        logger.error("Transaction error: %s %s" % (args, kwargs))
-
-    async def transaction_finished(self, ctx=None):
-        self.server.on_transaction_signed()
-
-    async def transaction_step(self, step, sub_step=None, sub_step_total=None):
-        logger.debug("Transaction step: %s, sub step: %s" % (step, sub_step))
-
-    async def confirm_ki_sync(self, init_msg, ctx=None):
-        self.server.on_confirm_ki_sync(init_msg)
-        self.ki_sync_waiter.wait_confirmation()
-        return self.ki_sync_waiter.confirmed_result
-
-    async def ki_error(self, e, ctx=None):
-        logger.error("ki sync error: %s" % e)
-
-    async def ki_step(self, i, ctx=None):
-        logger.debug("ki sync progress: %s" % i)
-
-    async def ki_finished(self, ctx=None):
-        logger.info("ki sync finished")
 
 
 class TrezorServer(cli.BaseCli):
@@ -115,9 +58,8 @@ class TrezorServer(cli.BaseCli):
         self.network_type = None
         self.creds = None  # type: monero.AccountCreds
         self.port = 46123
-        self.trez_iface = TokenInterface(self)
+        self.trez_iface = token_iface.TokenInterface(self)
         self.account_data = None
-        self.ki_sync_data = None
 
         self.loop = asyncio.get_event_loop()
         self.running = True
@@ -126,15 +68,12 @@ class TrezorServer(cli.BaseCli):
         self.watch_only_waiter = misc.CliPrompt(pre_wait_hook=self.update_prompt)
         self.key_waiter = misc.CliPrompt(pre_wait_hook=self.update_prompt)
         self.ui_lock = threading.Lock()
-        self.use_werkzeug = False
         self.thread_rest = None
-        self.thread_loop = None
         self.rest_loop = None
-        self.worker_loop = None
+        self.executor = None
 
         self.debug = False
-        self.server = None
-        self.flask = Flask(__name__)
+        self.server = None  # type: rest_server.RestServer
 
     #
     # CLI related
@@ -170,10 +109,11 @@ class TrezorServer(cli.BaseCli):
             flags.append("W?")
         if self.key_waiter.in_confirmation:
             flags.append("Key?")
-        if self.trez_iface.in_confirmation:
-            flags.append("T?")
-        if self.trez_iface.ki_sync_waiter.in_confirmation:
-            flags.append("K?")
+        kinds = ((token_iface.KIND_TSX, "T"), (token_iface.KIND_KI_SYNC, "K"))
+        for kind, flag in kinds:
+            num = len(self.trez_iface.list_pending(kind))
+            if num:
+                flags.append("%s?%s" % (flag, num if num > 1 else ""))
 
         flags_str = "|".join(flags)
         flags_suffix = "|" + flags_str if len(flags_str) > 0 else ""
@@ -187,13 +127,11 @@ class TrezorServer(cli.BaseCli):
 
     def shutdown_server(self):
         """
-        Shutdown flask server
+        Shutdown rest server
         :return:
         """
-        func = request.environ.get("werkzeug.server.shutdown")
-        if func is None:
-            raise RuntimeError("Not running with the Werkzeug Server")
-        func()
+        if self.server and self.rest_loop:
+            asyncio.run_coroutine_threadsafe(self.server.stop(), self.rest_loop)
 
     def terminating(self):
         """
@@ -203,81 +141,33 @@ class TrezorServer(cli.BaseCli):
         self.running = False
         self.stop_event.set()
 
-    def wait_coro(self, coro):
+    def run_blocking(self, fnc, *args):
         """
-        Waits on the coroutine, for flask server
-        :param coro:
+        Runs blocking call (CLI confirmation) in the executor,
+        the server loop keeps serving other requests.
+        :param fnc:
+        :param args:
         :return:
         """
-        # Running on a different thread is not supported in flask:
-        # future = asyncio.run_coroutine_threadsafe(self.on_ping(request=request), self.worker_loop)
-        # return future.result()
-
-        # Running on the common rest thread
-        # return self.rest_loop.run_until_complete(self.on_ping(request=request))
-
-        # Option: create a new loop as this worker is inside own thread
-        loop = asyncio.new_event_loop()
-        res = loop.run_until_complete(coro)
-        loop.close()
-        return res
+        return self.rest_loop.run_in_executor(self.executor, fnc, *args)
 
     def init_rest(self):
         """
         Initializes rest server
         :return:
         """
-
-        @self.flask.route("/api/v1.0/ping", methods=["GET"])
-        def keep_alive():
-            return self.wait_coro(self.on_ping(request=request))
-
-        @self.flask.route("/api/v1.0/watch_only", methods=["GET", "POST"])
-        def watch_only():
-            return self.wait_coro(self.on_watch_only(request=request))
-
-        @self.flask.route("/api/v1.0/get_keys", methods=["GET", "POST"])
-        def get_keys():
-            return self.wait_coro(self.on_keys(request=request))
-
-        @self.flask.route("/api/v1.0/tx_sign", methods=["GET", "POST"])
-        def tx_sign():
-            return self.wait_coro(self.on_tx_sign(request=request))
-
-        @self.flask.route("/api/v1.0/ki_sync", methods=["GET", "POST"])
-        def ki_sync():
-            return self.wait_coro(self.on_ki_sync(request=request))
-
-    def wsgi_options(self):
-        """
-        Returns kwargs for wsgi server
-        :return:
-        """
-        kwargs = dict()
-        if False:
-            kwargs["minimum_chunk_size"] = 1
-        return kwargs
-
-    def serve_werkzeug(self):
-        """
-        Developer local server, not for production use
-        :return:
-        """
-        r = self.flask.run(debug=self.debug, port=self.port, threaded=True)
-        logger.info("Started werkzeug server: %s" % r)
-
-    def serve_eventlet(self):
-        """
-        Eventlet server, fast async, for production use
-        Warning: Eventlet is tricky to work concurrently with classical threading locks
-
-        :return:
-        """
-        listener = eventlet.listen(("0.0.0.0", self.port))
-        logger.info(
-            "Starting Eventlet listener %s for Flask %s" % (listener, self.flask)
+        self.server = rest_server.RestServer(port=self.port)
+        self.server.route("/api/v1.0/ping", methods=["GET"])(self.on_ping)
+        self.server.route("/api/v1.0/watch_only", methods=["GET", "POST"])(
+            self.on_watch_only
+        )
+        self.server.route("/api/v1.0/tx_sign", methods=["GET", "POST"])(
+            self.on_tx_sign
+        )
+        self.server.route("/api/v1.0/ki_sync", methods=["GET", "POST"])(
+            self.on_ki_sync
         )
-        wsgi.server(listener, self.flask, **self.wsgi_options())
+        self.server.route(binproto.BIN_PATH, methods=["POST"])(self.on_bin)
 
     #
     # Handlers
@@ -289,7 +179,7 @@ class TrezorServer(cli.BaseCli):
         :param request:
         :return:
         """
-        return jsonify({"result": True})
+        return {"result": True}
 
     async def on_watch_only(self, request=None):
         """
@@ -297,31 +187,38 @@ class TrezorServer(cli.BaseCli):
         :param request:
         :return:
         """
+        res = await self.watch_only_msg()
+        return {"result": True, "payload": await self.proto_res(res)}
+
+    async def watch_only_msg(self):
+        """
+        Watch only credentials after the user confirmation
+        :return:
+        """
         if not self.creds:
             logger.warning(
                 "Agent asks for watch-only credentials, Trezor not initialized"
             )
-            return abort(406)
+            raise RestError(406)
 
         if self.watch_only_waiter.in_confirmation:
             logger.warning("Agent asks for watch-only credentials concurrently")
-            return abort(406)
+            raise RestError(406)
 
         # Prompt user to confirm.
         self.on_watchonly()
-        confirmed = self.watch_only_waiter.wait_confirmation()
+        confirmed = await self.run_blocking(self.watch_only_waiter.wait_confirmation)
 
         if not confirmed:
             logger.warning("Watch only rejected")
-            return abort(403)
+            raise RestError(403)
 
         logger.info("Returning watch only credentials...")
         res = MoneroWatchKey(
             watch_key=crypto.encodeint(self.creds.view_key_private),
             address=self.creds.address,
         )
-
-        return jsonify({"result": True, "payload": await self.proto_res(res)})
+        return res
 
     async def on_tx_sign(self, request=None):
         """
@@ -330,24 +227,19 @@ class TrezorServer(cli.BaseCli):
         :return:
         """
         js = request.json
+        msg = await self.unproto_req(js)
 
-        try:
-            js = request.json
-            msg = await self.unproto_req(js)
+        if not self.trez:
+            logger.warning("Transaction signing request on unitialized Trezor")
+            raise RestError(404)
 
-            if not self.trez:
-                logger.warning("Transaction signing request on unitialized Trezor")
-                return abort(404)
-
-            try:
-                res = await self.trez.tsx_sign(msg)
-                return jsonify({"result": True, "payload": await self.proto_res(res)})
-
-            except Exception as e:
-                return jsonify({"result": False, "exc": e})
+        try:
+            res = await self.trez.tsx_sign(msg, js.get("session_id"))
+            return {"result": True, "payload": await self.proto_res(res)}
 
         except Exception as e:
-            traceback.print_exc()
+            logger.error("Transaction signing error: %s" % e)
+            return {"result": False, "exc": str(e)}
 
     async def on_ki_sync(self, request=None):
         """
@@ -355,23 +247,54 @@ class TrezorServer(cli.BaseCli):
         :param request:
         :return:
         """
+        js = request.json
+        msg = await self.unproto_req(js)
+
+        if not self.trez:
+            logger.warning("KeyImage sync request on unitialized Trezor")
+            raise RestError(404)
+
         try:
-            js = request.json
-            msg = await self.unproto_req(js)
+            res = await self.trez.key_image_sync(msg, js.get("session_id"))
+            return {"result": True, "payload": await self.proto_res(res)}
 
-            if not self.trez:
-                logger.warning("KeyImage sync request on unitialized Trezor")
-                return abort(404)
+        except Exception as e:
+            logger.error("KeyImage sync error: %s" % e)
+            return {"result": False, "exc": str(e)}
 
-            try:
-                res = await self.trez.key_image_sync(msg)
-                return jsonify({"result": True, "payload": await self.proto_res(res)})
+    async def on_bin(self, request=None):
+        """
+        Binary frame request
+        :param request:
+        :return:
+        """
+        try:
+            body = binproto.strip_len(request.body)
+        except binproto.BinProtoError:
+            raise RestError(400)
 
-            except Exception as e:
-                return jsonify({"result": False, "exc": e})
+        res = await binproto.handle_frame(self.bin_handler, body)
+        return rest_server.RestResponse(res, content_type="application/octet-stream")
 
-        except Exception as e:
-            traceback.print_exc()
+    async def bin_handler(self, method, session_id, msg):
+        """
+        Binary transport dispatch, HTTP and raw socket
+        :param method:
+        :param session_id:
+        :param msg:
+        :return:
+        """
+        if method == "ping":
+            return DebugMoneroDiagAck()
+        if method == "watch_only":
+            return await self.watch_only_msg()
+        if not self.trez:
+            raise ValueError("Trezor not initialized")
+        if method == "tx_sign":
+            return await self.trez.tsx_sign(msg, session_id)
+        if method == "ki_sync":
+            return await self.trez.key_image_sync(msg, session_id)
+        raise ValueError("Unknown method: %s" % method)
 
     async def unproto_req(self, req):
         if "payload" not in req:
@@ -380,16 +303,11 @@ class TrezorServer(cli.BaseCli):
         return await self.unproto_msg(binascii.unhexlify(msg.encode("utf8")), msg_type)
 
     async def unproto_msg(self, msg, msg_type):
-        reader = xmrserialize.MemoryReaderWriter(bytearray(msg))
-        return await protobuf.load_message(
-            reader, messages.get_message_from_type(msg_type)
-        )
+        return protobuf.decode_message(msg, messages.get_message_from_type(msg_type))
 
     async def proto_res(self, res):
-        writer = xmrserialize.MemoryReaderWriter()
-        await protobuf.dump_message(writer, res)
         return {
-            "msg": binascii.hexlify(bytes(writer.get_buffer())).decode("ascii"),
+            "msg": binascii.hexlify(protobuf.encode_message(res)).decode("ascii"),
             "msg_type": messages.get_message_type(res),
         }
 
@@ -443,29 +361,57 @@ class TrezorServer(cli.BaseCli):
         self.poutput("-" * 80)
         self.poutput("Watch-only request received\nEnter W to confirm/reject\n")
 
-    def on_confirm_start(self):
+    def on_confirm_start(self, pending):
         self.poutput("-" * 80)
-        self.poutput("Transaction confirmation procedure\nEnter T to start\n")
+        self.poutput(
+            "Transaction confirmation procedure, session %s\nEnter T %s to start\n"
+            % (pending.name(), pending.name())
+        )
 
     def on_transaction_signed(self):
         self.poutput("-" * 80)
         self.poutput("Transaction was successfully signed\n")
 
-    def on_confirm_ki_sync(self, msg):
-        self.ki_sync_data = msg
+    def on_confirm_ki_sync(self, pending):
         self.poutput("-" * 80)
-        self.poutput("Key image sync procedure\nEnter K to start\n")
+        self.poutput(
+            "Key image sync procedure, session %s\nEnter K %s to start\n"
+            % (pending.name(), pending.name())
+        )
+
+    def select_pending(self, kind, line):
+        """
+        Pending confirmation named on the command line.
+        The session can be omitted if only one session waits.
+        :param kind:
+        :param line:
+        :return:
+        """
+        session_id = line.strip() if line and line.strip() else None
+        pending = self.trez_iface.get_pending(kind, session_id)
+        if pending is not None:
+            return pending
+
+        waiting = self.trez_iface.list_pending(kind)
+        if session_id is not None or not waiting:
+            self.poutput("No prompt for the session" if waiting else "No prompt")
+        else:
+            self.poutput(
+                "Sessions waiting: %s, select one"
+                % ", ".join(x.name() for x in waiting)
+            )
+        return None
 
     def conv_disp_amount(self, amount):
         return wallet.conv_disp_amount(amount)
 
     def do_T(self, line):
-        if not self.trez_iface.in_confirmation:
-            self.poutput("No transaction in progress")
+        pending = self.select_pending(token_iface.KIND_TSX, line)
+        if pending is None:
             return
 
-        tsx_data = self.trez_iface.get_tx_data()
-        self.poutput("Confirming transaction:")
+        tsx_data = pending.data
+        self.poutput("Confirming transaction, session %s:" % pending.name())
         self.poutput("- " * 40)
         if tsx_data.payment_id:
             self.poutput(
@@ -517,7 +463,7 @@ class TrezorServer(cli.BaseCli):
             "Do you confirm the transaction? ",
         )
         self.poutput("\n")
-        self.trez_iface.confirmation(result == 0)
+        self.trez_iface.confirmation(pending, result == 0)
         self.update_prompt()
 
     def do_W(self, line):
@@ -549,19 +495,21 @@ class TrezorServer(cli.BaseCli):
         self.update_prompt()
 
     def do_K(self, line):
-        if not self.trez_iface.ki_sync_waiter.in_confirmation:
-            self.poutput("No prompt")
+        pending = self.select_pending(token_iface.KIND_KI_SYNC, line)
+        if pending is None:
             return
 
-        self.poutput("Agent asks to perform key image sync.")
-        self.poutput("Syncing %s outputs" % self.ki_sync_data.num)
+        self.poutput(
+            "Agent asks to perform key image sync, session %s." % pending.name()
+        )
+        self.poutput("Syncing %s outputs" % pending.data.num)
 
         result = self.select(
             [(0, "Confirm"), (1, "Reject")], "Do you want to proceed? "
         )
 
         self.poutput("\n")
-        self.trez_iface.ki_sync_waiter.confirmation(result == 0)
+        self.trez_iface.confirmation(pending, result == 0)
         self.update_prompt()
 
     do_t = do_T
@@ -572,17 +520,11 @@ class TrezorServer(cli.BaseCli):
     # Work
     #
 
-    def loop_work(self, loop):
-        """
-        Looping worker
-        :return:
-        """
-        asyncio.set_event_loop(loop)
-        loop.run_forever()
-
     def rest_thread_work(self):
         """
         Main work method for the server - accepting incoming connections.
+        Requests are served on the asyncio loop of this thread, the token
+        and CLI confirmations run in the worker threads.
         :return:
         """
         logger.info(
@@ -590,21 +532,22 @@ class TrezorServer(cli.BaseCli):
             % (os.getpid(), os.getppid(), threading.current_thread(), self.debug)
         )
         try:
-            self.worker_loop = asyncio.new_event_loop()
             self.rest_loop = asyncio.new_event_loop()
             asyncio.set_event_loop(self.rest_loop)
-
-            worker = threading.Thread(target=self.loop_work, args=(self.worker_loop,))
-            worker.setDaemon(True)
-            worker.start()
+            self.executor = ThreadPoolExecutor(max_workers=4)
 
             self.init_rest()
-            if self.debug or self.use_werkzeug:
-                self.serve_werkzeug()
-            else:
-                self.serve_eventlet()
+            self.rest_loop.run_until_complete(self.server.start())
+            logger.info("Started rest server on port %s" % self.port)
+
+            for url in self.args.bin_listen or []:
+                self.rest_loop.run_until_complete(
+                    binproto.start_stream_server(self.bin_handler, url)
+                )
+                logger.info("Started binary server on %s" % url)
+            self.rest_loop.run_forever()
 
-            logger.info("Terminating flask: %s" % self.flask)
+            logger.info("Terminating rest server")
 
         except Exception as e:
             logger.error("Exception: %s" % e)
@@ -768,7 +711,13 @@ class TrezorServer(cli.BaseCli):
         )
         self.update_intro()
 
-        self.trez = token.TokenLite()
+        self.trez = token.TokenLite(
+            live_session=self.args.live_session,
+            max_sessions=self.args.max_sessions,
+            mem_limit=self.args.session_mem,
+            session_timeout=self.args.session_timeout,
+            workers=max(1, self.args.workers),
+        )
         self.trez.creds = self.creds
         self.trez.iface = self.trez_iface
         self.update_prompt()
@@ -830,6 +779,55 @@ class TrezorServer(cli.BaseCli):
             help="Debug",
         )
 
+        parser.add_argument(
+            "--live-session",
+            dest="live_session",
+            default=False,
+            action="store_const",
+            const=True,
+            help="Keeps the transaction builder between protocol messages",
+        )
+
+        parser.add_argument(
+            "--max-sessions",
+            dest="max_sessions",
+            type=int,
+            default=None,
+            help="Maximum number of concurrent signing / key image sync sessions",
+        )
+
+        parser.add_argument(
+            "--session-mem",
+            dest="session_mem",
+            type=int,
+            default=None,
+            help="Session state memory limit in bytes, idle sessions are evicted",
+        )
+
+        parser.add_argument(
+            "--session-timeout",
+            dest="session_timeout",
+            type=float,
+            default=600,
+            help="Seconds after an idle session is considered abandoned",
+        )
+
+        parser.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            default=4,
+            help="Worker threads processing the session messages",
+        )
+
+        parser.add_argument(
+            "--bin-listen",
+            dest="bin_listen",
+            action="append",
+            default=[],
+            help="Binary transport listener, tcp://host:port or unix:///path",
+        )
+
         parser.add_argument(
             "--account-file",
             dest="account_file",
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+#
+# Binary token transport: length prefixed protobuf frames.
+#
+# Request frame:  u32 len | u8 method len | method | u8 session len | session | u16 msg type | msg
+# Response frame: u32 len | u8 status | u16 msg type | msg (status error: utf8 error text)
+#
+# Frames are sent over a keep-alive HTTP connection (POST /api/v1.0/bin)
+# or over a raw TCP / Unix socket.
+#
+
+import asyncio
+import logging
+import select
+import socket
+import struct
+import traceback
+from urllib.parse import urlparse
+
+from monero_glue import protobuf
+from monero_glue.protocol_base import messages
+
+logger = logging.getLogger(__name__)
+
+FRAME_LEN = struct.Struct(">I")
+MSG_TYPE = struct.Struct(">H")
+MAX_FRAME = 64 * 1024 * 1024
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+BIN_PATH = "/api/v1.0/bin"
+
+
+class BinProtoError(Exception):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+
+async def dump_msg(msg):
+    """
+    Serializes the protobuf message
+    :param msg:
+    :return: msg type, bytes
+    """
+    return messages.get_message_type(msg), bytes(protobuf.encode_message(msg))
+
+
+async def load_msg(msg_type, data):
+    """
+    Parses the protobuf message
+    :param msg_type:
+    :param data:
+    :return:
+    """
+    return protobuf.decode_message(data, messages.get_message_from_type(msg_type))
+
+
+def encode_request(method, session_id, msg_type, data):
+    """
+    Request frame, with the length prefix
+    :param method:
+    :param session_id:
+    :param msg_type:
+    :param data:
+    :return:
+    """
+    method = method.encode("utf8")
+    session_id = (session_id or "").encode("utf8")
+    body = b"".join(
+        (
+            bytes([len(method)]),
+            method,
+            bytes([len(session_id)]),
+            session_id,
+            MSG_TYPE.pack(msg_type),
+            data,
+        )
+    )
+    return FRAME_LEN.pack(len(body)) + body
+
+
+def decode_request(body):
+    """
+    Parses request frame body, without the length prefix
+    :param body:
+    :return: method, session id, msg type, msg bytes
+    """
+    try:
+        mv = memoryview(body)
+        off = 1 + mv[0]
+        method = bytes(mv[1:off]).decode("utf8")
+        slen = mv[off]
+        session_id = bytes(mv[off + 1 : off + 1 + slen]).decode("utf8") or None
+        off += 1 + slen
+        (msg_type,) = MSG_TYPE.unpack_from(mv, off)
+        return method, session_id, msg_type, bytes(mv[off + MSG_TYPE.size :])
+
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise BinProtoError("Malformed request frame: %s" % e)
+
+
+def encode_response(status, msg_type, data):
+    """
+    Response frame, with the length prefix
+    :param status:
+    :param msg_type:
+    :param data:
+    :return:
+    """
+    body = bytes([status]) + MSG_TYPE.pack(msg_type) + data
+    return FRAME_LEN.pack(len(body)) + body
+
+
+def decode_response(body):
+    """
+    Parses response frame body, without the length prefix
+    :param body:
+    :return: msg type, msg bytes
+    """
+    if len(body) < 1 + MSG_TYPE.size:
+        raise BinProtoError("Malformed response frame")
+    if body[0] != STATUS_OK:
+        raise BinProtoError(bytes(body[1 + MSG_TYPE.size :]).decode("utf8"))
+    (msg_type,) = MSG_TYPE.unpack_from(body, 1)
+    return msg_type, bytes(body[1 + MSG_TYPE.size :])
+
+
+def strip_len(frame):
+    """
+    Frame body of the length prefixed frame
+    :param frame:
+    :return:
+    """
+    if len(frame) < FRAME_LEN.size:
+        raise BinProtoError("Truncated frame")
+    (flen,) = FRAME_LEN.unpack_from(frame)
+    if flen != len(frame) - FRAME_LEN.size:
+        raise BinProtoError("Frame length mismatch")
+    return memoryview(frame)[FRAME_LEN.size :]
+
+
+async def handle_frame(handler, body):
+    """
+    Processes the request frame body with the handler, returns response frame.
+    handler(method, session_id, msg) returns the response message.
+    :param handler:
+    :param body:
+    :return:
+    """
+    try:
+        method, session_id, msg_type, data = decode_request(body)
+        msg = await load_msg(msg_type, data)
+        res = await handler(method, session_id, msg)
+        return encode_response(STATUS_OK, *(await dump_msg(res)))
+
+    except Exception as e:
+        logger.warning("Binary request error: %s" % e)
+        logger.debug(traceback.format_exc())
+        return encode_response(STATUS_ERROR, 0, str(e).encode("utf8"))
+
+
+async def serve_stream(handler, reader, writer):
+    """
+    Raw socket connection handler, frames are processed in order
+    :param handler:
+    :param reader:
+    :param writer:
+    :return:
+    """
+    try:
+        while True:
+            try:
+                hdr = await reader.readexactly(FRAME_LEN.size)
+            except asyncio.IncompleteReadError:
+                break
+
+            (flen,) = FRAME_LEN.unpack(hdr)
+            if flen > MAX_FRAME:
+                break
+
+            body = await reader.readexactly(flen)
+            writer.write(await handle_frame(handler, body))
+            await writer.drain()
+
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+
+    finally:
+        writer.close()
+
+
+async def start_stream_server(handler, url):
+    """
+    Starts raw socket server on tcp://host:port or unix:///path
+    :param handler:
+    :param url:
+    :return:
+    """
+
+    async def on_conn(reader, writer):
+        await serve_stream(handler, reader, writer)
+
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        return await asyncio.start_unix_server(on_conn, path=parsed.path)
+    elif parsed.scheme == "tcp":
+        return await asyncio.start_server(on_conn, parsed.hostname, parsed.port)
+    raise ValueError("Unsupported scheme: %s" % parsed.scheme)
+
+
+class SocketChannel(object):
+    """
+    Persistent blocking socket channel to the binary token server,
+    reconnects on a broken connection.
+    """
+
+    def __init__(self, url, timeout=None):
+        self.url = urlparse(url)
+        self.timeout = timeout
+        self.sock = None
+
+    def connect(self):
+        if self.url.scheme == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            addr = self.url.path
+        elif self.url.scheme == "tcp":
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            addr = (self.url.hostname, self.url.port)
+        else:
+            raise ValueError("Unsupported scheme: %s" % self.url.scheme)
+
+        sock.settimeout(self.timeout)
+        sock.connect(addr)
+        self.sock = sock
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def recv_exact(self, size):
+        buf = bytearray(size)
+        mv = memoryview(buf)
+        got = 0
+        while got < size:
+            n = self.sock.recv_into(mv[got:])
+            if n == 0:
+                raise ConnectionError("Connection closed")
+            got += n
+        return buf
+
+    def stale(self):
+        """
+        Kept-alive socket is readable while idle: closed by the peer or out of sync
+        :return:
+        """
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+            return bool(readable)
+        except (OSError, ValueError):
+            return True
+
+    def exchange(self, frame):
+        """
+        Sends the request frame, returns the response frame body.
+        Stale kept-alive connection is replaced before sending. The request is
+        repeated on a new connection only if nothing of it was written, steps of
+        the protocol are not idempotent.
+        :param frame:
+        :return:
+        """
+        if self.sock is not None and self.stale():
+            self.close()
+
+        mv = memoryview(frame)
+        for _ in range(2):
+            fresh = self.sock is None
+            if fresh:
+                self.connect()
+
+            sent = 0
+            try:
+                while sent < len(mv):
+                    sent += self.sock.send(mv[sent:])
+                (flen,) = FRAME_LEN.unpack(self.recv_exact(FRAME_LEN.size))
+                return self.recv_exact(flen)
+
+            except (ConnectionError, socket.timeout):
+                self.close()
+                if fresh or sent:
+                    raise
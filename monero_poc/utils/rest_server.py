@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+#
+# Minimal asyncio HTTP/1.1 JSON server for the PoC token server.
+# Connections are kept alive, pipelined requests are handled concurrently
+# and responded in the request order.
+#
+
+import asyncio
+import json
+import logging
+import traceback
+from http import HTTPStatus
+
+logger = logging.getLogger(__name__)
+
+
+class RestError(Exception):
+    def __init__(self, status=500, message=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.status = status
+        self.message = message
+
+
+class RestRequest(object):
+    """
+    Parsed HTTP request
+    """
+
+    def __init__(self, method=None, path=None, version=None, headers=None, body=b""):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers if headers else {}
+        self.body = body
+
+    @property
+    def json(self):
+        return json.loads(self.body.decode("utf8")) if self.body else None
+
+    def keep_alive(self):
+        conn = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return conn == "keep-alive"
+        return conn != "close"
+
+
+class RestResponse(object):
+    """
+    HTTP response
+    """
+
+    def __init__(self, body=b"", status=200, content_type="application/json"):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+
+    def serialize(self, keep_alive=True):
+        try:
+            reason = HTTPStatus(self.status).phrase
+        except ValueError:
+            reason = "Unknown"
+
+        head = [
+            "HTTP/1.1 %d %s" % (self.status, reason),
+            "Content-Type: %s" % self.content_type,
+            "Content-Length: %d" % len(self.body),
+            "Connection: %s" % ("keep-alive" if keep_alive else "close"),
+        ]
+        return ("\r\n".join(head) + "\r\n\r\n").encode("ascii") + self.body
+
+
+def json_response(obj, status=200):
+    """
+    JSON response
+    :param obj:
+    :param status:
+    :return:
+    """
+    return RestResponse(json.dumps(obj).encode("utf8"), status=status)
+
+
+class RestServer(object):
+    """
+    Asyncio HTTP server. Handlers are coroutines taking RestRequest
+    and returning RestResponse or a JSON serializable object.
+    """
+
+    MAX_HEADER = 64 * 1024
+    MAX_BODY = 64 * 1024 * 1024
+
+    def __init__(self, host="0.0.0.0", port=46123, max_pipeline=16):
+        self.host = host
+        self.port = port
+        self.max_pipeline = max_pipeline
+        self.routes = {}  # path -> (methods, handler)
+        self.server = None
+
+    def route(self, path, methods=("GET",)):
+        """
+        Handler registration decorator
+        :param path:
+        :param methods:
+        :return:
+        """
+
+        def wrapper(fnc):
+            self.routes[path] = (set(methods), fnc)
+            return fnc
+
+        return wrapper
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle_conn, self.host, self.port, limit=self.MAX_HEADER
+        )
+        return self.server
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def read_request(self, reader):
+        """
+        Reads one request, None on the connection end
+        :param reader:
+        :return:
+        """
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+
+        lines = head.decode("latin1").split("\r\n")
+        method, path, version = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            key, val = line.split(":", 1)
+            headers[key.strip().lower()] = val.strip()
+
+        clen = int(headers.get("content-length", 0))
+        if clen > self.MAX_BODY:
+            raise RestError(413)
+        body = await reader.readexactly(clen) if clen else b""
+        return RestRequest(method, path.split("?", 1)[0], version, headers, body)
+
+    async def dispatch(self, request):
+        """
+        Calls the request handler
+        :param request:
+        :return:
+        """
+        try:
+            if request.path not in self.routes:
+                raise RestError(404)
+
+            methods, handler = self.routes[request.path]
+            if request.method not in methods:
+                raise RestError(405)
+
+            res = await handler(request)
+            return res if isinstance(res, RestResponse) else json_response(res)
+
+        except RestError as e:
+            return json_response({"result": False, "error": e.message}, e.status)
+
+        except Exception as e:
+            logger.error("Request handler error: %s" % e)
+            logger.debug(traceback.format_exc())
+            return json_response({"result": False, "error": str(e)}, 500)
+
+    async def handle_conn(self, reader, writer):
+        """
+        Connection handler. Requests are read ahead and dispatched
+        as they arrive, responses are written in the request order.
+        :param reader:
+        :param writer:
+        :return:
+        """
+        pending = asyncio.Queue(self.max_pipeline)
+
+        async def respond():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                task, keep_alive = item
+                res = await task
+                writer.write(res.serialize(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+
+        responder = asyncio.ensure_future(respond())
+        try:
+            while not responder.done():
+                try:
+                    request = await self.read_request(reader)
+                except (RestError, ValueError, asyncio.LimitOverrunError) as e:
+                    status = e.status if isinstance(e, RestError) else 400
+                    await pending.put((self.completed(json_response({}, status)), False))
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    # Truncated request or connection lost, earlier ones are answered
+                    break
+
+                if request is None:
+                    break
+
+                keep_alive = request.keep_alive()
+                task = asyncio.ensure_future(self.dispatch(request))
+                await pending.put((task, keep_alive))
+                if not keep_alive:
+                    break
+
+            if not responder.done():
+                await pending.put(None)
+            await responder
+
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+        finally:
+            if not responder.done():
+                responder.cancel()
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item:
+                    item[0].cancel()
+            writer.close()
+
+    @staticmethod
+    def completed(res):
+        fut = asyncio.get_event_loop().create_future()
+        fut.set_result(res)
+        return fut
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Author: Dusan Klinec, ph4r05, 2018
+
+import logging
+import threading
+
+from monero_glue.hwtoken import iface
+
+logger = logging.getLogger(__name__)
+
+
+KIND_TSX = "tsx"
+KIND_KI_SYNC = "ki_sync"
+
+
+class PendingConfirmation(object):
+    """
+    Confirmation request of one session waiting for the operator
+    """
+
+    def __init__(self, kind, session_id=None, data=None):
+        self.kind = kind
+        self.session_id = session_id
+        self.data = data
+        self.result = False
+        self.event = threading.Event()
+
+    def name(self):
+        return "-" if self.session_id is None else str(self.session_id)
+
+
+class SessionInterface(object):
+    """
+    Token interface bound to one session.
+    Confirmations are registered under the session, the rest is delegated.
+    """
+
+    def __init__(self, parent, session_id=None):
+        self.parent = parent
+        self.session_id = session_id
+
+    def __getattr__(self, item):
+        return getattr(self.parent, item)
+
+    async def confirm_transaction(self, tsx_data, creds=None, ctx=None):
+        return self.parent.wait_confirmation(KIND_TSX, self.session_id, tsx_data)
+
+    async def confirm_ki_sync(self, init_msg, ctx=None):
+        return self.parent.wait_confirmation(KIND_KI_SYNC, self.session_id, init_msg)
+
+
+class TokenInterface(iface.TokenInterface):
+    """
+    Server token interface, confirmations are made by the operator on the CLI.
+    Each session waiting for the confirmation has its own pending entry
+    so concurrent sessions do not overwrite each other.
+    """
+
+    def __init__(self, server=None):
+        super().__init__()
+        self.server = server
+        self.lock = threading.Lock()
+        self.pending = []  # type: list[PendingConfirmation]
+
+    def session(self, session_id):
+        return SessionInterface(self, session_id)
+
+    def list_pending(self, kind):
+        with self.lock:
+            return [x for x in self.pending if x.kind == kind]
+
+    def get_pending(self, kind, session_id=None):
+        """
+        Returns the pending confirmation of the session.
+        Without the session the only pending confirmation is returned.
+        :param kind:
+        :param session_id:
+        :return:
+        """
+        pending = self.list_pending(kind)
+        if session_id is None:
+            return pending[0] if len(pending) == 1 else None
+        for x in pending:
+            if x.name() == str(session_id):
+                return x
+        return None
+
+    def confirmation(self, pending, confirmed):
+        pending.result = confirmed
+        pending.event.set()
+
+    def wait_confirmation(self, kind, session_id=None, data=None):
+        """
+        Blocks the calling session until the operator decides
+        :param kind:
+        :param session_id:
+        :param data:
+        :return:
+        """
+        pending = PendingConfirmation(kind, session_id, data)
+        with self.lock:
+            self.pending.append(pending)
+
+        try:
+            self.server.update_prompt()
+            if kind == KIND_TSX:
+                self.server.on_confirm_start(pending)
+            else:
+                self.server.on_confirm_ki_sync(pending)
+
+            pending.event.wait()
+            return pending.result
+
+        finally:
+            with self.lock:
+                self.pending.remove(pending)
+            self.server.update_prompt()
+
+    async def confirm_transaction(self, tsx_data, creds=None, ctx=None):
+        return self.wait_confirmation(KIND_TSX, None, tsx_data)
+
+    async def transaction_signed(self, ctx=None):
+        logger.debug("Transaction signed")
+
+    async def transaction_error(self, *args, **kwargs):
+        logger.error("Transaction error: %s %s" % (args, kwargs))
+
+    async def transaction_finished(self, ctx=None):
+        self.server.on_transaction_signed()
+
+    async def transaction_step(self, step, sub_step=None, sub_step_total=None):
+        logger.debug("Transaction step: %s, sub step: %s" % (step, sub_step))
+
+    async def confirm_ki_sync(self, init_msg, ctx=None):
+        return self.wait_confirmation(KIND_KI_SYNC, None, init_msg)
+
+    async def ki_error(self, e, ctx=None):
+        logger.error("ki sync error: %s" % e)
+
+    async def ki_step(self, i, ctx=None):
+        logger.debug("ki sync progress: %s" % i)
+
+    async def ki_finished(self, ctx=None):
+        logger.info("ki sync finished")
@@ -10,31 +10,58 @@
 
 import binascii
 import logging
+import os
 import pickle
+from urllib.parse import urlparse
 
 import requests
 from monero_glue import protobuf
 from monero_glue.hwtoken import token
+from monero_glue.messages import DebugMoneroDiagRequest
 from monero_glue.protocol_base import messages
-from monero_serialize import xmrserialize
+from monero_poc.utils import binproto
 
 logger = logging.getLogger(__name__)
 
 
 class TokenProxy(token.TokenLite):
     """
-    Trezor proxy calls to the remote server
+    Trezor proxy calls to the remote server.
+
+    Transport is selected by the URL scheme:
+     - http://, https:// - hex coded protobuf in JSON
+     - http+bin://, https+bin:// - binary frames over HTTP
+     - tcp://host:port, unix:///path - binary frames over raw socket
+    Connections are kept alive between the calls.
     """
 
+    BINARY_SCHEMES = ("http+bin", "https+bin", "tcp", "unix")
+
     def __init__(self, url=None, *args, **kwargs):
         super().__init__()
-        self.url = "http://127.0.0.1:46123" if url is None else url
+        url = "http://127.0.0.1:46123" if url is None else url
+        scheme = urlparse(url).scheme
+        self.binary = scheme in self.BINARY_SCHEMES
+        self.url = url.replace("+bin://", "://", 1)
         self.endpoint = "%s/api/v1.0" % self.url
-
-    async def transfer(self, method, cmd, payload):
+        self.session_id = binascii.hexlify(os.urandom(8)).decode("ascii")
+        self.http = requests.Session()
+        self.channel = None
+        if scheme in ("tcp", "unix"):
+            self.channel = binproto.SocketChannel(self.url)
+
+    def close(self):
+        super().close()
+        self.http.close()
+        if self.channel:
+            self.channel.close()
+
+    async def transfer(self, method, cmd, payload, session_id=None):
         endp = "%s/%s" % (self.endpoint, method)
         req = {"cmd": cmd, "payload": payload}
-        resp = requests.post(endp, json=req)
+        if session_id is not None:
+            req["session_id"] = session_id
+        resp = self.http.post(endp, json=req)
         resp.raise_for_status()
         return resp.json()
 
@@ -53,28 +80,51 @@ class TokenProxy(token.TokenLite):
         res = pickle.loads(pickle_data)
         return res
 
-    async def transfer_protobuf(self, method, msg: protobuf.MessageType):
+    async def transfer_protobuf(
+        self, method, msg: protobuf.MessageType, session_id=None
+    ):
         logger.debug("Method: %s" % method)
-        writer = xmrserialize.MemoryReaderWriter()
+        if self.binary:
+            return await self.transfer_binary(method, msg, session_id)
 
-        await protobuf.dump_message(writer, msg)
-        proto_bin = bytes(writer.get_buffer())
+        proto_bin = bytes(protobuf.encode_message(msg))
         payload = {
             "msg_type": messages.get_message_type(msg),
             "msg": binascii.hexlify(proto_bin).decode("utf8"),
         }
 
-        resp = await self.transfer(method, "", payload)
+        resp = await self.transfer(method, "", payload, session_id)
         resp_bin = binascii.unhexlify(resp["payload"]["msg"].encode("utf8"))
         logger.debug(
             "Req size: %s, response size: %s" % (len(proto_bin), len(resp_bin))
         )
 
-        reader = xmrserialize.MemoryReaderWriter(bytearray(resp_bin))
-        res = await protobuf.load_message(
-            reader, messages.get_message_from_type(resp["payload"]["msg_type"])
+        return protobuf.decode_message(
+            resp_bin, messages.get_message_from_type(resp["payload"]["msg_type"])
         )
-        return res
+
+    async def transfer_binary(
+        self, method, msg: protobuf.MessageType, session_id=None
+    ):
+        msg_type, proto_bin = await binproto.dump_msg(msg)
+        frame = binproto.encode_request(method, session_id, msg_type, proto_bin)
+
+        if self.channel:
+            body = self.channel.exchange(frame)
+        else:
+            resp = self.http.post(
+                self.url + binproto.BIN_PATH,
+                data=frame,
+                headers={"Content-Type": "application/octet-stream"},
+            )
+            resp.raise_for_status()
+            body = binproto.strip_len(resp.content)
+
+        resp_type, resp_bin = binproto.decode_response(body)
+        logger.debug(
+            "Req size: %s, response size: %s" % (len(proto_bin), len(resp_bin))
+        )
+        return await binproto.load_msg(resp_type, resp_bin)
 
     async def call(self, msg, recode=True):
         return await self.transfer_protobuf("call", msg)
@@ -83,15 +133,31 @@ class TokenProxy(token.TokenLite):
         return await self.transfer_protobuf("call", msg)
 
     async def ping(self, message=None, **kwargs):
-        resp = requests.get("%s/ping" % self.endpoint)
+        if self.channel:
+            await self.transfer_binary("ping", DebugMoneroDiagRequest())
+            return {"result": True}
+
+        resp = self.http.get("%s/ping" % self.endpoint)
         resp.raise_for_status()
         return resp.json()
 
     async def get_view_key(self, msg):
         return await self.transfer_protobuf("watch_only", msg)
 
-    async def tsx_sign(self, msg):
-        return await self.transfer_protobuf("tx_sign", msg)
+    def server_session(self, session_id=None):
+        """
+        Server-side session of the request, each proxy has its own by default
+        :param session_id:
+        :return:
+        """
+        return self.session_id if session_id is None else session_id
+
+    async def tsx_sign(self, msg, session_id=None):
+        return await self.transfer_protobuf(
+            "tx_sign", msg, self.server_session(session_id)
+        )
 
-    async def key_image_sync(self, msg, *args, **kwargs):
-        return await self.transfer_protobuf("ki_sync", msg)
+    async def key_image_sync(self, msg, session_id=None):
+        return await self.transfer_protobuf(
+            "ki_sync", msg, self.server_session(session_id)
+        )
@@ -42,10 +42,6 @@ poc_extras = [
     "shellescape",
     "coloredlogs",
     "blessed>=1.14.1",
-    "flask>=0.12",
-    "flask-socketio",
-    "eventlet",
-    "gevent",
     "sarge",
 ]
 
@@ -65,16 +61,30 @@ TREZOR_COMMON = os.path.join(CWD, 'vendor', 'trezor-common')
 
 
 class PrebuildCommand(Command):
-    description = 'update vendored files (coins.json, protobuf messages)'
-    user_options = []
+    """
+    monero_glue/messages is maintained in the tree and is not regenerated
+    on build. The Monero messages extend the trezor-common definitions
+    (batched tsx_sign steps, wire types 512-514), pb2py would drop them.
+    Use --messages-out to regenerate to another directory and merge by hand.
+    """
+    description = 'regenerate protobuf messages from trezor-common'
+    user_options = [
+        ('messages-out=', None, 'output directory of the regenerated messages'),
+    ]
 
     def initialize_options(self):
-        pass
+        self.messages_out = None
 
     def finalize_options(self):
         pass
 
     def run(self):
+        if self.messages_out is None:
+            return
+        messages_dir = os.path.join(CWD, "monero_glue", "messages")
+        if os.path.realpath(self.messages_out) == messages_dir:
+            raise DistutilsError('Regenerating in place drops the in-tree message extensions')
+
         # check for existence of the submodule directory
         common_defs = os.path.join(TREZOR_COMMON, 'defs')
         if not os.path.exists(common_defs):
@@ -87,7 +97,7 @@ class PrebuildCommand(Command):
             subprocess.check_call([
                 sys.executable,
                 os.path.join(TREZOR_COMMON, "protob", "pb2py"),
-                "-o", os.path.join(CWD, "monero_glue", "messages"),
+                "-o", self.messages_out,
                 "-P", "..protobuf",
             ] + proto_srcs)
         except Exception as e:
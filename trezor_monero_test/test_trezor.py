@@ -101,3 +101,14 @@ class TrezorTest(BaseAgentTest):
                 )
 
                 await self.tx_sign_test(self.agent, unsigned_tx, creds, all_creds, fl)
+
+    async def test_flow_session(self):
+        creds = self.get_trezor_creds(0)
+        unsigned_tx_c = self.get_data_file("tsx_t_uns_01.txt")
+        unsigned_tx = await wallet.load_unsigned_tx(creds.view_key_private, unsigned_tx_c)
+
+        # One transport session for the whole transaction
+        ctr = self.trezor_proxy.session_ctr
+        await self.agent.sign_unsigned_tx(unsigned_tx)
+        self.assertEqual(self.trezor_proxy.session_ctr, ctr + 1)
+        self.assertEqual(self.trezor_proxy.session_depth, 0)